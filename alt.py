@@ -0,0 +1,145 @@
+# alt.py
+import heapq
+import math
+import random
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from road_graph import RoadGraph, single_source
+
+
+class LandmarkOracle:
+
+    def __init__(
+        self,
+        graph: RoadGraph,
+        num_landmarks: int = 16,
+        active_landmarks: int = 4,
+        seed: int = 1,
+    ):
+        self.graph = graph
+        self.n = graph.n
+
+        self.active_landmarks = max(1, int(active_landmarks))
+        self.landmarks: List[int] = []
+
+        k = max(1, min(int(num_landmarks), self.n))
+        # d_from[i, v] = d(L_i, v), d_to[i, v] = d(v, L_i)
+        self.d_from = np.full((k, self.n), np.inf, dtype=np.float32)
+        self.d_to = np.full((k, self.n), np.inf, dtype=np.float32)
+        self._select_landmarks(k, random.Random(int(seed)))
+
+        finite = np.concatenate([self.d_from[np.isfinite(self.d_from)], self.d_to[np.isfinite(self.d_to)]])
+        max_finite = float(finite.max()) if finite.size else 0.0
+        # float32 zaokruživanje ne smije učiniti ocjenu nedopustivom
+        self.slack = 0.01 + 1e-6 * max_finite
+
+    def _select_landmarks(self, k: int, rng: random.Random) -> None:
+        score = np.full(self.n, np.inf)
+        cur = rng.randrange(self.n)
+        for i in range(k):
+            self.landmarks.append(cur)
+            d_from = single_source(self.graph, cur)
+            d_to = single_source(self.graph, cur, reverse=True)
+            self.d_from[i] = d_from
+            self.d_to[i] = d_to
+
+            # farthest: sljedeći landmark je čvor najudaljeniji od svih dosadašnjih
+            near = np.minimum(d_from, d_to)
+            score = np.minimum(score, np.where(np.isfinite(near), near, -1.0))
+            score[self.landmarks] = -1.0
+            nxt = int(np.argmax(score))
+            if score[nxt] <= 0.0:
+                self.d_from = self.d_from[: i + 1]
+                self.d_to = self.d_to[: i + 1]
+                break
+            cur = nxt
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.d_from.nbytes + self.d_to.nbytes)
+
+    @staticmethod
+    def _per_landmark(from_s, from_t, to_s, to_t) -> np.ndarray:
+        # d(s,t) >= d(L,t) - d(L,s) i d(s,t) >= d(s,L) - d(t,L)
+        with np.errstate(invalid="ignore"):
+            a = from_t.astype(np.float64) - from_s
+            b = to_s.astype(np.float64) - to_t
+            both = np.fmax(a, b)
+        # inf - inf daje nan: taj landmark ne nosi informaciju
+        return np.where(np.isnan(both), -np.inf, both)
+
+    def _finish(self, per: np.ndarray) -> np.ndarray:
+        return np.maximum(np.max(per, axis=0) - self.slack, 0.0)
+
+    def lower_bound(self, s: int, t: int) -> float:
+        if s == t:
+            return 0.0
+        per = self._per_landmark(self.d_from[:, s], self.d_from[:, t], self.d_to[:, s], self.d_to[:, t])
+        return float(self._finish(per))
+
+    def lower_bounds_to(self, sources: Sequence[int], t: int) -> np.ndarray:
+        src = np.asarray(sources, dtype=np.int64)
+        per = self._per_landmark(
+            self.d_from[:, src], self.d_from[:, t][:, None],
+            self.d_to[:, src], self.d_to[:, t][:, None],
+        )
+        lb = self._finish(per)
+        lb[src == t] = 0.0
+        return lb
+
+    def lower_bounds_from(self, s: int, targets: Sequence[int]) -> np.ndarray:
+        tgt = np.asarray(targets, dtype=np.int64)
+        per = self._per_landmark(
+            self.d_from[:, s][:, None], self.d_from[:, tgt],
+            self.d_to[:, s][:, None], self.d_to[:, tgt],
+        )
+        lb = self._finish(per)
+        lb[tgt == s] = 0.0
+        return lb
+
+    def _potential(self, s: int, t: int) -> List[float]:
+        # aktivni landmarki: oni koji daju najbolju ocjenu za par (s, t)
+        per = self._per_landmark(self.d_from[:, s], self.d_from[:, t], self.d_to[:, s], self.d_to[:, t])
+        active = np.argsort(-per)[: self.active_landmarks]
+
+        h = self._per_landmark(
+            self.d_from[active], self.d_from[active, t][:, None],
+            self.d_to[active], self.d_to[active, t][:, None],
+        )
+        return self._finish(h).tolist()
+
+    def astar(self, s: int, t: int) -> Tuple[float, List[int]]:
+        if s == t:
+            return 0.0, [s]
+
+        h = self._potential(s, t)
+        if math.isinf(h[s]):
+            return math.inf, []
+
+        g = {s: 0.0}
+        parent = {s: -1}
+        heap = [(h[s], 0.0, s)]
+        off, tgt, wt = self.graph.adjacency()
+        while heap:
+            _, d, x = heapq.heappop(heap)
+            if d > g[x]:
+                continue
+            if x == t:
+                path = [t]
+                while parent[path[-1]] != -1:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return d, path
+            for i in range(off[x], off[x + 1]):
+                y = tgt[i]
+                hy = h[y]
+                if hy == math.inf:
+                    continue
+                nd = d + wt[i]
+                if nd < g.get(y, math.inf):
+                    g[y] = nd
+                    parent[y] = x
+                    heapq.heappush(heap, (nd + hy, nd, y))
+        return math.inf, []
@@ -0,0 +1,115 @@
+# assignment.py
+import math
+from typing import Dict, List, Sequence
+
+
+def min_cost_assignment(cost: Sequence[Sequence[float]]) -> List[int]:
+    # Mađarski algoritam (potencijali, najkraći put za povećanje), O(n^2 m); redak -> stupac, n <= m
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    if n > m:
+        raise ValueError(f"Više redaka ({n}) nego stupaca ({m}).")
+
+    inf = math.inf
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                cur = row[j - 1] - ui0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    result = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def assign_with_capacity(
+    bids: Dict[str, Dict[str, float]],
+    slots: Dict[str, int],
+    task_ids: Sequence[str],
+) -> Dict[str, str]:
+    # bids[vozilo][task_id]; vozilo se razvija u slots[vozilo] jednakih stupaca.
+    # Najprije što više dodijeljenih zadataka, zatim najmanji zbroj ponuda; vraća task_id -> vozilo.
+    n = len(task_ids)
+    columns = [
+        vid for vid, row in bids.items()
+        if any(math.isfinite(b) for b in row.values())
+        for _ in range(min(max(0, int(slots.get(vid, 0))), n))
+    ]
+    finite = [b for vid in set(columns) for b in bids[vid].values() if math.isfinite(b)]
+    if not finite:
+        return {}
+
+    # cijena "nedodijeljen" veća je od razlike bilo kojih n ponuda, pa broj dodjela ima prednost
+    lo = min(finite)
+    unassigned = n * (max(finite) - lo) + 1.0
+    forbidden = 2.0 * unassigned
+    cost = []
+    for tid in task_ids:
+        row = []
+        for vid in columns:
+            b = bids[vid].get(tid, math.inf)
+            row.append(b - lo if math.isfinite(b) else forbidden)
+        row.extend([unassigned] * n)
+        cost.append(row)
+
+    result: Dict[str, str] = {}
+    for tid, j in zip(task_ids, min_cost_assignment(cost)):
+        if j < len(columns) and math.isfinite(bids[columns[j]].get(tid, math.inf)):
+            result[tid] = columns[j]
+    return result
+
+
+def greedy_assignment(
+    bids: Dict[str, Dict[str, float]],
+    slots: Dict[str, int],
+    task_ids: Sequence[str],
+) -> Dict[str, str]:
+    # redom objave, svaki zadatak najnižoj ponudi među vozilima sa slobodnim mjestom (kao aukcija po zadatku)
+    free = {vid: max(0, int(slots.get(vid, 0))) for vid in bids}
+    result: Dict[str, str] = {}
+    for tid in task_ids:
+        offers = {vid: row[tid] for vid, row in bids.items() if free[vid] > 0 and math.isfinite(row.get(tid, math.inf))}
+        if not offers:
+            continue
+        winner = min(offers, key=offers.get)
+        free[winner] -= 1
+        result[tid] = winner
+    return result
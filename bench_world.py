@@ -0,0 +1,667 @@
+# bench_world.py
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+# sekcije mjere pretrage; trajni cache ruta uključuje samo sekcija "store"
+os.environ.setdefault("ROAD_PATH_STORE", "0")
+
+from world import RoadWorld, TiledWorld, load_osmnx
+
+GRAPHML_PATH = os.path.join("data", "zadar_drive.graphml")
+
+N_PAIRS = int(os.getenv("BENCH_PAIRS", "300"))
+SEED = 1
+
+
+def random_pairs(world: RoadWorld, n: int, seed: int = SEED):
+    rng = random.Random(seed)
+    return [(rng.choice(world.nodes), rng.choice(world.nodes)) for _ in range(n)]
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def per_query_us(sec: float, n: int) -> float:
+    return sec / max(1, n) * 1e6
+
+
+def nx_dist_m(world: RoadWorld, u, v) -> float:
+    try:
+        return float(nx.shortest_path_length(world.G, u, v, weight="length"))
+    except Exception:
+        pass
+    try:
+        return float(nx.shortest_path_length(world.G_undirected, u, v, weight="length"))
+    except Exception:
+        return float("inf")
+
+
+def bench_engines():
+    print("== engines: dist_m ==")
+    base, load_sec = timed(RoadWorld, GRAPHML_PATH, seed=SEED, engine="dijkstra", cache_size=0)
+    print(f"load: {load_sec:.2f}s")
+    pairs = random_pairs(base, N_PAIRS)
+
+    ref, ref_sec = timed(lambda: [nx_dist_m(base, u, v) for u, v in pairs])
+    print(f"networkx: {per_query_us(ref_sec, len(pairs)):9.1f} us/query")
+
+    for engine in ("dijkstra", "ch", "alt"):
+        world, prep_sec = timed(RoadWorld, GRAPHML_PATH, seed=SEED, engine=engine, cache_size=0)
+        # neusmjereni fallback se gradi lijeno; ne mjerimo ga u upitima
+        world.dist_m(*pairs[0])
+        world.dist_m(pairs[0][0], world.nodes[0], fallback_undirected=True)
+        if engine != "dijkstra":
+            getattr(world, f"_get_{engine}")(True)
+        got, sec = timed(lambda: [world.dist_m(u, v) for u, v in pairs])
+        mismatches = sum(
+            1 for a, b in zip(ref, got)
+            if not (a == b or (math.isfinite(a) and abs(a - b) <= 1e-6 * max(1.0, a)))
+        )
+        print(
+            f"{engine:8s}: {per_query_us(sec, len(pairs)):9.1f} us/query | "
+            f"speedup x{ref_sec / max(sec, 1e-12):.1f} | load+prep {prep_sec:.2f}s | mismatches={mismatches}"
+        )
+
+
+def bench_alt_bounds():
+    print("== ALT lower bounds ==")
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, engine="dijkstra", cache_size=0)
+    pairs = random_pairs(world, N_PAIRS)
+
+    _, prep_sec = timed(world._get_alt, False)
+    oracle = world._get_alt(False)
+    world._get_alt(True)
+    print(
+        f"landmarks={len(oracle.landmarks)} | tables={oracle.nbytes / 1024:.0f} KiB (float32) | "
+        f"prep {prep_sec:.2f}s"
+    )
+
+    bounds, lb_sec = timed(lambda: [world.lower_bound_m(u, v, fallback_undirected=False) for u, v in pairs])
+    exact, ex_sec = timed(lambda: [world.dist_m(u, v, fallback_undirected=False) for u, v in pairs])
+
+    violations = sum(1 for lb, d in zip(bounds, exact) if lb > d + 1e-6)
+    ratios = [lb / d for lb, d in zip(bounds, exact) if math.isfinite(d) and d > 0]
+    avg_ratio = sum(ratios) / len(ratios) if ratios else 0.0
+    print(
+        f"lower_bound_m: {per_query_us(lb_sec, len(pairs)):8.1f} us/query | "
+        f"dijkstra: {per_query_us(ex_sec, len(pairs)):8.1f} us/query | "
+        f"speedup x{ex_sec / max(lb_sec, 1e-12):.1f}"
+    )
+    print(f"avg lb/dist={avg_ratio:.3f} | admissibility violations={violations}")
+
+    sources = [u for u, _ in pairs[:100]]
+    _, rank_sec = timed(world.rank_by_lower_bound, sources, pairs[0][1])
+    print(f"rank 100 candidates by lower bound: {rank_sec * 1e3:.2f} ms")
+
+
+def bench_startup():
+    print("== startup: RoadWorld() ==")
+    _, cold_sec = timed(RoadWorld, GRAPHML_PATH, seed=SEED, use_cache=False)
+    RoadWorld(GRAPHML_PATH, seed=SEED, use_cache=True)
+    runs = 5
+    _, warm_sec = timed(lambda: [RoadWorld(GRAPHML_PATH, seed=SEED, use_cache=True) for _ in range(runs)])
+    warm_sec /= runs
+    print(f"GraphML parse: {cold_sec * 1e3:8.1f} ms")
+    print(f"binary cache : {warm_sec * 1e3:8.1f} ms | speedup x{cold_sec / max(warm_sec, 1e-12):.1f}")
+
+
+_IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+{stmt}
+sec = time.perf_counter() - t0
+heavy = [m for m in ("osmnx", "geopandas", "shapely", "pandas", "networkx") if m in sys.modules]
+print(sec, ",".join(heavy) or "-")
+"""
+
+
+def _probe(stmt: str):
+    import subprocess
+
+    proc = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE.format(stmt=stmt)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        err = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        return None, err
+    sec, heavy = proc.stdout.strip().splitlines()[-1].split(" ", 1)
+    return float(sec), heavy
+
+
+def bench_imports():
+    print("== import time (fresh interpreter) ==")
+    for mod in ("world", "dispatcher", "vehicle", "run_batch"):
+        sec, heavy = _probe(f"import {mod}")
+        if sec is None:
+            print(f"{mod:10s}: import failed ({heavy})")
+        else:
+            print(f"{mod:10s}: {sec * 1e3:7.1f} ms | heavy modules loaded: {heavy}")
+    path = GRAPHML_PATH.replace("\\", "/")
+    for label, stmt in (
+        ("light loader", f"from graphml_loader import load_road_graph; load_road_graph({path!r})"),
+        ("osmnx loader", f"import osmnx; osmnx.load_graphml({path!r})"),
+    ):
+        sec, heavy = _probe(stmt)
+        if sec is None:
+            print(f"{label}: unavailable ({heavy})")
+        else:
+            print(f"{label}: {sec * 1e3:7.1f} ms incl. imports | heavy modules loaded: {heavy}")
+
+
+def private_kib() -> int:
+    # RssAnon: heap procesa, bez mmap datoteka i dijeljene memorije
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except Exception:
+        pass
+    return -1
+
+
+def _child_load(mode: str, shared_name: str, out):
+    before = private_kib()
+    t0 = time.perf_counter()
+    if mode == "shared":
+        world = RoadWorld.attach(shared_name, use_cache=False)
+    else:
+        world = RoadWorld(GRAPHML_PATH, seed=SEED, mmap=(mode == "mmap"))
+    load_sec = time.perf_counter() - t0
+    world.dist_m(*world.sample_task_nodes())
+    out.put((mode, load_sec, private_kib() - before))
+
+
+def bench_shared():
+    print("== shared graph: per-process cost ==")
+    owner = RoadWorld(GRAPHML_PATH, seed=SEED)
+    name = owner.publish_shared()
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    try:
+        for mode in ("private", "mmap", "shared"):
+            p = ctx.Process(target=_child_load, args=(mode, name, out))
+            p.start()
+            p.join()
+            mode, load_sec, kib = out.get()
+            print(f"{mode:8s}: attach/load {load_sec * 1e3:7.2f} ms | anon memory +{kib} KiB")
+    finally:
+        owner.close_shared()
+
+
+def bench_cache():
+    print("== route cache: repeated queries ==")
+    rng = random.Random(SEED)
+    probe = RoadWorld(GRAPHML_PATH, seed=SEED, cache_size=0)
+    # dispečer i vozila više puta pitaju iste parove (najava, ponude, izvršenje)
+    hot = random_pairs(probe, max(1, N_PAIRS // 4), seed=SEED + 1)
+    cold = random_pairs(probe, N_PAIRS, seed=SEED + 2)
+    workload = [rng.choice(hot) if rng.random() < 0.7 else rng.choice(cold) for _ in range(N_PAIRS * 4)]
+
+    def run(world):
+        for u, v in workload:
+            world.dist_m(u, v)
+            world.path_latlon(u, v)
+
+    for size in (0, N_PAIRS // 8, N_PAIRS, N_PAIRS * 4):
+        world = RoadWorld(GRAPHML_PATH, seed=SEED, cache_size=size)
+        _, sec = timed(run, world)
+        st = world.cache_stats()
+        print(
+            f"size={size:5d}: {per_query_us(sec, len(workload)):8.1f} us/request | "
+            f"hit_rate={st['hit_rate']:.2f} hits={st['hits']} misses={st['misses']} "
+            f"evictions={st['evictions']} bytes={st['bytes'] / 1024:.0f} KiB"
+        )
+
+
+def bench_sampling():
+    print("== task sampling: searches per task ==")
+    n_tasks = max(1, N_PAIRS // 3)
+
+    def legacy(world):
+        pu, dv = world.sample_task_nodes()
+        world.dist_m(pu, dv)
+        world.path_latlon(pu, dv)
+
+    def single(world):
+        world.sample_task_route()
+
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, cache_size=0)
+    _, draw_sec = timed(lambda: [world.sample_task_nodes() for _ in range(10000)])
+    print(f"sample_task_nodes : {per_query_us(draw_sec, 10000):7.2f} us/pair (SCC tables, no search)")
+
+    for label, fn in (("nodes+dist+path", legacy), ("sample_task_route", single)):
+        world = RoadWorld(GRAPHML_PATH, seed=SEED, cache_size=0)
+        searches = [0]
+        search = world._search
+
+        def counted(*args, **kwargs):
+            searches[0] += 1
+            return search(*args, **kwargs)
+
+        world._search = counted
+        _, sec = timed(lambda: [fn(world) for _ in range(n_tasks)])
+        print(
+            f"{label:18s}: {searches[0] / n_tasks:5.2f} searches/task | "
+            f"{sec / n_tasks * 1e3:7.2f} ms/task"
+        )
+
+
+def bench_matrix():
+    print("== distance matrix: vehicles x tasks ==")
+    n_src = int(os.getenv("BENCH_VEHICLES", "300"))
+    n_dst = int(os.getenv("BENCH_TASKS", "30"))
+    rng = random.Random(SEED)
+    for engine in ("dijkstra", "ch"):
+        world = RoadWorld(GRAPHML_PATH, seed=SEED, engine=engine, cache_size=0)
+        if engine == "ch":
+            world._get_ch(True)
+        sources = [rng.choice(world.nodes) for _ in range(n_src)]
+        targets = [rng.choice(world.nodes) for _ in range(n_dst)]
+
+        D, cold_sec = timed(world.dist_matrix, sources, targets)
+        _, warm_sec = timed(world.dist_matrix, sources, targets)
+        _, col_sec = timed(world.dists_to, sources, targets[0])
+        _, row_sec = timed(world.dists_from, sources[0], targets)
+
+        check = [(rng.randrange(n_src), rng.randrange(n_dst)) for _ in range(50)]
+        single, single_sec = timed(lambda: [world.dist_m(sources[i], targets[j]) for i, j in check])
+        mismatches = sum(1 for (i, j), d in zip(check, single) if abs(d - D[i, j]) > 1e-6)
+        pairwise_ms = per_query_us(single_sec, len(check)) * n_src * n_dst / 1e3
+        print(
+            f"{engine:8s}: {n_src}x{n_dst} matrix {cold_sec * 1e3:7.1f} ms (repeat {warm_sec * 1e3:6.1f} ms) | "
+            f"many-to-one {col_sec * 1e3:6.1f} ms | one-to-many {row_sec * 1e3:6.1f} ms | "
+            f"pairwise dist_m ~{pairwise_ms:7.0f} ms | mismatches={mismatches}"
+        )
+
+
+def bench_parallel():
+    print("== parallel distance matrix: single-source searches over a process pool ==")
+    import tempfile
+
+    n = int(os.getenv("BENCH_MATRIX_NODES", "600"))
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, engine="dijkstra", cache_size=0)
+    rng = random.Random(SEED)
+    nodes = [rng.choice(world.nodes) for _ in range(n)]
+    print(f"cores: {os.cpu_count()} | matrix {n}x{n}")
+    ref = None
+    base_sec = None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        D, sec = timed(world.dist_matrix_parallel, nodes, nodes, workers=workers)
+        ref = D if ref is None else ref
+        base_sec = sec if base_sec is None else base_sec
+        same = bool(np.array_equal(D, ref))
+        print(f"workers {workers:2d}: {sec:6.2f}s | speedup x{base_sec / sec:4.2f} | identical={same}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dist.npy")
+        D32, sec = timed(world.dist_matrix_parallel, nodes, nodes, dtype=np.float32, out_path=path)
+        err = float(np.nanmax(np.abs(np.where(np.isfinite(ref), D32 - ref, 0.0))))
+        print(
+            f"float32 memmap: {sec:6.2f}s | {os.path.getsize(path) / 1024:.0f} KiB on disk "
+            f"(float64 {ref.nbytes / 1024:.0f} KiB) | max abs error {err:.4f} m"
+        )
+        del D32
+
+
+def bench_snap():
+    print("== nearest_node: grid index ==")
+    import numpy as np
+
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, cache_size=0)
+    _, build_sec = timed(lambda: world.spatial)
+    grid = world.spatial
+    print(
+        f"build {build_sec * 1e3:.1f} ms | cells {grid.nx}x{grid.ny} @ {grid.cell_m:.0f} m | "
+        f"{grid.nbytes / 1024:.0f} KiB"
+    )
+
+    # GPS-like točke: čvorovi s ~40 m šuma
+    rng = np.random.default_rng(SEED)
+    n = N_PAIRS * 10
+    k = rng.integers(0, world.graph.n, n)
+    lats = world.graph.lat[k] + rng.normal(0, 0.0004, n)
+    lons = world.graph.lon[k] + rng.normal(0, 0.0004, n)
+
+    single, single_sec = timed(lambda: [world.nearest_node(a, b) for a, b in zip(lats.tolist(), lons.tolist())])
+    batch, batch_sec = timed(world.nearest_nodes, lats, lons)
+    mismatches = sum(1 for a, b in zip(single, batch.tolist()) if a != b)
+    print(
+        f"single: {per_query_us(single_sec, n):7.2f} us/point | "
+        f"batch: {per_query_us(batch_sec, n):7.2f} us/point | mismatches={mismatches}"
+    )
+
+    try:
+        ox = load_osmnx()
+    except ImportError:
+        ox = None
+    if ox is not None:
+        m = min(n, 200)
+        try:
+            _, ox_sec = timed(lambda: [ox.distance.nearest_nodes(world.G, X=b, Y=a) for a, b in zip(lats[:m], lons[:m])])
+            print(f"osmnx : {per_query_us(ox_sec, m):7.1f} us/point")
+        except ImportError as e:
+            print(f"osmnx : unavailable ({e})")
+
+
+def bench_payload():
+    print("== task payload: route_latlon vs simplified polyline ==")
+    import json
+
+    from polyline import decode, encode, path_length_m, simplify
+
+    world = RoadWorld(GRAPHML_PATH, seed=SEED)
+    routes = [world.sample_task_route()[2].latlon for _ in range(N_PAIRS)]
+    routes.sort(key=len)
+    longest = routes[-max(1, len(routes) // 10):]
+    print(f"routes: {len(routes)} | nodes median {len(routes[len(routes) // 2])} | longest {len(routes[-1])}")
+
+    raw_msgs, raw_sec = timed(lambda: [json.dumps({"route_latlon": r.tolist()}) for r in longest])
+    _, raw_load_sec = timed(lambda: [json.loads(m) for m in raw_msgs])
+    raw_bytes = sum(len(m) for m in raw_msgs) / len(longest)
+    print(
+        f"latlon  : {raw_bytes:6.0f} bytes | dumps {per_query_us(raw_sec, len(longest)):6.1f} us | "
+        f"loads {per_query_us(raw_load_sec, len(longest)):6.1f} us"
+    )
+
+    for tol in (0.0, 2.0, 5.0):
+        encoded, enc_sec = timed(lambda: [encode(simplify(r, tol)) for r in longest])
+        msgs, dump_sec = timed(lambda: [json.dumps({"route_polyline": e}) for e in encoded])
+        _, dec_sec = timed(lambda: [decode(json.loads(m)["route_polyline"]) for m in msgs])
+        enc_bytes = sum(len(m) for m in msgs) / len(longest)
+        len_err = max(
+            abs(path_length_m(r) - path_length_m(simplify(r, tol))) / max(1.0, path_length_m(r)) for r in longest
+        )
+        print(
+            f"tol={tol:3.0f} m: {enc_bytes:6.0f} bytes (x{raw_bytes / max(1.0, enc_bytes):.1f}) | "
+            f"dumps {per_query_us(dump_sec, len(longest)):6.1f} us | loads+decode {per_query_us(dec_sec, len(longest)):6.1f} us | "
+            f"simplify+encode once {per_query_us(enc_sec, len(longest)):6.1f} us | max length change {len_err * 100:.2f}%"
+        )
+
+
+def bench_prep():
+    print("== graph preprocessing: largest SCC + chain contraction ==")
+    variants = ("", "scc", "scc,contract")
+    worlds = {}
+    for prep in variants:
+        worlds[prep], load_sec = timed(RoadWorld, GRAPHML_PATH, seed=SEED, cache_size=0, preprocess=prep)
+    # isti parovi za sve varijante: čvorovi koji postoje u najmanjem grafu
+    pairs = random_pairs(worlds[variants[-1]], N_PAIRS)
+    for prep in variants:
+        world = worlds[prep]
+        own = random_pairs(world, N_PAIRS)
+        fallbacks = sum(1 for u, v in own if world._query(u, v, True, False)[2])
+        _, sec = timed(lambda: [world.dist_m(u, v) for u, v in pairs])
+        _, route_sec = timed(lambda: [world.route(u, v) for u, v in pairs])
+        chains = len(world.chains) if world.chains is not None else 0
+        print(
+            f"{prep or 'none':13s}: nodes {world.graph.n:6d} | edges {world.graph.m:6d} | chain points {chains:5d} | "
+            f"{world.graph.nbytes / 1024:5.0f} KiB | dist_m {per_query_us(sec, len(pairs)):7.1f} us | "
+            f"route {per_query_us(route_sec, len(pairs)):7.1f} us | undirected fallbacks {fallbacks}"
+        )
+
+
+def bench_memory():
+    print("== memory: lazy undirected fallback ==")
+    import tracemalloc
+
+    before = private_kib()
+    world, load_sec = timed(RoadWorld, GRAPHML_PATH, seed=SEED)
+    load_kib = private_kib() - before
+    print(f"load {load_sec * 1e3:.1f} ms | anon memory +{load_kib} KiB | {world.memory_stats()}")
+
+    pairs = random_pairs(world, N_PAIRS)
+    for u, v in pairs:
+        world.dist_m(u, v, fallback_undirected=False)
+    print(f"after {len(pairs)} directed queries: undirected built={world._graph_undirected is not None}")
+
+    _, und_sec = timed(lambda: world.graph_undirected)
+    stats = world.memory_stats()
+    print(f"first fallback: build {und_sec * 1e3:.1f} ms | undirected CSR {stats['undirected'] / 1024:.0f} KiB | {stats}")
+
+    # stari put: networkx kopija cijelog grafa sa svim atributima
+    world.G
+    tracemalloc.start()
+    _, nx_sec = timed(lambda: world.G_undirected)
+    nx_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"networkx G_undirected: build {nx_sec * 1e3:.1f} ms | ~{nx_bytes / 1024:.0f} KiB")
+
+
+def bench_traffic():
+    print("== live traffic: batched edge travel-time updates ==")
+    batch = int(os.getenv("BENCH_TRAFFIC_EDGES", "1000"))
+    for engine in ("dijkstra", "ch", "alt"):
+        world = RoadWorld(GRAPHML_PATH, seed=SEED, engine=engine)
+        rng = random.Random(SEED)
+        pairs = random_pairs(world, N_PAIRS)
+        for u, v in pairs:
+            world.travel_time_s(u, v)
+            world.dist_m(u, v)
+        if engine != "dijkstra":
+            getattr(world, f"_get_{engine}")(False, "time")
+
+        src = world.graph.node_ids[world.graph.sources()].tolist()
+        dst = world.graph.node_ids[world.graph.targets].tolist()
+        # zagušenje: samo usporavanje, faktor 1-3 na slobodni tok
+        def congestion(lo):
+            return [(src[e], dst[e], rng.uniform(lo, lo + 1.0)) for e in (rng.randrange(world.graph.m) for _ in range(batch))]
+
+        # prvi batch uključuje kopiranje vremena (copy-on-write) i ponovnu gradnju izvedenih struktura
+        _, setup_sec = timed(world.update_edge_times, congestion(1.0), relative=True)
+        world.travel_time_s(*pairs[0])
+        for u, v in pairs:
+            world.travel_time_s(u, v)
+        before = world.cache_stats()["entries"]
+        _, upd_sec = timed(world.update_edge_times, congestion(2.0), relative=True)
+        kept = world.cache_stats()["entries"]
+        _, first_sec = timed(world.travel_time_s, *pairs[0])
+        _, q_sec = timed(lambda: [world.travel_time_s(u, v) for u, v in pairs])
+
+        _, rebuild_sec = timed(
+            lambda: getattr(RoadWorld(GRAPHML_PATH, seed=SEED, engine=engine), f"_get_{engine}", lambda *a: None)(False, "time")
+        )
+        print(
+            f"{engine:8s}: first batch {setup_sec * 1e3:6.1f} ms | update {batch} edges {upd_sec * 1e3:6.1f} ms "
+            f"({batch / max(upd_sec, 1e-12):8.0f} edges/s) | "
+            f"cache kept {kept}/{before} | first query {first_sec * 1e3:6.1f} ms | "
+            f"{per_query_us(q_sec, len(pairs)):7.1f} us/query | full reload+prep {rebuild_sec * 1e3:6.0f} ms"
+        )
+
+
+def _store_run(db_dir: str, n_tasks: int, out):
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, cache_dir=db_dir, path_store=True)
+    searches = [0]
+    search = world._search
+
+    def counted(*args, **kwargs):
+        searches[0] += 1
+        return search(*args, **kwargs)
+
+    world._search = counted
+    t0 = time.perf_counter()
+    routes = [world.sample_task_route()[2].distance_m for _ in range(n_tasks)]
+    out.put((time.perf_counter() - t0, searches[0], sum(routes)))
+    world.close_path_store()
+
+
+def bench_store():
+    print("== persistent path store: repeated runs (same seed) ==")
+    import shutil
+    import tempfile
+
+    n_tasks = N_PAIRS
+    db_dir = tempfile.mkdtemp(prefix="bench_store_")
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    ref = None
+    try:
+        for label, workers in (("cold run", 1), ("repeat run", 1), ("4 parallel runs", 4)):
+            procs = [ctx.Process(target=_store_run, args=(db_dir, n_tasks, out)) for _ in range(workers)]
+            for p in procs:
+                p.start()
+            results = [out.get() for _ in procs]
+            for p in procs:
+                p.join()
+            sec = max(r[0] for r in results)
+            searches = sum(r[1] for r in results)
+            ref = results[0][2] if ref is None else ref
+            same = all(abs(r[2] - ref) < 1e-6 for r in results)
+            print(
+                f"{label:16s}: {sec / n_tasks * 1e3:6.2f} ms/task | searches {searches:4d} / {n_tasks * workers} tasks | "
+                f"identical routes={same}"
+            )
+        size = sum(os.path.getsize(os.path.join(db_dir, f)) for f in os.listdir(db_dir) if f.endswith(".sqlite"))
+        print(f"store size: {size / 1024:.0f} KiB")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def bench_zones():
+    print("== zone table: approach estimate vs road distance (random node pairs) ==")
+    from spatial_index import haversine_m
+
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, engine="ch", cache_size=0)
+    rng = random.Random(SEED)
+    pairs = []
+    while len(pairs) < N_PAIRS:
+        u, v = rng.choice(world.nodes), rng.choice(world.nodes)
+        d = world.dist_m(u, v, fallback_undirected=False)
+        if math.isfinite(d) and d > 0:
+            pairs.append((world.node_latlon(u), world.node_latlon(v), d))
+
+    def error_stats(estimate):
+        errors = sorted(abs(estimate(a, b) - d) / d for a, b, d in pairs)
+        return sum(errors) / len(errors), errors[int(0.95 * (len(errors) - 1))]
+
+    mean, p95 = error_stats(lambda a, b: haversine_m(*a, *b))
+    print(f"haversine      : error mean {mean * 100:5.1f}% | p95 {p95 * 100:5.1f}%")
+    for cell_m in (200.0, 400.0, 800.0):
+        zones, build_sec = timed(world.zone_table, cell_m)
+        mean, p95 = error_stats(lambda a, b: zones.estimate_m(*a, *b))
+        _, est_sec = timed(lambda: [zones.estimate_m(*a, *b) for a, b, _ in pairs])
+        bounds = [zones.bounds_m(*a, *b) for a, b, _ in pairs]
+        violations = sum(1 for (lo, hi), (_, _, d) in zip(bounds, pairs) if d < lo - 1e-6 or d > hi + 1e-6)
+        print(
+            f"zones @ {cell_m:4.0f} m: {zones.zones:4d} zones | {zones.nbytes / 1024:6.0f} KiB | load/build {build_sec:5.2f}s | "
+            f"error mean {mean * 100:5.1f}% | p95 {p95 * 100:5.1f}% | {per_query_us(est_sec, len(pairs)):4.1f} us/estimate | "
+            f"bound violations={violations}"
+        )
+
+
+def _same_dist(a: float, b: float) -> bool:
+    return a == b or abs(a - b) <= 1e-6
+
+
+def bench_tiles():
+    print("== tiled graph: tasks in a 2x2 km area, tiles loaded on demand ==")
+    full = RoadWorld(GRAPHML_PATH, seed=SEED, engine="dijkstra", cache_size=0)
+    full_bytes = full.memory_stats()["graph"]
+    lat, lon = 44.1156, 15.2278
+    dlat, dlon = 1000.0 / 111_195.0, 1000.0 / (111_195.0 * math.cos(math.radians(lat)))
+    area = (lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+    n_tasks = max(1, N_PAIRS // 6)
+    rng = random.Random(SEED)
+    any_pairs = [(rng.choice(full.nodes), rng.choice(full.nodes)) for _ in range(n_tasks)]
+    for tile_m, max_tiles in ((500.0, 0), (1000.0, 0), (2000.0, 0), (500.0, 8)):
+        world = TiledWorld(GRAPHML_PATH, seed=SEED, tile_m=tile_m, max_tiles=max_tiles, area=area, cache_size=0)
+        tasks, sec = timed(lambda: [world.sample_task_route() for _ in range(n_tasks)])
+        mismatches = sum(1 for pu, dv, r in tasks if abs(r.distance_m - full.dist_m(pu, dv, fallback_undirected=False)) > 1e-6)
+        tiles = dict(world.cache_stats()["tiles"])
+        kib = world.memory_stats()["total"] / 1024
+        # parovi s cijelog grafa, i iz različitih jakih komponenti (jednosmjerne ulice, neusmjereni fallback)
+        any_mismatches = sum(
+            1 for u, v in any_pairs for fb in (True, False)
+            if not _same_dist(world.dist_m(u, v, fb), full.dist_m(u, v, fb))
+        )
+        print(
+            f"tile {tile_m:5.0f} m (max {max_tiles or '-'}): {sec / n_tasks * 1e3:6.2f} ms/task | "
+            f"tiles {tiles['loaded']:3d}/{tiles['total']:3d} (loads {tiles['loads']}, evictions {tiles['evictions']}) | "
+            f"{kib:6.0f} KiB vs full graph {full_bytes / 1024:.0f} KiB | mismatches={mismatches} | "
+            f"whole-graph pairs mismatches={any_mismatches}"
+        )
+
+
+def bench_assignment():
+    print("== batch assignment: Hungarian with capacity vs greedy min(bid) per task ==")
+    from assignment import assign_with_capacity, greedy_assignment
+
+    world = RoadWorld(GRAPHML_PATH, seed=SEED, engine="ch")
+    rng = random.Random(SEED)
+    n_vehicles = 4
+    n_windows = max(1, N_PAIRS // 6)
+    for window in (2, 4, 8, 12):
+        totals = {"greedy": [0, 0.0, 0.0], "hungarian": [0, 0.0, 0.0]}
+        for _ in range(n_windows):
+            fleet = [rng.choice(world.nodes) for _ in range(n_vehicles)]
+            slots = {f"v{k}": rng.randint(1, 3) for k in range(n_vehicles)}
+            tasks = [world.sample_task_route() for _ in range(window)]
+            approach = world.dist_matrix(fleet, [pu for pu, _, _ in tasks])
+            # ponuda strategije "nearest" bez šuma: prilaz cestom + dužina zadatka
+            bids = {
+                f"v{k}": {f"t{j}": float(approach[k, j]) + tasks[j][2].distance_m for j in range(window)}
+                for k in range(n_vehicles)
+            }
+            task_ids = [f"t{j}" for j in range(window)]
+            for label, solve in (("greedy", greedy_assignment), ("hungarian", assign_with_capacity)):
+                result, sec = timed(solve, bids, slots, task_ids)
+                totals[label][0] += len(result)
+                totals[label][1] += sum(bids[v][t] for t, v in result.items())
+                totals[label][2] += sec
+        g_n, g_m, g_sec = totals["greedy"]
+        h_n, h_m, h_sec = totals["hungarian"]
+        # poruke po zadatku: aukcija po zadatku 3V (najava, ponuda, award/reject), prozor 2V + award + <=V reject
+        print(
+            f"window {window:2d} tasks: awarded greedy {g_n:4d} / hungarian {h_n:4d} | "
+            f"distance per task greedy {g_m / max(1, g_n):7.0f} m / hungarian {h_m / max(1, h_n):7.0f} m "
+            f"({(1.0 - (h_m / max(1, h_n)) / max(1e-9, g_m / max(1, g_n))) * 100:4.1f}% shorter) | "
+            f"solve {h_sec / (n_windows * window) * 1e6:6.1f} us/task ({n_windows * window / max(h_sec, 1e-12):8.0f} tasks/s) | "
+            f"messages/task {3 * n_vehicles} -> {(3 * n_vehicles) / window + 1:.1f}"
+        )
+
+
+SECTIONS = {
+    "imports": bench_imports,
+    "startup": bench_startup,
+    "shared": bench_shared,
+    "engines": bench_engines,
+    "alt": bench_alt_bounds,
+    "cache": bench_cache,
+    "sampling": bench_sampling,
+    "matrix": bench_matrix,
+    "parallel": bench_parallel,
+    "snap": bench_snap,
+    "payload": bench_payload,
+    "prep": bench_prep,
+    "memory": bench_memory,
+    "traffic": bench_traffic,
+    "store": bench_store,
+    "zones": bench_zones,
+    "tiles": bench_tiles,
+    "assignment": bench_assignment,
+}
+
+
+def main(argv):
+    names = argv[1:] or list(SECTIONS)
+    for name in names:
+        if name not in SECTIONS:
+            print(f"Nepoznata sekcija: {name} (dozvoljeno: {', '.join(SECTIONS)})")
+            raise SystemExit(1)
+    for name in names:
+        SECTIONS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
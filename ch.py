@@ -0,0 +1,345 @@
+# ch.py
+import heapq
+import math
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ContractionHierarchy:
+
+    def __init__(
+        self,
+        n: int,
+        edges: Iterable[Tuple[int, int, float]],
+        witness_settle_limit: int = 60,
+        order: Optional[Sequence[int]] = None,
+        space_cache_size: int = 4096,
+    ):
+        self.n = int(n)
+        self.witness_settle_limit = int(witness_settle_limit)
+
+        out_w: List[Dict[int, float]] = [dict() for _ in range(self.n)]
+        in_w: List[Dict[int, float]] = [dict() for _ in range(self.n)]
+        for u, v, w in edges:
+            u = int(u)
+            v = int(v)
+            if u == v:
+                continue
+            w = float(w)
+            old = out_w[u].get(v)
+            if old is None or w < old:
+                out_w[u][v] = w
+                in_w[v][u] = w
+
+        # (u, v) -> srednji čvor prečice; originalni bridovi nisu u mapi
+        self.mid: Dict[Tuple[int, int], int] = {}
+
+        self.rank: List[int] = [0] * self.n
+        self.up_out: List[List[Tuple[int, float]]] = [[] for _ in range(self.n)]
+        self.up_in: List[List[Tuple[int, float]]] = [[] for _ in range(self.n)]
+        self.shortcuts = 0
+        self._order = 0
+        # LRU prostora uzlaznih pretraga (0 = bez pamćenja); na velikim grafovima ne smije rasti bez granice
+        self.space_cache_size = max(0, int(space_cache_size))
+        self._spaces: "OrderedDict[Tuple[bool, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+        self._contract(out_w, in_w, order)
+
+    # ---------- preprocessing ----------
+
+    def _witness_dists(
+        self,
+        out_w: List[Dict[int, float]],
+        src: int,
+        skip: int,
+        targets: Dict[int, float],
+        max_dist: float,
+    ) -> Dict[int, float]:
+        dist: Dict[int, float] = {src: 0.0}
+        heap = [(0.0, src)]
+        remaining = len(targets)
+        settled = 0
+        done = set()
+        while heap:
+            d, x = heapq.heappop(heap)
+            if x in done:
+                continue
+            done.add(x)
+            if x in targets:
+                remaining -= 1
+                if remaining <= 0:
+                    break
+            settled += 1
+            if d > max_dist or settled > self.witness_settle_limit:
+                break
+            for y, w in out_w[x].items():
+                if y == skip:
+                    continue
+                nd = d + w
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+        return dist
+
+    def _needed_shortcuts(
+        self,
+        out_w: List[Dict[int, float]],
+        in_w: List[Dict[int, float]],
+        v: int,
+    ) -> List[Tuple[int, int, float]]:
+        ins = in_w[v]
+        outs = out_w[v]
+        if not ins or not outs:
+            return []
+
+        max_out = max(outs.values())
+        result: List[Tuple[int, int, float]] = []
+        for u, w_uv in ins.items():
+            targets = {x: w_uv + w_vx for x, w_vx in outs.items() if x != u}
+            if not targets:
+                continue
+            dist = self._witness_dists(out_w, u, v, targets, w_uv + max_out)
+            for x, via in targets.items():
+                if dist.get(x, math.inf) > via:
+                    result.append((u, x, via))
+        return result
+
+    def _priority(
+        self,
+        out_w: List[Dict[int, float]],
+        in_w: List[Dict[int, float]],
+        deleted: List[int],
+        v: int,
+    ) -> int:
+        added = len(self._needed_shortcuts(out_w, in_w, v))
+        removed = len(out_w[v]) + len(in_w[v])
+        return (added - removed) + deleted[v]
+
+    def _contract(
+        self,
+        out_w: List[Dict[int, float]],
+        in_w: List[Dict[int, float]],
+        fixed_order: Optional[Sequence[int]] = None,
+    ) -> None:
+        if fixed_order is not None:
+            # zadani redoslijed (nove težine, ista topologija): bez računanja prioriteta
+            for v in fixed_order:
+                self._contract_node(out_w, in_w, int(v))
+            return
+
+        deleted = [0] * self.n
+        heap = [(self._priority(out_w, in_w, deleted, v), v) for v in range(self.n)]
+        heapq.heapify(heap)
+
+        contracted = [False] * self.n
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+
+            # lazy update: ako se prioritet pogoršao, vrati čvor u red
+            prio = self._priority(out_w, in_w, deleted, v)
+            if heap and prio > heap[0][0]:
+                heapq.heappush(heap, (prio, v))
+                continue
+
+            for x in out_w[v]:
+                deleted[x] += 1
+            for u in in_w[v]:
+                deleted[u] += 1
+            self._contract_node(out_w, in_w, v)
+            contracted[v] = True
+
+    def _contract_node(self, out_w: List[Dict[int, float]], in_w: List[Dict[int, float]], v: int) -> None:
+        for u, x, w in self._needed_shortcuts(out_w, in_w, v):
+            old = out_w[u].get(x)
+            if old is None or w < old:
+                out_w[u][x] = w
+                in_w[x][u] = w
+                self.mid[(u, x)] = v
+                self.shortcuts += 1
+
+        self.up_out[v] = list(out_w[v].items())
+        self.up_in[v] = list(in_w[v].items())
+
+        for x in out_w[v]:
+            in_w[x].pop(v, None)
+        for u in in_w[v]:
+            out_w[u].pop(v, None)
+        out_w[v] = {}
+        in_w[v] = {}
+
+        self.rank[v] = self._order
+        self._order += 1
+
+    def contraction_order(self) -> List[int]:
+        return np.argsort(np.asarray(self.rank, dtype=np.int64), kind="stable").tolist()
+
+    def customize(self, edges: Iterable[Tuple[int, int, float]]) -> "ContractionHierarchy":
+        # nove težine, isti redoslijed kontrakcije: preskače se izbor redoslijeda (većina cijene gradnje)
+        return ContractionHierarchy(
+            self.n, edges, self.witness_settle_limit,
+            order=self.contraction_order(), space_cache_size=self.space_cache_size,
+        )
+
+    # ---------- upiti ----------
+
+    def _search(self, s: int, t: int) -> Tuple[float, int, Dict[int, int], Dict[int, int]]:
+        if s == t:
+            return 0.0, s, {}, {}
+
+        df: Dict[int, float] = {s: 0.0}
+        db: Dict[int, float] = {t: 0.0}
+        pf: Dict[int, int] = {}
+        pb: Dict[int, int] = {}
+        hf = [(0.0, s)]
+        hb = [(0.0, t)]
+        best = math.inf
+        meet = -1
+        up_out = self.up_out
+        up_in = self.up_in
+
+        while hf or hb:
+            if hf and hf[0][0] >= best:
+                hf = []
+            if hb and hb[0][0] >= best:
+                hb = []
+
+            if hf and (not hb or hf[0][0] <= hb[0][0]):
+                d, x = heapq.heappop(hf)
+                if d > df.get(x, math.inf):
+                    continue
+                other = db.get(x)
+                if other is not None and d + other < best:
+                    best = d + other
+                    meet = x
+                for y, w in up_out[x]:
+                    nd = d + w
+                    if nd < df.get(y, math.inf):
+                        df[y] = nd
+                        pf[y] = x
+                        heapq.heappush(hf, (nd, y))
+            elif hb:
+                d, x = heapq.heappop(hb)
+                if d > db.get(x, math.inf):
+                    continue
+                other = df.get(x)
+                if other is not None and d + other < best:
+                    best = d + other
+                    meet = x
+                for y, w in up_in[x]:
+                    nd = d + w
+                    if nd < db.get(y, math.inf):
+                        db[y] = nd
+                        pb[y] = x
+                        heapq.heappush(hb, (nd, y))
+
+        return best, meet, pf, pb
+
+    def _upward(self, s: int, adj: List[List[Tuple[int, float]]]) -> Dict[int, float]:
+        dist: Dict[int, float] = {s: 0.0}
+        heap = [(0.0, s)]
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            for y, w in adj[x]:
+                nd = d + w
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+        return dist
+
+    def _space(self, s: int, forward: bool) -> Tuple[np.ndarray, np.ndarray]:
+        # prostor uzlazne pretrage ovisi samo o čvoru; pamti se za ponovljene upite
+        key = (forward, s)
+        hit = self._spaces.get(key)
+        if hit is not None:
+            self._spaces.move_to_end(key)
+            return hit
+        dist = self._upward(s, self.up_out if forward else self.up_in)
+        hit = (
+            np.fromiter(dist.keys(), dtype=np.int64, count=len(dist)),
+            np.fromiter(dist.values(), dtype=np.float64, count=len(dist)),
+        )
+        if self.space_cache_size:
+            self._spaces[key] = hit
+            while len(self._spaces) > self.space_cache_size:
+                self._spaces.popitem(last=False)
+        return hit
+
+    def many_to_many(self, sources: Sequence[int], targets: Sequence[int]) -> np.ndarray:
+        out = np.full((len(sources), len(targets)), np.inf)
+        if len(sources) == 0 or len(targets) == 0:
+            return out
+
+        # bucketi: matrica (čvor iz silaznih prostora ciljeva) x (cilj)
+        t_spaces = [self._space(int(t), False) for t in targets]
+        t_nodes = np.concatenate([n for n, _ in t_spaces])
+        t_dists = np.concatenate([d for _, d in t_spaces])
+        t_cols = np.repeat(np.arange(len(targets)), [len(n) for n, _ in t_spaces])
+        union, rows = np.unique(t_nodes, return_inverse=True)
+        buckets = np.full((len(union), len(targets)), np.inf)
+        buckets[rows.ravel(), t_cols] = t_dists
+
+        s_spaces = [self._space(int(s), True) for s in sources]
+        s_nodes = np.concatenate([n for n, _ in s_spaces])
+        s_dists = np.concatenate([d for _, d in s_spaces])
+        s_rows = np.repeat(np.arange(len(sources)), [len(n) for n, _ in s_spaces])
+
+        # spajaju se samo čvorovi koji su i u nekom bucketu
+        pos = np.minimum(np.searchsorted(union, s_nodes), len(union) - 1)
+        hit = union[pos] == s_nodes
+        if not hit.any():
+            return out
+        vals = s_dists[hit, None] + buckets[pos[hit]]
+        rows = s_rows[hit]
+        starts = np.searchsorted(rows, np.arange(len(sources)))
+        ends = np.append(starts[1:], len(rows))
+        mins = np.minimum.reduceat(vals, np.minimum(starts, len(rows) - 1), axis=0)
+        nonempty = starts < ends
+        out[nonempty] = mins[nonempty]
+        return out
+
+    def _unpack(self, u: int, v: int, out: List[int]) -> None:
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            m = self.mid.get((a, b))
+            if m is None:
+                out.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def distance(self, s: int, t: int) -> float:
+        return self._search(int(s), int(t))[0]
+
+    def path(self, s: int, t: int) -> List[int]:
+        return self.route(s, t)[1]
+
+    def route(self, s: int, t: int) -> Tuple[float, List[int]]:
+        s = int(s)
+        t = int(t)
+        best, meet, pf, pb = self._search(s, t)
+        if not math.isfinite(best):
+            return best, []
+        if s == t:
+            return 0.0, [s]
+
+        up = [meet]
+        while up[-1] != s:
+            up.append(pf[up[-1]])
+        up.reverse()
+        down = [meet]
+        while down[-1] != t:
+            down.append(pb[down[-1]])
+
+        out = [s]
+        for a, b in zip(up, up[1:]):
+            self._unpack(a, b, out)
+        for a, b in zip(down, down[1:]):
+            self._unpack(a, b, out)
+        return best, out
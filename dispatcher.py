@@ -2,10 +2,11 @@
 import asyncio
 import csv
 import json
+import os
 import random
 import time
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Set, Any
 
 import spade
@@ -15,6 +16,7 @@ from spade.message import Message
 from spade.template import Template
 
 from logger import log_event
+from assignment import assign_with_capacity
 
 try:
     from state_store import update_task, update_award, clear_task, add_delivery
@@ -29,11 +31,62 @@ try:
 except Exception:
     SCENARIOS = {}
 
-from world import RoadWorld
+from world import RoadWorld, TiledWorld, ROAD_SHARED_GRAPH, ROAD_TILES
+from polyline import POLYLINE_PRECISION, encode as encode_polyline, simplify as simplify_route
+
+
+# ruta u porukama: pojednostavljenje (m, 0 = isključeno) i kodiranje ("polyline" ili "latlon")
+ROUTE_SIMPLIFY_M = float(os.getenv("ROUTE_SIMPLIFY_M", "2"))
+ROUTE_ENCODING = os.getenv("ROUTE_ENCODING", "polyline")
+
+# graf u pločicama (ROAD_TILES=1): zadaci se uzorkuju unutar bboxa startova vozila proširenog za TASK_AREA_M
+TASK_AREA_M = float(os.getenv("TASK_AREA_M", "3000"))
+
+# najviše istovremeno otvorenih aukcija (0 = bez limita; 1 = stari način, jedna po jedna)
+MAX_OPEN_AUCTIONS = int(os.getenv("MAX_OPEN_AUCTIONS", "0"))
+
+# greedy = aukcija po zadatku, pobjeđuje najniža ponuda; batch = zadaci iz prozora dodjeljuju se zajedno
+AUCTION_MODE = os.getenv("AUCTION_MODE", "greedy")
+BATCH_WINDOW_SEC = float(os.getenv("BATCH_WINDOW_SEC", "10"))
+
+# Inbox čeka poruke bez prozivanja; rokove aukcija i prozora zatvaraju asyncio timeri
+INBOX_WAIT_SEC = 3600.0
 
 ONTOLOGY = "dispatch_auction"
 
 
+@dataclass
+class Auction:
+    task: Dict[str, Any]
+    open_ts: float
+    close_ts: float
+    bids: Dict[str, float] = field(default_factory=dict)
+    no_bids: Set[str] = field(default_factory=set)
+    timer: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+
+    @property
+    def task_id(self) -> str:
+        return str(self.task["task_id"])
+
+    def responded(self) -> int:
+        return len(self.bids) + len(self.no_bids)
+
+
+@dataclass
+class BatchAuction:
+    batch_id: str
+    tasks: List[Dict[str, Any]]
+    open_ts: float
+    close_ts: float
+    # bids[vozilo][task_id]; free[vozilo] = slobodna mjesta (capacity - trenutno opterećenje)
+    bids: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    free: Dict[str, int] = field(default_factory=dict)
+    timer: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+
+    def responded(self) -> int:
+        return len(self.free)
+
+
 @dataclass
 class Stats:
     tasks_announced: int = 0
@@ -69,10 +122,14 @@ class Dispatcher(Agent):
         
         graphml_path: str = "zadar.graphml",
         use_road_world: bool = True,
+        road_shared_graph: Optional[str] = None,
         
         vehicle_starts: Optional[Dict[str, List[float]]] = None,
         
         max_route_resample: int = 30,
+        max_open_auctions: int = MAX_OPEN_AUCTIONS,
+        auction_mode: str = AUCTION_MODE,
+        batch_window_sec: float = BATCH_WINDOW_SEC,
     ):
         super().__init__(jid, password)
         self.vehicles = vehicles
@@ -99,14 +156,28 @@ class Dispatcher(Agent):
         self.task_period_sec = int(task_period_sec)
         self.deadline_range_sec = (int(deadline_range_sec[0]), int(deadline_range_sec[1]))
 
-      
-        self.current_task: Dict[str, Any] = {}
-        self.bids: Dict[str, float] = {}          
-        self.no_bids: Set[str] = set()            
-        self.auction_open_ts: Optional[float] = None
-        self.awarded_task_id: Optional[str] = None
+        # otvorene aukcije po task_id; svaka ima vlastitu knjigu ponuda i rok zatvaranja
+        self.auctions: Dict[str, Auction] = {}
+        self.max_open_auctions = int(max_open_auctions)
+        self.task_seq = 0
+
+        if auction_mode not in ("greedy", "batch"):
+            raise ValueError(f"Nepoznat auction_mode: {auction_mode} (dozvoljeno: greedy, batch)")
+        self.auction_mode = auction_mode
+        self.batch_window_sec = float(batch_window_sec)
+        # zadaci objavljeni u tekućem prozoru i skupne aukcije koje čekaju ponude
+        self.batch_tasks: List[Dict[str, Any]] = []
+        self.batches: Dict[str, BatchAuction] = {}
+        self.batch_seq = 0
+        self.start_ts = time.time()
         self.task_announce_ts: Dict[str, float] = {}
 
+        # kapacitet se provjerava pri dodjeli: vozilo s više otvorenih aukcija ne smije dobiti više
+        # zadataka nego što ima mjesta (capacity stiže u ponudi, opterećenje = dodijeljeni, nezavršeni)
+        self.vehicle_capacity: Dict[str, int] = {}
+        self.vehicle_load: Dict[str, int] = {}
+        self.assigned_to: Dict[str, str] = {}
+
         
         self.completed_task_ids: Set[str] = set()
 
@@ -115,10 +186,9 @@ class Dispatcher(Agent):
 
         self._stopping = False
 
-        
-        self.use_road_world = bool(use_road_world)
-        self.world = RoadWorld(graphml_path=graphml_path, seed=self.seed) if self.use_road_world else None
-        self.max_route_resample = int(max_route_resample)
+        # rok svake aukcije je loop.call_later timer; okida zatvaranje u Inboxu
+        self.inbox: Optional["Dispatcher.Inbox"] = None
+        self._timer_tasks: Set[asyncio.Task] = set()
 
         
         self.vehicle_starts = vehicle_starts or {
@@ -128,10 +198,55 @@ class Dispatcher(Agent):
             "vozilo4@localhost": [44.1080, 15.2625],  # Bili brig / istok
         }
 
+        
+        self.use_road_world = bool(use_road_world)
+        self.world = None
+        if self.use_road_world and ROAD_TILES:
+            self.world = TiledWorld(graphml_path, seed=self.seed, area=self._task_area())
+        elif self.use_road_world:
+            self.world = RoadWorld(
+                graphml_path=graphml_path,
+                seed=self.seed,
+                shared_name=road_shared_graph or ROAD_SHARED_GRAPH,
+            )
+        self.max_route_resample = int(max_route_resample)
+
+    def _task_area(self):
+        lats = [float(p[0]) for p in self.vehicle_starts.values()]
+        lons = [float(p[1]) for p in self.vehicle_starts.values()]
+        dlat = TASK_AREA_M / 111_195.0
+        dlon = TASK_AREA_M / (111_195.0 * max(0.01, math.cos(math.radians(sum(lats) / len(lats)))))
+        return (min(lats) - dlat, min(lons) - dlon, max(lats) + dlat, max(lons) + dlon)
+
+    def _call_at(self, ts: float, close, *args) -> asyncio.TimerHandle:
+        loop = asyncio.get_running_loop()
+        return loop.call_later(max(0.0, ts - time.time()), self._fire_timer, close, args)
+
+    def _fire_timer(self, close, args):
+        if self.inbox is None or self._stopping or not self.is_alive():
+            return
+        task = asyncio.ensure_future(self.inbox.on_deadline(close, *args))
+        # event loop drži samo slabu referencu na zadatak
+        self._timer_tasks.add(task)
+        task.add_done_callback(self._timer_tasks.discard)
+
     def _count_sent(self, msg: Message) -> Message:
         self.stats.messages_sent += 1
         return msg
 
+    def _note_capacity(self, vehicle: str, data: Dict[str, Any]) -> None:
+        try:
+            self.vehicle_capacity[vehicle] = int(data["capacity"])
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def free_slots(self, vehicle: str) -> float:
+        cap = self.vehicle_capacity.get(vehicle)
+        if cap is None:
+            # vozilo ne javlja kapacitet: dispečer ga ne ograničava
+            return math.inf
+        return max(0, cap - self.vehicle_load.get(vehicle, 0))
+
     def pending(self) -> int:
         return self.stats.tasks_awarded - self.stats.tasks_completed
 
@@ -143,6 +258,12 @@ class Dispatcher(Agent):
         except Exception as e:
             print(f"[DISPATCH] Viewer update_task failed: {e}")
 
+    def _route_payload(self, latlon) -> Dict[str, Any]:
+        pts = simplify_route(latlon, ROUTE_SIMPLIFY_M)
+        if ROUTE_ENCODING == "polyline":
+            return {"route_polyline": encode_polyline(pts), "route_precision": POLYLINE_PRECISION}
+        return {"route_latlon": pts.tolist()}
+
     def _safe_update_award(self, task_id: str, winner: str):
         if update_award is None:
             return
@@ -166,13 +287,13 @@ class Dispatcher(Agent):
             if self.agent.max_tasks is not None and self.agent.stats.tasks_announced >= self.agent.max_tasks:
                 return
 
-            
-            cur_id = self.agent.current_task.get("task_id")
-            if cur_id and self.agent.awarded_task_id != cur_id:
+            if 0 < self.agent.max_open_auctions <= len(self.agent.auctions):
                 return
 
             now = time.time()
-            task_id = f"T{int(now)}-{self.agent.rng.randint(100, 999)}"
+            # redni broj: jedinstven i kad se u istoj sekundi objavi više zadataka
+            self.agent.task_seq += 1
+            task_id = f"T{int(now)}-{self.agent.task_seq:04d}"
 
             
             if self.agent.scenario_conf and hasattr(self.agent.scenario_conf, "sample_deadline_slack"):
@@ -186,15 +307,15 @@ class Dispatcher(Agent):
 
                 
                 for _ in range(max(1, self.agent.max_route_resample)):
-                    pu, dv = self.agent.world.sample_task_nodes()
+                    pu, dv, route = self.agent.world.sample_task_route()
 
-                    distance_m = float(self.agent.world.dist_m(pu, dv))
+                    distance_m = float(route.distance_m)
                     if not math.isfinite(distance_m) or distance_m <= 0.0:
                         continue
 
-                    route_latlon = self.agent.world.path_latlon(pu, dv)
-                    if not isinstance(route_latlon, list) or len(route_latlon) < 2:
+                    if len(route.latlon) < 2:
                         continue
+                    route_fields = self.agent._route_payload(route.latlon)
 
                     pickup_latlon = self.agent.world.node_latlon(pu)   
                     dropoff_latlon = self.agent.world.node_latlon(dv)
@@ -209,8 +330,9 @@ class Dispatcher(Agent):
                         "dropoff_node": dv,
                         "pickup_latlon": [float(pickup_latlon[0]), float(pickup_latlon[1])],
                         "dropoff_latlon": [float(dropoff_latlon[0]), float(dropoff_latlon[1])],
-                        "route_latlon": route_latlon,     
+                        **route_fields,
                         "distance_m": float(distance_m),   
+                        "duration_s": float(route.duration_s) if math.isfinite(route.duration_s) else None,
                         
                         "size": 1,
                         "winner": None,
@@ -235,13 +357,6 @@ class Dispatcher(Agent):
                     "winner": None,
                 }
 
-            
-            self.agent.current_task = task
-            self.agent.bids = {}
-            self.agent.no_bids = set()
-            self.agent.auction_open_ts = now
-            self.agent.awarded_task_id = None
-
             self.agent.stats.tasks_announced += 1
             self.agent.task_announce_ts[task_id] = now
 
@@ -272,17 +387,29 @@ class Dispatcher(Agent):
             
             self.agent._safe_update_task(task)
 
+            if self.agent.auction_mode == "batch":
+                # zadatak čeka kraj prozora; vozila daju ponude za sve zadatke prozora odjednom
+                if not self.agent.batch_tasks:
+                    self.agent._call_at(now + self.agent.batch_window_sec, self.agent.inbox._open_batch)
+                self.agent.batch_tasks.append(task)
+                return
+
+            auction = Auction(task, now, now + self.agent.bid_wait_sec)
+            auction.timer = self.agent._call_at(auction.close_ts, self.agent.inbox._close_auction, auction)
+            self.agent.auctions[task_id] = auction
+
           
+            body = json.dumps(task)
             for vjid in self.agent.vehicles:
                 msg = Message(to=vjid)
                 msg.set_metadata("ontology", ONTOLOGY)
                 msg.set_metadata("intent", "announce_task")
-                msg.body = json.dumps(task)
+                msg.body = body
                 await self.send(self.agent._count_sent(msg))
 
     class Inbox(CyclicBehaviour):
         async def run(self):
-            msg = await self.receive(timeout=0.5)
+            msg = await self.receive(timeout=INBOX_WAIT_SEC)
 
             if msg:
                 self.agent.stats.messages_received += 1
@@ -297,34 +424,64 @@ class Dispatcher(Agent):
                     except Exception:
                         return
 
-                    current_id = self.agent.current_task.get("task_id")
-                    if not current_id or data.get("task_id") != current_id:
+                    # ponuda za već zatvorenu (ili nepoznatu) aukciju se odbacuje
+                    auction = self.agent.auctions.get(str(data.get("task_id", "")))
+                    if auction is None:
                         return
+                    current_id = auction.task_id
 
                     sender_bare = str(msg.sender).split("/")[0]
+                    self.agent._note_capacity(sender_bare, data)
 
                     if bool(data.get("no_bid")):
-                        self.agent.no_bids.add(sender_bare)
-                        print(f"[DISPATCH] Got NO_BID from {sender_bare}")
+                        auction.no_bids.add(sender_bare)
+                        print(f"[DISPATCH] Got NO_BID for {current_id} from {sender_bare}")
                         log_event("NO_BID", task_id=current_id, vehicle=sender_bare)
-                        return
-
+                    else:
+                        try:
+                            bid_value = float(data["bid"])
+                        except Exception:
+                            bid_value = math.nan
+
+                        if not math.isfinite(bid_value):
+                            auction.no_bids.add(sender_bare)
+                            print(f"[DISPATCH] Got invalid bid for {current_id} from {sender_bare} -> NO_BID")
+                            log_event("NO_BID", task_id=current_id, vehicle=sender_bare)
+                        else:
+                            auction.bids[sender_bare] = bid_value
+                            print(f"[DISPATCH] Got bid {bid_value:.2f} for {current_id} from {sender_bare}")
+                            log_event("BID", task_id=current_id, vehicle=sender_bare, bid=bid_value)
+
+                elif intent == "batch_bid":
                     try:
-                        bid_value = float(data["bid"])
+                        data = json.loads(msg.body)
                     except Exception:
-                        self.agent.no_bids.add(sender_bare)
-                        log_event("NO_BID", task_id=current_id, vehicle=sender_bare)
                         return
 
-                    if not math.isfinite(bid_value):
-                        self.agent.no_bids.add(sender_bare)
-                        print(f"[DISPATCH] Got invalid bid (non-finite) from {sender_bare} -> NO_BID")
-                        log_event("NO_BID", task_id=current_id, vehicle=sender_bare)
+                    batch = self.agent.batches.get(str(data.get("batch_id", "")))
+                    if batch is None:
                         return
 
-                    self.agent.bids[sender_bare] = bid_value
-                    print(f"[DISPATCH] Got bid {bid_value:.2f} from {sender_bare}")
-                    log_event("BID", task_id=current_id, vehicle=sender_bare, bid=bid_value)
+                    sender_bare = str(msg.sender).split("/")[0]
+                    self.agent._note_capacity(sender_bare, data)
+                    row: Dict[str, float] = {}
+                    for task_id, value in (data.get("bids") or {}).items():
+                        try:
+                            bid_value = float(value)
+                        except (TypeError, ValueError):
+                            continue
+                        if math.isfinite(bid_value):
+                            row[str(task_id)] = bid_value
+                    batch.bids[sender_bare] = row
+                    try:
+                        batch.free[sender_bare] = max(0, int(data.get("free", 0)))
+                    except (TypeError, ValueError):
+                        batch.free[sender_bare] = 0
+                    print(
+                        f"[DISPATCH] Got {len(row)}/{len(batch.tasks)} bids for {batch.batch_id} "
+                        f"from {sender_bare} (free={batch.free[sender_bare]})"
+                    )
+                    log_event("BATCH_BID", task_id=batch.batch_id, vehicle=sender_bare, status=f"{len(row)}/{len(batch.tasks)}")
 
                 elif intent == "status_update":
                     try:
@@ -341,6 +498,10 @@ class Dispatcher(Agent):
                         return
                     self.agent.completed_task_ids.add(task_id)
 
+                    holder = self.agent.assigned_to.pop(task_id, None)
+                    if holder is not None:
+                        self.agent.vehicle_load[holder] = max(0, self.agent.vehicle_load.get(holder, 0) - 1)
+
                     vehicle = str(data.get("vehicle", ""))
                     finished_ts = float(data.get("finished_ts", time.time()))
                     deadline_ts = float(data.get("deadline_ts", finished_ts))
@@ -394,49 +555,132 @@ class Dispatcher(Agent):
             await self._maybe_award()
             await self._maybe_autostop()
 
+        async def on_deadline(self, close, *args):
+            await close(*args)
+            await self._maybe_autostop()
+
         async def _maybe_award(self):
-            task = self.agent.current_task
-            task_id = task.get("task_id")
-            if not task_id:
+            # aukcija se zatvara čim odgovore sva vozila; istek roka zatvara njen timer
+            n = len(self.agent.vehicles)
+            for auction in [a for a in self.agent.auctions.values() if a.responded() >= n]:
+                await self._close_auction(auction)
+            for batch in [b for b in self.agent.batches.values() if b.responded() >= n]:
+                await self._close_batch(batch)
+
+        async def _close_auction(self, auction: Auction):
+            # zadnja ponuda i timer mogu doći jedno za drugim; zatvara samo prvi
+            if self.agent.auctions.pop(auction.task_id, None) is None:
                 return
-            if self.agent.awarded_task_id == task_id:
+            if auction.timer is not None:
+                auction.timer.cancel()
+            await self._award(auction)
+
+        async def _close_batch(self, batch: BatchAuction):
+            if self.agent.batches.pop(batch.batch_id, None) is None:
                 return
+            if batch.timer is not None:
+                batch.timer.cancel()
+            await self._award_batch(batch)
 
-            
-            all_responded = (len(self.agent.bids) + len(self.agent.no_bids)) >= len(self.agent.vehicles)
+        async def _open_batch(self):
+            if not self.agent.batch_tasks:
+                return
 
-            timed_out = False
-            if self.agent.auction_open_ts is not None:
-                timed_out = (time.time() - self.agent.auction_open_ts) >= self.agent.bid_wait_sec
+            now = time.time()
+            self.agent.batch_seq += 1
+            batch_id = f"B{int(now)}-{self.agent.batch_seq:04d}"
+            batch = BatchAuction(batch_id, self.agent.batch_tasks, now, now + self.agent.bid_wait_sec)
+            batch.timer = self.agent._call_at(batch.close_ts, self._close_batch, batch)
+            self.agent.batches[batch_id] = batch
+            self.agent.batch_tasks = []
 
-            if not (all_responded or timed_out):
-                return
+            print(f"[DISPATCH] Batch {batch_id}: {len(batch.tasks)} tasks -> requesting bid matrix")
+            log_event("BATCH_ANNOUNCE", task_id=batch_id, status=f"tasks={len(batch.tasks)}")
 
-            
-            if not self.agent.bids:
-                print(f"[DISPATCH] No valid bids for {task_id} -> dropping task")
+            body = json.dumps({"batch_id": batch_id, "tasks": batch.tasks})
+            for vjid in self.agent.vehicles:
+                msg = Message(to=vjid)
+                msg.set_metadata("ontology", ONTOLOGY)
+                msg.set_metadata("intent", "announce_batch")
+                msg.body = body
+                await self.send(self.agent._count_sent(msg))
+
+        async def _award_batch(self, batch: BatchAuction):
+            # optimalno pridruživanje (mađarski algoritam) uz kapacitet vozila umjesto min(ponuda) po zadatku
+            task_ids = [str(t["task_id"]) for t in batch.tasks]
+            t0 = time.perf_counter()
+            slots = {v: min(free, self.agent.free_slots(v)) for v, free in batch.free.items()}
+            winners = assign_with_capacity(batch.bids, slots, task_ids)
+            solve_ms = (time.perf_counter() - t0) * 1e3
+            total_bid = sum(batch.bids[v][t] for t, v in winners.items())
+            print(
+                f"[DISPATCH] Batch {batch.batch_id}: assigned {len(winners)}/{len(task_ids)} "
+                f"(total bid={total_bid:.2f}, solve={solve_ms:.2f} ms)"
+            )
+
+            lost: Dict[str, List[str]] = {vjid: [] for vjid in self.agent.vehicles}
+            for task in batch.tasks:
+                task_id = str(task["task_id"])
+                winner = winners.get(task_id)
+                if winner is None:
+                    print(f"[DISPATCH] No feasible assignment for {task_id} -> dropping task")
+                    log_event("NO_BIDS", task_id=task_id)
+                    self.agent._safe_clear_task()
+                    continue
+                await self._send_award(task, winner, batch.bids[winner][task_id])
+                for vjid in lost:
+                    if vjid != winner and task_id in batch.bids.get(vjid, {}):
+                        lost[vjid].append(task_id)
+
+            for vjid, task_ids_lost in lost.items():
+                if not task_ids_lost:
+                    continue
+                rej = Message(to=vjid)
+                rej.set_metadata("ontology", ONTOLOGY)
+                rej.set_metadata("intent", "reject")
+                rej.body = json.dumps({"batch_id": batch.batch_id, "task_ids": task_ids_lost})
+                await self.send(self.agent._count_sent(rej))
+
+        async def _award(self, auction: Auction):
+            task = auction.task
+            task_id = auction.task_id
+
+            # ponuda vrijedi samo ako vozilo još ima mjesta (druge aukcije su ga možda već popunile)
+            offers = {v: b for v, b in auction.bids.items() if self.agent.free_slots(v) > 0}
+            if not offers:
+                reason = "all bidders at capacity" if auction.bids else "no valid bids"
+                print(f"[DISPATCH] No eligible bids for {task_id} ({reason}) -> dropping task")
                 log_event("NO_BIDS", task_id=task_id)
-                self.agent.awarded_task_id = task_id
                 self.agent._safe_clear_task()
                 return
 
-            winner = min(self.agent.bids, key=self.agent.bids.get)
-            win_bid = self.agent.bids[winner]
+            winner = min(offers, key=offers.get)
+            win_bid = offers[winner]
+            await self._send_award(task, winner, win_bid)
 
+            for vjid in self.agent.vehicles:
+                if vjid == winner:
+                    continue
+                rej = Message(to=vjid)
+                rej.set_metadata("ontology", ONTOLOGY)
+                rej.set_metadata("intent", "reject")
+                rej.body = json.dumps({"task_id": task_id, "winner": winner, "bid": win_bid})
+                await self.send(self.agent._count_sent(rej))
+
+        async def _send_award(self, task: Dict[str, Any], winner: str, win_bid: float):
+            task_id = str(task["task_id"])
             print(f"[DISPATCH] AWARD {task_id} -> {winner} (bid={win_bid:.2f})")
 
             self.agent.stats.tasks_awarded += 1
+            self.agent.vehicle_load[winner] = self.agent.vehicle_load.get(winner, 0) + 1
+            self.agent.assigned_to[task_id] = winner
             announce_ts = self.agent.task_announce_ts.get(task_id)
             if announce_ts is not None:
                 assign_time = time.time() - announce_ts
                 self.agent.stats.total_assignment_time_sec += assign_time
                 self.agent.stats.assignment_samples += 1
 
-            
-            try:
-                self.agent.current_task["winner"] = winner
-            except Exception:
-                pass
+            task["winner"] = winner
 
           
             self.agent._safe_update_award(task_id, winner)
@@ -449,17 +693,6 @@ class Dispatcher(Agent):
             award_msg.body = json.dumps(task)
             await self.send(self.agent._count_sent(award_msg))
 
-            for vjid in self.agent.vehicles:
-                if vjid == winner:
-                    continue
-                rej = Message(to=vjid)
-                rej.set_metadata("ontology", ONTOLOGY)
-                rej.set_metadata("intent", "reject")
-                rej.body = json.dumps({"task_id": task_id, "winner": winner, "bid": win_bid})
-                await self.send(self.agent._count_sent(rej))
-
-            self.agent.awarded_task_id = task_id
-
         async def _maybe_autostop(self):
             if not self.agent.auto_stop:
                 return
@@ -468,9 +701,7 @@ class Dispatcher(Agent):
             if self.agent.max_tasks is None:
                 return
 
-           
-            cur_id = self.agent.current_task.get("task_id")
-            if cur_id and self.agent.awarded_task_id != cur_id:
+            if self.agent.auctions or self.agent.batch_tasks or self.agent.batches:
                 return
 
             if self.agent.stats.tasks_announced >= self.agent.max_tasks and self.agent.pending() <= 0:
@@ -482,14 +713,19 @@ class Dispatcher(Agent):
         print(f"[DISPATCH] Started as {self.jid} (scenario={self.scenario}, seed={self.seed})")
         if self.max_tasks is not None:
             print(f"[DISPATCH] max_tasks={self.max_tasks} | auto_stop={self.auto_stop}")
+        print(f"[DISPATCH] max_open_auctions={self.max_open_auctions or 'unlimited'}")
+        if self.auction_mode == "batch":
+            print(f"[DISPATCH] auction_mode=batch | window={self.batch_window_sec:.1f}s")
+        self.start_ts = time.time()
         if self.use_road_world:
             print("[DISPATCH] Mode=ROAD (OSMnx graphml)")
 
+        self.inbox = self.Inbox()
         self.add_behaviour(self.AnnounceTask(period=self.task_period_sec))
 
         tpl = Template()
         tpl.set_metadata("ontology", ONTOLOGY)
-        self.add_behaviour(self.Inbox(), tpl)
+        self.add_behaviour(self.inbox, tpl)
 
     def export_csv(self, filename: str):
         s = self.stats
@@ -502,6 +738,7 @@ class Dispatcher(Agent):
         pending = s.tasks_awarded - s.tasks_completed
         avg_assignment_time = (s.total_assignment_time_sec / s.assignment_samples) if s.assignment_samples else 0.0
         messages_per_task = ((s.messages_sent + s.messages_received) / s.tasks_announced) if s.tasks_announced else 0.0
+        elapsed = max(1e-9, time.time() - self.start_ts)
 
         row = {
             "run_id": self.run_id,
@@ -526,23 +763,38 @@ class Dispatcher(Agent):
             "messages_received": s.messages_received,
             "messages_per_task": round(messages_per_task, 2),
             "total_distance": round(s.total_distance, 2),
+            # novi stupci idu na kraj da stari CSV-ovi ostanu poravnati
+            "auction_mode": self.auction_mode,
+            "awarded_per_sec": round(s.tasks_awarded / elapsed, 4),
         }
 
-        write_header = False
+        fieldnames = list(row.keys())
         try:
-            with open(filename, "r", newline=""):
-                pass
+            with open(filename, "r", newline="") as f:
+                reader = csv.DictReader(f)
+                header = list(reader.fieldnames or [])
+                old_rows = list(reader)
         except FileNotFoundError:
-            write_header = True
+            header, old_rows = [], []
+
+        # datoteka starijeg formata: prepisuje se s novim zaglavljem (stari retci dobivaju prazne nove stupce)
+        if header and header != fieldnames:
+            print(f"[DISPATCH] {filename}: header changed -> rewriting with new columns")
+            with open(filename, "w", newline="") as f:
+                w = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+                w.writeheader()
+                w.writerows(old_rows)
 
         with open(filename, "a", newline="") as f:
-            w = csv.DictWriter(f, fieldnames=list(row.keys()))
-            if write_header:
+            w = csv.DictWriter(f, fieldnames=fieldnames)
+            if not header:
                 w.writeheader()
             w.writerow(row)
 
         print(f"\n[DISPATCH] Exported results to {filename}")
         print(f"[DISPATCH] Summary: {row}")
+        if self.world is not None:
+            print(f"[DISPATCH] Route cache: {self.world.cache_stats()}")
 
 
 
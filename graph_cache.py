@@ -0,0 +1,120 @@
+# graph_cache.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# povećati kad se promijeni skup ili značenje spremljenih polja
+CACHE_VERSION = 4
+
+CACHE_DIRNAME = ".graph_cache"
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def default_cache_dir(source_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIRNAME)
+
+
+def _entry_prefix(source_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return f"{stem}-"
+
+
+def cache_entry_path(
+    source_path: str,
+    digest: str,
+    cache_dir: Optional[str] = None,
+    variant: str = "",
+) -> str:
+    cache_dir = cache_dir or default_cache_dir(source_path)
+    # varijanta (npr. koraci predobrade) dobiva vlastiti unos za isti izvor
+    suffix = f"-{variant}" if variant else ""
+    return os.path.join(cache_dir, f"{_entry_prefix(source_path)}{digest[:16]}{suffix}-v{CACHE_VERSION}")
+
+
+def load_arrays(
+    entry_path: str,
+    digest: str,
+    mmap: bool = False,
+) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+    try:
+        with open(os.path.join(entry_path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+
+    if meta.get("version") != CACHE_VERSION or meta.get("source_sha256") != digest:
+        return None
+
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        for name in meta.get("arrays", []):
+            arrays[name] = np.load(
+                os.path.join(entry_path, f"{name}.npy"),
+                mmap_mode="r" if mmap else None,
+                allow_pickle=False,
+            )
+    except Exception:
+        return None
+    return arrays, meta
+
+
+def save_arrays(
+    entry_path: str,
+    digest: str,
+    arrays: Dict[str, np.ndarray],
+    meta: Optional[Dict[str, Any]] = None,
+) -> None:
+    parent = os.path.dirname(entry_path)
+    os.makedirs(parent, exist_ok=True)
+
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(arr), allow_pickle=False)
+
+        meta2 = dict(meta or {})
+        meta2["version"] = CACHE_VERSION
+        meta2["source_sha256"] = digest
+        meta2["arrays"] = list(arrays.keys())
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta2, f, ensure_ascii=False, indent=2)
+
+        if os.path.exists(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, entry_path)
+        except OSError:
+            # drugi proces je u međuvremenu zapisao isti unos
+            if not os.path.exists(entry_path):
+                raise
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def prune_stale(source_path: str, keep_path: str) -> None:
+    cache_dir = os.path.dirname(keep_path)
+    prefix = _entry_prefix(source_path)
+    # druge varijante istog izvora nisu zastarjele
+    current = os.path.basename(keep_path)[:len(prefix) + 16]
+    try:
+        names = os.listdir(cache_dir)
+    except Exception:
+        return
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        live = name.startswith(current) and name.endswith(f"-v{CACHE_VERSION}")
+        if name.startswith(prefix) and not live and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,221 @@
+# graph_prep.py
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from road_graph import RoadGraph, strongly_connected_components
+
+# koraci predobrade; uvijek se izvode ovim redom
+PREPROCESS_STEPS = ("scc", "contract")
+
+
+def parse_steps(spec: Any) -> Tuple[str, ...]:
+    if not spec:
+        return ()
+    items = spec.split(",") if isinstance(spec, str) else list(spec)
+    steps = {str(s).strip().lower() for s in items} - {"", "none"}
+    for s in steps:
+        if s not in PREPROCESS_STEPS:
+            raise ValueError(f"Nepoznat korak predobrade: {s} (dozvoljeno: {', '.join(PREPROCESS_STEPS)})")
+    return tuple(s for s in PREPROCESS_STEPS if s in steps)
+
+
+@dataclass
+class ChainGeometry:
+    # međučvorovi sažetih lanaca, CSR po izravnim bridovima grafa (redom od izvora prema cilju)
+    offsets: np.ndarray
+    node_ids: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+
+    ARRAY_FIELDS = ("offsets", "node_ids", "lat", "lon")
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> Optional["ChainGeometry"]:
+        if any(name not in arrays for name in cls.ARRAY_FIELDS):
+            return None
+        return cls(**{name: arrays[name] for name in cls.ARRAY_FIELDS})
+
+    def __len__(self) -> int:
+        return int(self.node_ids.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in self.to_arrays().values()))
+
+    def expand(
+        self,
+        node_ids: np.ndarray,
+        coords: np.ndarray,
+        path: np.ndarray,
+        edges: np.ndarray,
+        backward: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # čvorovi puta + međučvorovi svakog brida, u redoslijedu vožnje
+        path = np.asarray(path, dtype=np.int64)
+        edges = np.asarray(edges, dtype=np.int64)
+        if len(edges) == 0:
+            return node_ids[path], coords[path]
+        starts = self.offsets[edges]
+        counts = self.offsets[edges + 1] - starts
+        total = len(path) + int(counts.sum())
+
+        node_pos = np.arange(len(path)) + np.concatenate([[0], np.cumsum(counts)])
+        is_node = np.zeros(total, dtype=bool)
+        is_node[node_pos] = True
+
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        if backward is not None:
+            flip = np.repeat(np.asarray(backward, dtype=bool), counts)
+            local = np.where(flip, np.repeat(counts, counts) - 1 - local, local)
+        via = np.repeat(starts, counts) + local
+
+        ids = np.empty(total, dtype=node_ids.dtype)
+        ids[is_node] = node_ids[path]
+        ids[~is_node] = self.node_ids[via]
+        latlon = np.empty((total, 2), dtype=np.float64)
+        latlon[is_node] = coords[path]
+        latlon[~is_node, 0] = self.lat[via]
+        latlon[~is_node, 1] = self.lon[via]
+        return ids, latlon
+
+
+def subgraph(graph: RoadGraph, keep: np.ndarray) -> RoadGraph:
+    keep = np.asarray(keep, dtype=bool)
+    new_idx = np.cumsum(keep) - 1
+    src = graph.sources()
+    dst = graph.targets.astype(np.int64)
+    e = keep[src] & keep[dst]
+    return RoadGraph.from_edges(
+        graph.node_ids[keep],
+        new_idx[src[e]],
+        new_idx[dst[e]],
+        graph.weights[e],
+        graph.lat[keep] if graph.lat is not None else None,
+        graph.lon[keep] if graph.lon is not None else None,
+        graph.times[e] if graph.times is not None else None,
+    )
+
+
+def largest_scc(graph: RoadGraph) -> RoadGraph:
+    labels = strongly_connected_components(graph)
+    if graph.n == 0:
+        return graph
+    biggest = int(np.argmax(np.bincount(labels)))
+    return subgraph(graph, labels == biggest)
+
+
+def _through_nodes(graph: RoadGraph) -> np.ndarray:
+    # čvor je samo točka geometrije ako ima točno dva susjeda i vozi se "kroz" njega:
+    # jednosmjerno (a -> v -> b) ili dvosmjerno (a <-> v <-> b), bez paralelnih bridova
+    off, tgt, _ = graph.adjacency()
+    roff, rtgt, _ = graph.adjacency(reverse=True)
+    outdeg = np.diff(graph.offsets)
+    indeg = np.diff(graph.r_offsets)
+    through = np.zeros(graph.n, dtype=bool)
+    cand = np.flatnonzero(((outdeg == 1) & (indeg == 1)) | ((outdeg == 2) & (indeg == 2)))
+    for v in cand.tolist():
+        outs = [tgt[i] for i in range(off[v], off[v + 1])]
+        ins = [rtgt[i] for i in range(roff[v], roff[v + 1])]
+        if v in outs or v in ins:
+            continue
+        if len(outs) == 1:
+            through[v] = outs[0] != ins[0]
+        else:
+            through[v] = outs[0] != outs[1] and set(outs) == set(ins)
+    return through
+
+
+def contract_chains(graph: RoadGraph) -> Tuple[RoadGraph, ChainGeometry]:
+    off, tgt, wt = graph.adjacency()
+    tt = memoryview(graph.times) if graph.times is not None else None
+    through = _through_nodes(graph)
+    visited = np.zeros(graph.n, dtype=bool)
+
+    src: List[int] = []
+    dst: List[int] = []
+    w: List[float] = []
+    t: List[float] = []
+    vias: List[List[int]] = []
+
+    def walk(a: int) -> None:
+        for i in range(off[a], off[a + 1]):
+            x = tgt[i]
+            dw = wt[i]
+            dt = tt[i] if tt is not None else 0.0
+            prev = a
+            via: List[int] = []
+            while through[x]:
+                visited[x] = True
+                via.append(x)
+                j = off[x]
+                if off[x + 1] - j == 2 and tgt[j] == prev:
+                    j += 1
+                dw += wt[j]
+                if tt is not None:
+                    dt += tt[j]
+                prev = x
+                x = tgt[j]
+            # petlja natrag u isti čvor nikad nije dio najkraćeg puta
+            if x == a:
+                continue
+            src.append(a)
+            dst.append(x)
+            w.append(dw)
+            t.append(dt)
+            vias.append(via)
+
+    for a in np.flatnonzero(~through).tolist():
+        walk(a)
+    # zatvoreni prsten samih prolaznih čvorova: jedan čvor postaje krajnji
+    for v in np.flatnonzero(through).tolist():
+        if through[v] and not visited[v]:
+            through[v] = False
+            walk(v)
+
+    keep = ~through
+    new_idx = np.cumsum(keep) - 1
+    src_a = new_idx[np.asarray(src, dtype=np.int64)]
+    dst_a = new_idx[np.asarray(dst, dtype=np.int64)]
+    contracted = RoadGraph.from_edges(
+        graph.node_ids[keep],
+        src_a,
+        dst_a,
+        w,
+        graph.lat[keep] if graph.lat is not None else None,
+        graph.lon[keep] if graph.lon is not None else None,
+        t if graph.times is not None else None,
+    )
+
+    # geometrija u istom (stabilnom) poretku bridova kao CSR
+    order = np.argsort(src_a, kind="stable")
+    counts = np.asarray([len(vias[k]) for k in order.tolist()], dtype=np.int64)
+    offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    flat = np.asarray([x for k in order.tolist() for x in vias[k]], dtype=np.int64)
+    geometry = ChainGeometry(
+        offsets,
+        graph.node_ids[flat],
+        graph.lat[flat] if graph.lat is not None else np.zeros(len(flat)),
+        graph.lon[flat] if graph.lon is not None else np.zeros(len(flat)),
+    )
+    return contracted, geometry
+
+
+def preprocess(graph: RoadGraph, steps: Sequence[str]) -> Tuple[RoadGraph, Optional[ChainGeometry], Dict[str, int]]:
+    info = {"nodes_in": graph.n, "edges_in": graph.m}
+    geometry: Optional[ChainGeometry] = None
+    if "scc" in steps:
+        graph = largest_scc(graph)
+        info["scc_nodes"] = graph.n
+    if "contract" in steps:
+        n = graph.n
+        graph, geometry = contract_chains(graph)
+        info["contracted"] = n - graph.n
+    info["nodes"] = graph.n
+    info["edges"] = graph.m
+    return graph, geometry, info
@@ -0,0 +1,85 @@
+# graphml_loader.py
+import ast
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+from road_graph import RoadGraph
+from spatial_index import haversine_m
+from travel_time import edge_time_s
+
+# čita osmnx GraphML izravno u CSR, bez osmnx / networkx / geopandas (~1 s uvoza)
+_NS = "{http://graphml.graphdrawing.org/xmlns}"
+
+
+def _value(text: Optional[str]) -> Any:
+    # isto kao osmnx.load_graphml: stringificirane liste (pojednostavljeni bridovi) postaju liste
+    if text is None:
+        return None
+    if (text.startswith("[") and text.endswith("]")) or (text.startswith("{") and text.endswith("}")):
+        try:
+            return ast.literal_eval(text)
+        except (SyntaxError, ValueError):
+            return text
+    return text
+
+
+def _node_id(text: str) -> Any:
+    s = text.strip()
+    if s.isdigit() or (s.startswith("-") and s[1:].isdigit()):
+        return int(s)
+    return text
+
+
+def load_road_graph(path: str) -> RoadGraph:
+    keys: Dict[str, str] = {}
+    idx: Dict[Any, int] = {}
+    node_ids: List[Any] = []
+    lat: List[float] = []
+    lon: List[float] = []
+    raw_edges: List[tuple] = []
+
+    for _, el in ET.iterparse(path, events=("end",)):
+        tag = el.tag[len(_NS):] if el.tag.startswith(_NS) else el.tag
+        if tag == "key":
+            keys[el.get("id")] = el.get("attr.name")
+        elif tag == "node":
+            data = {keys.get(d.get("key")): d.text for d in el.iter(f"{_NS}data")}
+            n = _node_id(el.get("id"))
+            idx[n] = len(node_ids)
+            node_ids.append(n)
+            lat.append(float(data.get("y") or 0.0))
+            lon.append(float(data.get("x") or 0.0))
+            el.clear()
+        elif tag == "edge":
+            data = {keys.get(d.get("key")): d.text for d in el.iter(f"{_NS}data")}
+            raw_edges.append((
+                _node_id(el.get("source")),
+                _node_id(el.get("target")),
+                data.get("length"),
+                _value(data.get("highway")),
+                _value(data.get("maxspeed")),
+            ))
+            el.clear()
+
+    # redoslijed bridova kao MultiDiGraph.edges(): po izvoru, pa po prvom pojavljivanju cilja, pa po ključu
+    first: Dict[tuple, int] = {}
+    for k, (a, b, *_rest) in enumerate(raw_edges):
+        first.setdefault((a, b), k)
+    order = sorted(range(len(raw_edges)), key=lambda k: (idx[raw_edges[k][0]], first[(raw_edges[k][0], raw_edges[k][1])], k))
+
+    src: List[int] = []
+    dst: List[int] = []
+    w: List[float] = []
+    t: List[float] = []
+    for k in order:
+        a, b, length, highway, maxspeed = raw_edges[k]
+        ia, ib = idx[a], idx[b]
+        try:
+            length_m = float(length)
+        except (TypeError, ValueError):
+            length_m = haversine_m(lat[ia], lon[ia], lat[ib], lon[ib])
+        src.append(ia)
+        dst.append(ib)
+        w.append(length_m)
+        t.append(edge_time_s(length_m, highway, maxspeed))
+    return RoadGraph.from_edges(node_ids, src, dst, w, lat, lon, times=t)
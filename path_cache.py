@@ -0,0 +1,91 @@
+# path_cache.py
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# procjena memorije po unosu (ključ, tuple, OrderedDict čvor) bez same rute
+ENTRY_OVERHEAD_BYTES = 160
+
+
+class PathCache:
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 0):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._data: "OrderedDict[Hashable, Tuple[float, Optional[array]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def _entry_bytes(path: Optional[array]) -> int:
+        if path is None:
+            return ENTRY_OVERHEAD_BYTES
+        return ENTRY_OVERHEAD_BYTES + path.itemsize * len(path)
+
+    def get(self, key: Hashable, want_path: bool = False) -> Optional[Tuple[float, Optional[List[int]]]]:
+        entry = self._data.get(key)
+        if entry is None or (want_path and entry[1] is None):
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        dist, path = entry
+        return dist, (path.tolist() if path is not None else None)
+
+    def peek(self, key: Hashable) -> Optional[float]:
+        entry = self._data.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, dist: float, path: Optional[List[int]] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        stored = array("i", path) if path is not None else None
+
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= self._entry_bytes(old[1])
+
+        self._data[key] = (float(dist), stored)
+        self.bytes += self._entry_bytes(stored)
+
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes and self.bytes > self.max_bytes)
+        ):
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.bytes -= self._entry_bytes(evicted)
+            self.evictions += 1
+
+    def invalidate(self, match: Callable[[Hashable, Optional[array]], bool]) -> int:
+        # uklanja unose za koje match(ključ, ruta) vrati True; ruta je array('i') ili None
+        stale = [key for key, (_, path) in self._data.items() if match(key, path)]
+        for key in stale:
+            _, path = self._data.pop(key)
+            self.bytes -= self._entry_bytes(path)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "bytes": self.bytes,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
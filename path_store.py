@@ -0,0 +1,96 @@
+# path_store.py
+import os
+import sqlite3
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# jedna baza po izvornom GraphML-u, uz unose graph cachea
+STORE_SUFFIX = "-paths.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paths (
+    graph TEXT NOT NULL,
+    u INTEGER NOT NULL,
+    v INTEGER NOT NULL,
+    undirected INTEGER NOT NULL,
+    weight TEXT NOT NULL,
+    dist REAL NOT NULL,
+    path BLOB,
+    PRIMARY KEY (graph, u, v, undirected, weight)
+) WITHOUT ROWID
+"""
+
+
+def store_path(source_path: str, cache_dir: str) -> str:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{stem}{STORE_SUFFIX}")
+
+
+class PathStore:
+
+    def __init__(self, db_path: str, graph_key: str, timeout: float = 30.0):
+        self.db_path = db_path
+        self.graph_key = str(graph_key)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # autocommit: svaki zapis je odmah vidljiv drugim procesima
+        self._db = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        # WAL: čitatelji ne čekaju pisca; NORMAL ne radi fsync na svaki commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, u: int, v: int, undirected: bool, weight: str, want_path: bool = False) -> Optional[Tuple[float, Optional[List[int]]]]:
+        row = self._db.execute(
+            "SELECT dist, path FROM paths WHERE graph = ? AND u = ? AND v = ? AND undirected = ? AND weight = ?",
+            (self.graph_key, int(u), int(v), int(bool(undirected)), weight),
+        ).fetchone()
+        if row is None or (want_path and row[1] is None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        dist, blob = row
+        if blob is None:
+            return float(dist), None
+        path = array("i")
+        path.frombytes(blob)
+        return float(dist), path.tolist()
+
+    def put(self, u: int, v: int, undirected: bool, weight: str, dist: float, path: Optional[List[int]] = None) -> None:
+        blob = array("i", path).tobytes() if path is not None else None
+        # ruta zamjenjuje unos bez rute; postojeća ruta se ne prepisuje samom udaljenošću
+        self._db.execute(
+            "INSERT INTO paths (graph, u, v, undirected, weight, dist, path) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (graph, u, v, undirected, weight) DO UPDATE SET dist = excluded.dist, path = excluded.path "
+            "WHERE paths.path IS NULL AND excluded.path IS NOT NULL",
+            (self.graph_key, int(u), int(v), int(bool(undirected)), weight, float(dist), blob),
+        )
+        self.writes += 1
+
+    def prune_other_graphs(self, keep_prefix: str) -> int:
+        # baza je po izvoru: brišu se unosi za stare sadržaje GraphML-a
+        cur = self._db.execute("DELETE FROM paths WHERE substr(graph, 1, ?) != ?", (len(keep_prefix), keep_prefix))
+        return int(cur.rowcount or 0)
+
+    def __len__(self) -> int:
+        return int(self._db.execute("SELECT COUNT(*) FROM paths WHERE graph = ?", (self.graph_key,)).fetchone()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.db_path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        try:
+            self._db.close()
+        except Exception:
+            pass
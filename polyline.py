@@ -0,0 +1,161 @@
+# polyline.py
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+# 5 decimala ~ 1.1 m (standardni Google encoded polyline)
+POLYLINE_PRECISION = 5
+
+EARTH_R = 6371000.0
+
+
+# ispod ovoga čisti Python je brži od numpy poziva po razini
+_VECTOR_MIN_POINTS = 1024
+
+
+def _dp_mask_loop(x: List[float], y: List[float], tol2: float) -> List[bool]:
+    n = len(x)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        ax, ay = x[a], y[a]
+        dx, dy = x[b] - ax, y[b] - ay
+        seg2 = dx * dx + dy * dy
+        best = -1.0
+        best_i = -1
+        for i in range(a + 1, b):
+            px = x[i] - ax
+            py = y[i] - ay
+            if seg2 > 0:
+                t = (px * dx + py * dy) / seg2
+                t = 0.0 if t < 0.0 else (1.0 if t > 1.0 else t)
+                px -= t * dx
+                py -= t * dy
+            d2 = px * px + py * py
+            if d2 > best:
+                best = d2
+                best_i = i
+        if best > tol2:
+            keep[best_i] = True
+            stack.append((a, best_i))
+            stack.append((best_i, b))
+    return keep
+
+
+def _dp_mask_vector(x: np.ndarray, y: np.ndarray, tol2: float) -> np.ndarray:
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    pos = np.arange(n)
+    # sve segmente jedne razine dijelimo odjednom (isti rezultat kao rekurzija)
+    while True:
+        kidx = np.flatnonzero(keep)
+        seg = np.minimum(np.searchsorted(kidx, pos, side="right") - 1, len(kidx) - 2)
+        a = kidx[seg]
+        b = kidx[seg + 1]
+        dx = x[b] - x[a]
+        dy = y[b] - y[a]
+        px = x - x[a]
+        py = y - y[a]
+        seg2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(seg2 > 0, np.clip((px * dx + py * dy) / seg2, 0.0, 1.0), 0.0)
+        ex = px - t * dx
+        ey = py - t * dy
+        d2 = np.where(keep, -1.0, ex * ex + ey * ey)
+
+        seg_max = np.maximum.reduceat(d2, kidx[:-1])
+        split = seg_max > tol2
+        if not split.any():
+            return keep
+        is_max = (d2 == seg_max[seg]) & split[seg]
+        first = np.flatnonzero(is_max)
+        first = first[np.r_[True, seg[first[1:]] != seg[first[:-1]]]]
+        keep[first] = True
+
+
+def simplify(latlon, tolerance_m: float) -> np.ndarray:
+    # Douglas-Peucker u metrima (ekvidistantna projekcija); krajnje točke ostaju
+    pts = np.asarray(latlon, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n <= 2 or tolerance_m <= 0:
+        return pts
+
+    lat0 = math.radians(float(pts[:, 0].mean()))
+    x = np.radians(pts[:, 1]) * EARTH_R * math.cos(lat0)
+    y = np.radians(pts[:, 0]) * EARTH_R
+    tol2 = float(tolerance_m) ** 2
+    if n < _VECTOR_MIN_POINTS:
+        keep = np.asarray(_dp_mask_loop(x.tolist(), y.tolist(), tol2), dtype=bool)
+    else:
+        keep = _dp_mask_vector(x, y, tol2)
+    return pts[keep]
+
+
+def encode(latlon, precision: int = POLYLINE_PRECISION) -> str:
+    pts = np.asarray(latlon, dtype=np.float64).reshape(-1, 2)
+    if len(pts) == 0:
+        return ""
+    scaled = np.round(pts * (10 ** precision)).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+    out: List[str] = []
+    for v in deltas.tolist():
+        v = ~(v << 1) if v < 0 else (v << 1)
+        while v >= 0x20:
+            out.append(chr((0x20 | (v & 0x1F)) + 63))
+            v >>= 5
+        out.append(chr(v + 63))
+    return "".join(out)
+
+
+def decode(encoded: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    factor = float(10 ** precision)
+    coords: List[List[float]] = []
+    index = 0
+    lat = 0
+    lon = 0
+    n = len(encoded)
+    while index < n:
+        vals = []
+        for _ in range(2):
+            shift = 0
+            result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            vals.append(~(result >> 1) if result & 1 else (result >> 1))
+        lat += vals[0]
+        lon += vals[1]
+        coords.append([lat / factor, lon / factor])
+    return coords
+
+
+def route_from_task(task: dict) -> List[List[float]]:
+    route = task.get("route_latlon")
+    if isinstance(route, list) and route:
+        return route
+    encoded = task.get("route_polyline")
+    if isinstance(encoded, str) and encoded:
+        return decode(encoded, int(task.get("route_precision", POLYLINE_PRECISION)))
+    return []
+
+
+def path_length_m(latlon: Sequence[Sequence[float]]) -> float:
+    pts = np.asarray(latlon, dtype=np.float64).reshape(-1, 2)
+    if len(pts) < 2:
+        return 0.0
+    p = np.radians(pts)
+    dlat = np.diff(p[:, 0])
+    dlon = np.diff(p[:, 1])
+    a = np.sin(dlat / 2) ** 2 + np.cos(p[:-1, 0]) * np.cos(p[1:, 0]) * np.sin(dlon / 2) ** 2
+    return float(np.sum(2 * EARTH_R * np.arcsin(np.minimum(1.0, np.sqrt(a)))))
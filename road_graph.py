@@ -0,0 +1,360 @@
+# road_graph.py
+import bisect
+import heapq
+import math
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def _csr(
+    n: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    w: np.ndarray,
+    extra: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    order = np.argsort(src, kind="stable")
+    counts = np.bincount(src, minlength=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    extra_out = extra[order].astype(np.float64) if extra is not None else None
+    return offsets, dst[order].astype(np.int32), w[order].astype(np.float64), extra_out
+
+
+class SortedIndex:
+
+    def __init__(self, id_sorted: np.ndarray, id_order: np.ndarray):
+        self._ids = memoryview(id_sorted)
+        self._order = memoryview(id_order)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if isinstance(key, bool) or not isinstance(key, (int, np.integer)):
+            return default
+        key = int(key)
+        i = bisect.bisect_left(self._ids, key)
+        if i < len(self._ids) and self._ids[i] == key:
+            return self._order[i]
+        return default
+
+    def __getitem__(self, key: Any) -> int:
+        i = self.get(key)
+        if i is None:
+            raise KeyError(key)
+        return i
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class NodeIdView(SequenceABC):
+
+    def __init__(self, node_ids: np.ndarray):
+        self._ids = memoryview(node_ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._ids[i].tolist()
+        return self._ids[i]
+
+
+@dataclass
+class RoadGraph:
+    node_ids: np.ndarray
+    offsets: np.ndarray
+    targets: np.ndarray
+    weights: np.ndarray
+    r_offsets: np.ndarray
+    r_targets: np.ndarray
+    r_weights: np.ndarray
+    lat: Optional[np.ndarray] = None
+    lon: Optional[np.ndarray] = None
+    # sortirani id-evi: indeks bez Python dicta (za dijeljenu memoriju / mmap)
+    id_sorted: Optional[np.ndarray] = None
+    id_order: Optional[np.ndarray] = None
+    # vrijeme prolaska brida (s), poredano kao weights / r_weights
+    times: Optional[np.ndarray] = None
+    r_times: Optional[np.ndarray] = None
+
+    index: Any = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.id_sorted is not None and self.id_order is not None:
+            self.index = SortedIndex(self.id_sorted, self.id_order)
+        else:
+            self.index = {n: i for i, n in enumerate(self.node_ids.tolist())}
+        # memoryview daje Python int/float bez kopiranja polja
+        self._off = memoryview(self.offsets)
+        self._tgt = memoryview(self.targets)
+        self._w = memoryview(self.weights)
+        self._roff = memoryview(self.r_offsets)
+        self._rtgt = memoryview(self.r_targets)
+        self._rw = memoryview(self.r_weights)
+
+    @classmethod
+    def from_edges(
+        cls,
+        node_ids: Sequence[Any],
+        src: Sequence[int],
+        dst: Sequence[int],
+        weights: Sequence[float],
+        lat: Optional[Sequence[float]] = None,
+        lon: Optional[Sequence[float]] = None,
+        times: Optional[Sequence[float]] = None,
+    ) -> "RoadGraph":
+        ids = np.asarray(node_ids)
+        if ids.dtype.kind not in "iu":
+            ids = np.asarray(list(node_ids), dtype=object)
+        n = len(ids)
+        src_a = np.asarray(src, dtype=np.int64)
+        dst_a = np.asarray(dst, dtype=np.int64)
+        w_a = np.asarray(weights, dtype=np.float64)
+        t_a = np.asarray(times, dtype=np.float64) if times is not None else None
+
+        offsets, targets, w, t = _csr(n, src_a, dst_a, w_a, t_a)
+        r_offsets, r_targets, r_w, r_t = _csr(n, dst_a, src_a, w_a, t_a)
+        lat_a = np.asarray(lat, dtype=np.float64) if lat is not None else None
+        lon_a = np.asarray(lon, dtype=np.float64) if lon is not None else None
+        return cls(ids, offsets, targets, w, r_offsets, r_targets, r_w, lat_a, lon_a, times=t, r_times=r_t)
+
+    ARRAY_FIELDS = (
+        "node_ids", "offsets", "targets", "weights",
+        "r_offsets", "r_targets", "r_weights", "lat", "lon",
+        "id_sorted", "id_order", "times", "r_times",
+    )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        out: Dict[str, np.ndarray] = {}
+        for name in self.ARRAY_FIELDS:
+            arr = getattr(self, name)
+            if arr is not None:
+                out[name] = arr
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "RoadGraph":
+        return cls(**{name: arrays.get(name) for name in cls.ARRAY_FIELDS})
+
+    def with_sorted_index(self) -> "RoadGraph":
+        if self.node_ids.dtype == object:
+            return self
+        order = np.argsort(self.node_ids, kind="stable")
+        arrays = self.to_arrays()
+        arrays["id_sorted"] = self.node_ids[order].astype(np.int64)
+        arrays["id_order"] = order.astype(np.int64)
+        return RoadGraph.from_arrays(arrays)
+
+    def node_list(self) -> Sequence[Any]:
+        if isinstance(self.index, SortedIndex):
+            return NodeIdView(self.node_ids)
+        return self.node_ids.tolist()
+
+    @property
+    def n(self) -> int:
+        return int(self.offsets.shape[0] - 1)
+
+    @property
+    def m(self) -> int:
+        return int(self.targets.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return unique_nbytes(self.to_arrays().values())
+
+    def sources(self) -> np.ndarray:
+        return np.repeat(np.arange(self.n, dtype=np.int64), np.diff(self.offsets))
+
+    def edges(self) -> Iterator[Tuple[int, int, float]]:
+        return zip(self.sources().tolist(), self.targets.tolist(), self.weights.tolist())
+
+    def undirected(self) -> "RoadGraph":
+        src = self.sources()
+        dst = self.targets.astype(np.int64)
+        offsets, targets, w, t = _csr(
+            self.n,
+            np.concatenate([src, dst]),
+            np.concatenate([dst, src]),
+            np.concatenate([self.weights, self.weights]),
+            np.concatenate([self.times, self.times]) if self.times is not None else None,
+        )
+        # simetričan graf: obrnuti CSR su ista polja; čvorovi, koordinate i indeks se dijele
+        return RoadGraph(
+            self.node_ids, offsets, targets, w, offsets, targets, w,
+            self.lat, self.lon, self.id_sorted, self.id_order,
+            times=t, r_times=t,
+        )
+
+    def by_time(self) -> "RoadGraph":
+        # ista topologija (dijeljena polja), težine su vremena prolaska
+        if self.times is None or self.r_times is None:
+            raise ValueError("Graf nema vremena prolaska bridova (times).")
+        arrays = self.to_arrays()
+        arrays["weights"] = self.times
+        arrays["r_weights"] = self.r_times
+        return RoadGraph.from_arrays(arrays)
+
+    def adjacency(self, reverse: bool = False):
+        if reverse:
+            return self._roff, self._rtgt, self._rw
+        return self._off, self._tgt, self._w
+
+
+def unique_nbytes(arrays: Iterable[np.ndarray], seen: Optional[Set[int]] = None) -> int:
+    # polja dijeljena među grafovima (isti objekt) broje se jednom
+    seen = set() if seen is None else seen
+    total = 0
+    for arr in arrays:
+        if arr is None or id(arr) in seen:
+            continue
+        seen.add(id(arr))
+        total += int(arr.nbytes)
+    return total
+
+
+def path_edges(graph: RoadGraph, path: Sequence[int]) -> np.ndarray:
+    # indeksi bridova duž puta; kod paralelnih bridova uzima se najlakši
+    off, tgt, wt = graph.adjacency()
+    out = np.empty(max(0, len(path) - 1), dtype=np.int64)
+    for k in range(len(path) - 1):
+        a = path[k]
+        b = path[k + 1]
+        best = -1
+        best_w = math.inf
+        for i in range(off[a], off[a + 1]):
+            if tgt[i] == b and wt[i] < best_w:
+                best = i
+                best_w = wt[i]
+        if best < 0:
+            raise KeyError((a, b))
+        out[k] = best
+    return out
+
+
+def dijkstra(
+    graph: RoadGraph,
+    s: int,
+    t: Optional[int] = None,
+    reverse: bool = False,
+) -> Tuple[Dict[int, float], Dict[int, int]]:
+    off, tgt, wt = graph.adjacency(reverse)
+    dist: Dict[int, float] = {s: 0.0}
+    parent: Dict[int, int] = {s: -1}
+    done = set()
+    heap = [(0.0, s)]
+    while heap:
+        d, x = heapq.heappop(heap)
+        if x in done:
+            continue
+        done.add(x)
+        if x == t:
+            break
+        for i in range(off[x], off[x + 1]):
+            y = tgt[i]
+            nd = d + wt[i]
+            if nd < dist.get(y, math.inf):
+                dist[y] = nd
+                parent[y] = x
+                heapq.heappush(heap, (nd, y))
+    return dist, parent
+
+
+def shortest_path(graph: RoadGraph, s: int, t: int) -> Tuple[float, List[int]]:
+    dist, parent = dijkstra(graph, s, t)
+    d = dist.get(t)
+    if d is None:
+        return math.inf, []
+    path = [t]
+    while parent[path[-1]] != -1:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return d, path
+
+
+def single_source(graph: RoadGraph, s: int, reverse: bool = False) -> np.ndarray:
+    dist, _ = dijkstra(graph, s, None, reverse=reverse)
+    out = np.full(graph.n, np.inf)
+    if dist:
+        out[np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))] = np.fromiter(
+            dist.values(), dtype=np.float64, count=len(dist)
+        )
+    return out
+
+
+def multi_target(graph: RoadGraph, s: int, targets: Sequence[int], reverse: bool = False) -> np.ndarray:
+    # jedna Dijkstra pretraga koja staje kad su svi ciljevi riješeni
+    off, tgt, wt = graph.adjacency(reverse)
+    out = np.full(len(targets), np.inf)
+    want: Dict[int, List[int]] = {}
+    for j, t in enumerate(targets):
+        want.setdefault(int(t), []).append(j)
+    remaining = len(want)
+
+    dist: Dict[int, float] = {s: 0.0}
+    done = set()
+    heap = [(0.0, s)]
+    while heap and remaining:
+        d, x = heapq.heappop(heap)
+        if x in done:
+            continue
+        done.add(x)
+        cols = want.get(x)
+        if cols is not None:
+            out[cols] = d
+            remaining -= 1
+        for i in range(off[x], off[x + 1]):
+            y = tgt[i]
+            nd = d + wt[i]
+            if nd < dist.get(y, math.inf):
+                dist[y] = nd
+                heapq.heappush(heap, (nd, y))
+    return out
+
+
+def strongly_connected_components(graph: RoadGraph) -> np.ndarray:
+    # Kosaraju: iterativni DFS (nema rekurzije na velikim grafovima)
+    n = graph.n
+    off, tgt, _ = graph.adjacency()
+    seen = bytearray(n)
+    order: List[int] = []
+    for s in range(n):
+        if seen[s]:
+            continue
+        seen[s] = 1
+        stack = [(s, off[s])]
+        while stack:
+            x, i = stack[-1]
+            if i < off[x + 1]:
+                stack[-1] = (x, i + 1)
+                y = tgt[i]
+                if not seen[y]:
+                    seen[y] = 1
+                    stack.append((y, off[y]))
+            else:
+                stack.pop()
+                order.append(x)
+
+    roff, rtgt, _ = graph.adjacency(reverse=True)
+    labels = [-1] * n
+    comp = 0
+    for s in reversed(order):
+        if labels[s] != -1:
+            continue
+        labels[s] = comp
+        stack = [s]
+        while stack:
+            x = stack.pop()
+            for i in range(roff[x], roff[x + 1]):
+                y = rtgt[i]
+                if labels[y] == -1:
+                    labels[y] = comp
+                    stack.append(y)
+        comp += 1
+    return np.asarray(labels, dtype=np.int32)
@@ -6,8 +6,9 @@ import json
 import time
 import spade
 
-from dispatcher import Dispatcher
-from vehicle import Vehicle
+from dispatcher import Dispatcher, AUCTION_MODE, BATCH_WINDOW_SEC
+from vehicle import Vehicle, REACH_PRUNE
+from world import RoadWorld
 
 from scenarios import Scenario, SCENARIOS as SCENARIOS_DICT
 
@@ -56,6 +57,12 @@ STATE_PATH = os.getenv("STATE_PATH", os.path.join("map_viewer", "state.json"))
 EVENTS_CSV = os.getenv("EVENTS_CSV", "events.csv")
 
 
+SHARE_ROAD_GRAPH = os.getenv("SHARE_ROAD_GRAPH", "1") == "1"
+
+# veličina ćelije (m) tablice zona za procjenu prilaza u ponudama; 0 = zračna linija
+BID_ZONE_M = float(os.getenv("BID_ZONE_M", "0"))
+
+
 def reset_outputs():
     for path in OUT_BY_STRATEGY.values():
         if os.path.exists(path):
@@ -133,7 +140,33 @@ async def stop_agents(dispatcher, vehicles):
     await asyncio.sleep(COOLDOWN_SEC)
 
 
-def make_vehicles(strategy: str, seed: int):
+def publish_road_graph():
+    if not SHARE_ROAD_GRAPH:
+        return None, None
+    try:
+        world = RoadWorld(GRAPHML_PATH)
+        name = world.publish_shared()
+        os.environ["ROAD_SHARED_GRAPH"] = name
+        print(f"[BATCH] Road graph published in shared memory: {name}")
+        return world, name
+    except Exception as e:
+        print(f"[BATCH] Shared road graph unavailable: {e}")
+        return None, None
+
+
+def build_bid_zones(world=None):
+    if BID_ZONE_M <= 0:
+        return None
+    try:
+        if world is None:
+            world = RoadWorld(GRAPHML_PATH)
+        return world.zone_table(BID_ZONE_M)
+    except Exception as e:
+        print(f"[BATCH] Zone table unavailable: {e}")
+        return None
+
+
+def make_vehicles(strategy: str, seed: int, zones=None):
     v1 = Vehicle(
         "vozilo1@localhost",
         "lozinka123",
@@ -141,6 +174,7 @@ def make_vehicles(strategy: str, seed: int):
         strategy=strategy,
         seed=seed,
         speed_mps=VEHICLE_SPEED_MPS,
+        zones=zones,
     )
     v2 = Vehicle(
         "vozilo2@localhost",
@@ -149,6 +183,7 @@ def make_vehicles(strategy: str, seed: int):
         strategy=strategy,
         seed=seed,
         speed_mps=VEHICLE_SPEED_MPS,
+        zones=zones,
     )
     v3 = Vehicle(
         "vozilo3@localhost",
@@ -157,6 +192,7 @@ def make_vehicles(strategy: str, seed: int):
         strategy=strategy,
         seed=seed,
         speed_mps=VEHICLE_SPEED_MPS,
+        zones=zones,
     )
     v4 = Vehicle(
         "vozilo4@localhost",
@@ -165,15 +201,16 @@ def make_vehicles(strategy: str, seed: int):
         strategy=strategy,
         seed=seed,
         speed_mps=VEHICLE_SPEED_MPS,
+        zones=zones,
     )
     return [v1, v2, v3, v4]
 
 
-async def run_one(scenario: str, strategy: str, seed: int, out_csv: str):
+async def run_one(scenario: str, strategy: str, seed: int, out_csv: str, road_shared_graph=None, zones=None):
     vehicles_jids = list(VEHICLE_STARTS.keys())
 
     
-    vehicles = make_vehicles(strategy=strategy, seed=seed)
+    vehicles = make_vehicles(strategy=strategy, seed=seed, zones=zones)
     for v in vehicles:
         await v.start()
 
@@ -186,6 +223,9 @@ async def run_one(scenario: str, strategy: str, seed: int, out_csv: str):
     print(f"graphml={GRAPHML_PATH}")
     print(f"max_tasks={MAX_TASKS} | bid_wait_sec={BID_WAIT_SEC} | csv={out_csv}")
     print(f"vehicle_speed_mps={VEHICLE_SPEED_MPS}")
+    print(f"reach_prune={REACH_PRUNE}")
+    print(f"auction_mode={AUCTION_MODE}" + (f" | window={BATCH_WINDOW_SEC:.1f}s" if AUCTION_MODE == "batch" else ""))
+    print(f"bid_approach={'zones @ %.0f m' % zones.cell_m if zones is not None else 'haversine'}")
     if scenario in SCENARIO_OVERRIDES:
         tp, dr = SCENARIO_OVERRIDES[scenario]
         print(f"override: task_period_sec={tp}, slack_range={dr}")
@@ -205,6 +245,7 @@ async def run_one(scenario: str, strategy: str, seed: int, out_csv: str):
                
                 graphml_path=GRAPHML_PATH,
                 use_road_world=True,
+                road_shared_graph=road_shared_graph,
                
                 vehicle_starts=VEHICLE_STARTS,
             )
@@ -235,11 +276,17 @@ async def main():
     reset_event_log()
     reset_viewer_state()
 
-    for strategy in STRATEGIES:
-        out_csv = OUT_BY_STRATEGY[strategy]
-        for scenario in SCENARIO_NAMES:
-            for seed in SEEDS:
-                await run_one(scenario, strategy, seed, out_csv)
+    shared_world, shared_name = publish_road_graph()
+    zones = build_bid_zones(shared_world)
+    try:
+        for strategy in STRATEGIES:
+            out_csv = OUT_BY_STRATEGY[strategy]
+            for scenario in SCENARIO_NAMES:
+                for seed in SEEDS:
+                    await run_one(scenario, strategy, seed, out_csv, road_shared_graph=shared_name, zones=zones)
+    finally:
+        if shared_world is not None:
+            shared_world.close_shared()
 
     print("\n Gotovo.")
     for strategy, out_csv in OUT_BY_STRATEGY.items():
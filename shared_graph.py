@@ -0,0 +1,124 @@
+# shared_graph.py
+import json
+import struct
+import uuid
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+_HEADER = struct.Struct("<Q")
+_ALIGN = 64
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _open_existing(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Python < 3.13: resource_tracker bi pri izlasku obrisao tuđi blok
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+
+    def _skip_shm(rname, rtype):
+        if rtype != "shared_memory":
+            register(rname, rtype)
+
+    resource_tracker.register = _skip_shm
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedGraph:
+
+    def __init__(self, shm: shared_memory.SharedMemory, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], owner: bool):
+        self.shm = shm
+        self.arrays = arrays
+        self.meta = meta
+        self.owner = bool(owner)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def publish(
+        cls,
+        arrays: Dict[str, np.ndarray],
+        meta: Optional[Dict[str, Any]] = None,
+        name: Optional[str] = None,
+    ) -> "SharedGraph":
+        layout: Dict[str, Any] = {}
+        offset = 0
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            layout[key] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+            offset = _align(offset + arr.nbytes)
+
+        manifest = json.dumps({"meta": meta or {}, "arrays": layout}).encode("utf-8")
+        data_start = _align(_HEADER.size + len(manifest))
+        size = max(1, data_start + offset)
+
+        name = name or f"roadgraph_{uuid.uuid4().hex[:12]}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, len(manifest))
+        shm.buf[_HEADER.size:_HEADER.size + len(manifest)] = manifest
+
+        views: Dict[str, np.ndarray] = {}
+        for key, arr in arrays.items():
+            spec = layout[key]
+            view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, offset=data_start + spec["offset"])
+            view[...] = arr
+            view.flags.writeable = False
+            views[key] = view
+        return cls(shm, views, dict(meta or {}), owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedGraph":
+        shm = _open_existing(name)
+        (mlen,) = _HEADER.unpack_from(shm.buf, 0)
+        manifest = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + mlen]).decode("utf-8"))
+        data_start = _align(_HEADER.size + mlen)
+
+        views: Dict[str, np.ndarray] = {}
+        for key, spec in manifest["arrays"].items():
+            view = np.ndarray(
+                tuple(spec["shape"]),
+                dtype=np.dtype(spec["dtype"]),
+                buffer=shm.buf,
+                offset=data_start + int(spec["offset"]),
+            )
+            view.flags.writeable = False
+            views[key] = view
+        return cls(shm, views, manifest.get("meta", {}), owner=False)
+
+    def close(self) -> None:
+        self.arrays = {}
+        try:
+            self.shm.close()
+        except BufferError:
+            # još postoje pogledi na blok; OS ga oslobađa pri izlasku procesa
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def split_prefixed(arrays: Dict[str, np.ndarray], prefix: str) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    plain: Dict[str, np.ndarray] = {}
+    prefixed: Dict[str, np.ndarray] = {}
+    for key, arr in arrays.items():
+        if key.startswith(prefix):
+            prefixed[key[len(prefix):]] = arr
+        else:
+            plain[key] = arr
+    return plain, prefixed
@@ -0,0 +1,189 @@
+# spatial_index.py
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_R = 6371000.0
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dlat = p2 - p1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_R * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_m: Optional[float] = None):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if lat.shape != lon.shape or lat.ndim != 1 or len(lat) == 0:
+            raise ValueError("GridIndex treba neprazna 1D polja lat/lon iste duljine.")
+
+        # ekvidistantna projekcija oko srednje širine; za jedan grad greška << 1%
+        self.lat0 = float(np.mean(lat))
+        self._kx = EARTH_R * math.cos(math.radians(self.lat0)) * math.pi / 180.0
+        self._ky = EARTH_R * math.pi / 180.0
+        x, y = self.project(lat, lon)
+
+        self.x0 = float(x.min())
+        self.y0 = float(y.min())
+        width = max(float(x.max()) - self.x0, 1.0)
+        height = max(float(y.max()) - self.y0, 1.0)
+        if cell_m is None:
+            cell_m = self._auto_cell_m(x, y, width, height)
+        self.cell_m = max(float(cell_m), 1.0)
+        self.nx = int(width // self.cell_m) + 1
+        self.ny = int(height // self.cell_m) + 1
+
+        cells = self._cell_ids(x, y)
+        self.order = np.argsort(cells, kind="stable").astype(np.int64)
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.cell_start = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+        # koordinate u redoslijedu ćelija: susjedni čvorovi su susjedni i u memoriji
+        self.px = x[self.order]
+        self.py = y[self.order]
+        self._px = memoryview(self.px)
+        self._py = memoryview(self.py)
+        self._start = memoryview(self.cell_start)
+
+    def _auto_cell_m(self, x: np.ndarray, y: np.ndarray, width: float, height: float) -> float:
+        # cilj ~2 čvora po nepraznoj ćeliji; bbox grada uključuje more i prazne zone
+        cell = math.sqrt(width * height / len(x) * 2.0)
+        for _ in range(3):
+            cx = ((x - self.x0) // cell).astype(np.int64)
+            cy = ((y - self.y0) // cell).astype(np.int64)
+            occupied = len(np.unique(cy * (int(width // cell) + 1) + cx))
+            cell *= math.sqrt(2.0 * occupied / len(x))
+        return cell
+
+    def __len__(self) -> int:
+        return int(self.px.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.order.nbytes + self.cell_start.nbytes + self.px.nbytes + self.py.nbytes)
+
+    def project(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        return np.asarray(lon, dtype=np.float64) * self._kx, np.asarray(lat, dtype=np.float64) * self._ky
+
+    def _cell_xy(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cx = np.clip(((x - self.x0) // self.cell_m).astype(np.int64), 0, self.nx - 1)
+        cy = np.clip(((y - self.y0) // self.cell_m).astype(np.int64), 0, self.ny - 1)
+        return cx, cy
+
+    def _cell_ids(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        cx, cy = self._cell_xy(x, y)
+        return cy * self.nx + cx
+
+    def _ring_search(self, x: float, y: float) -> Tuple[int, float]:
+        cx = min(max(int((x - self.x0) // self.cell_m), 0), self.nx - 1)
+        cy = min(max(int((y - self.y0) // self.cell_m), 0), self.ny - 1)
+        px, py, start = self._px, self._py, self._start
+        # udaljenost upita do ruba vlastite ćelije (0 ako je upit izvan mreže)
+        fx = x - (self.x0 + cx * self.cell_m)
+        fy = y - (self.y0 + cy * self.cell_m)
+        edge = max(0.0, min(fx, self.cell_m - fx, fy, self.cell_m - fy))
+        best = -1
+        best_d2 = math.inf
+        r = 0
+        max_r = max(self.nx, self.ny)
+        while r <= max_r:
+            y_lo, y_hi = max(cy - r, 0), min(cy + r, self.ny - 1)
+            for gy in range(y_lo, y_hi + 1):
+                # u unutarnjim redovima prstena samo rubne ćelije
+                if gy == cy - r or gy == cy + r:
+                    xs = range(max(cx - r, 0), min(cx + r, self.nx - 1) + 1)
+                else:
+                    xs = [gx for gx in (cx - r, cx + r) if 0 <= gx < self.nx]
+                row = gy * self.nx
+                for gx in xs:
+                    c = row + gx
+                    for k in range(start[c], start[c + 1]):
+                        dx = px[k] - x
+                        dy = py[k] - y
+                        d2 = dx * dx + dy * dy
+                        if d2 < best_d2:
+                            best_d2 = d2
+                            best = k
+            # čvorovi u prstenu r+1 su barem r * cell_m + edge daleko
+            if best >= 0 and best_d2 <= (r * self.cell_m + edge) ** 2:
+                break
+            r += 1
+        return best, math.sqrt(best_d2)
+
+    def nearest(self, lat: float, lon: float) -> Tuple[int, float]:
+        x = float(lon) * self._kx
+        y = float(lat) * self._ky
+        k, d = self._ring_search(x, y)
+        return int(self.order[k]), d
+
+    def _window_pass(self, qx: np.ndarray, qy: np.ndarray, r: int) -> Tuple[np.ndarray, np.ndarray]:
+        # kandidati iz (2r+1)^2 ćelija oko ćelije upita, sve odjednom
+        q = len(qx)
+        idx = np.full(q, -1, dtype=np.int64)
+        dist = np.full(q, np.inf)
+        cx, cy = self._cell_xy(qx, qy)
+        offs = np.arange(-r, r + 1, dtype=np.int64)
+        w = len(offs)
+        ncx = np.broadcast_to(cx[:, None, None] + offs[None, None, :], (q, w, w))
+        ncy = np.broadcast_to(cy[:, None, None] + offs[None, :, None], (q, w, w))
+        ok = (ncx >= 0) & (ncx < self.nx) & (ncy >= 0) & (ncy < self.ny)
+        qid = np.broadcast_to(np.arange(q)[:, None, None], ok.shape)[ok]
+        cells = (ncy * self.nx + ncx)[ok]
+
+        starts = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return idx, dist
+        cand_q = np.repeat(qid, counts)
+        first = np.cumsum(counts) - counts
+        cand = np.arange(total) - np.repeat(first - starts, counts)
+        d2 = (self.px[cand] - qx[cand_q]) ** 2 + (self.py[cand] - qy[cand_q]) ** 2
+
+        # cand_q je već grupiran po upitu: minimum po grupi bez sortiranja
+        head = np.ones(total, dtype=bool)
+        head[1:] = cand_q[1:] != cand_q[:-1]
+        group_start = np.flatnonzero(head)
+        group_min = np.minimum.reduceat(d2, group_start)
+        is_min = d2 == np.repeat(group_min, np.diff(np.append(group_start, total)))
+        pos = np.flatnonzero(is_min)
+        first = np.ones(len(pos), dtype=bool)
+        first[1:] = cand_q[pos[1:]] != cand_q[pos[:-1]]
+        pos = pos[first]
+        idx[cand_q[pos]] = cand[pos]
+        dist[cand_q[pos]] = np.sqrt(d2[pos])
+        return idx, dist
+
+    def nearest_many(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        qx, qy = self.project(lats, lons)
+        qx = np.atleast_1d(qx)
+        qy = np.atleast_1d(qy)
+        idx = np.full(len(qx), -1, dtype=np.int64)
+        dist = np.full(len(qx), np.inf)
+
+        # prozor se širi samo za neriješene upite; rezultat je točan kad je
+        # najbliži unutar r * cell_m (sve izvan prozora je barem toliko daleko)
+        todo = np.arange(len(qx))
+        r = 1
+        max_r = max(self.nx, self.ny)
+        while len(todo):
+            i, d = self._window_pass(qx[todo], qy[todo], r)
+            done = (i >= 0) & (d <= r * self.cell_m)
+            idx[todo[done]] = i[done]
+            dist[todo[done]] = d[done]
+            todo = todo[~done]
+            if r >= max_r:
+                for t in todo.tolist():
+                    idx[t], dist[t] = self._ring_search(float(qx[t]), float(qy[t]))
+                break
+            r = min(r * 2, max_r)
+
+        return self.order[idx], dist
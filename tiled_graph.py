@@ -0,0 +1,357 @@
+# tiled_graph.py
+import bisect
+import heapq
+import math
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import graph_cache
+from road_graph import RoadGraph, SortedIndex, strongly_connected_components
+from spatial_index import EARTH_R, GridIndex, haversine_m
+
+# tablica se gradi iz cijelog grafa jednom; upiti učitavaju samo pločice koje pretraga dotakne
+INDEX_ENTRY = "index"
+TILE_ARRAYS = (
+    "node_ids", "lat", "lon", "scc", "wcc",
+    "offsets", "targets", "weights", "times",
+    "r_offsets", "r_targets", "r_weights", "r_times",
+)
+# A*: duljina brida iz osmnx-a je zbroj haversine segmenata, uz malu rezervu za zaokruživanje
+_HEURISTIC_SLACK = 0.999
+
+
+def tile_entry_path(entry_path: str, k: int) -> str:
+    return os.path.join(entry_path, f"tile-{k}")
+
+
+def _local_csr(n: int, src: np.ndarray, dst: np.ndarray, w: np.ndarray, t: Optional[np.ndarray]):
+    order = np.argsort(src, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    times = t[order] if t is not None else np.full(len(order), np.nan)
+    return offsets, dst[order].astype(np.int32), w[order].astype(np.float64), times.astype(np.float64)
+
+
+def write_tiles(graph: RoadGraph, entry_path: str, digest: str, tile_m: float) -> Dict[str, Any]:
+    if graph.node_ids.dtype == object or graph.lat is None or graph.lon is None:
+        raise ValueError("Pločice trebaju cjelobrojne id-eve čvorova i koordinate.")
+    grid = GridIndex(graph.lat, graph.lon, cell_m=tile_m)
+    x, y = grid.project(graph.lat, graph.lon)
+    cell = grid._cell_ids(x, y)
+
+    # globalni indeks = redoslijed po pločicama: pločica čvora je bisect po tile_start
+    order = np.argsort(cell, kind="stable")
+    new_idx = np.empty(graph.n, dtype=np.int64)
+    new_idx[order] = np.arange(graph.n, dtype=np.int64)
+    tile_cells, counts = np.unique(cell, return_counts=True)
+    tile_start = np.zeros(len(tile_cells) + 1, dtype=np.int64)
+    np.cumsum(counts, out=tile_start[1:])
+
+    src = new_idx[graph.sources()]
+    dst = new_idx[graph.targets.astype(np.int64)]
+    w = graph.weights
+    t = graph.times
+    src_tile = np.searchsorted(tile_start, src, side="right") - 1
+    dst_tile = np.searchsorted(tile_start, dst, side="right") - 1
+    crossing = src_tile != dst_tile
+    boundary = np.zeros(graph.n, dtype=bool)
+    boundary[src[crossing]] = True
+    boundary[dst[crossing]] = True
+
+    ids = graph.node_ids[order]
+    lat = graph.lat[order]
+    lon = graph.lon[order]
+    # komponente cijelog grafa: nedostižan par se prepoznaje bez pretrage (koja bi učitala sve pločice)
+    scc = strongly_connected_components(graph)
+    wcc = strongly_connected_components(graph.undirected())
+    main_scc = int(np.argmax(np.bincount(scc)))
+    scc = scc[order]
+    wcc = wcc[order]
+    sizes: List[int] = []
+    for k in range(len(tile_cells)):
+        a, b = int(tile_start[k]), int(tile_start[k + 1])
+        out_e = np.flatnonzero(src_tile == k)
+        in_e = np.flatnonzero(dst_tile == k)
+        # izlazni bridovi po izvoru u pločici, ulazni po cilju; susjedi su globalni indeksi
+        fo, ft, fw, fti = _local_csr(b - a, src[out_e] - a, dst[out_e], w[out_e], t[out_e] if t is not None else None)
+        ro, rt, rw, rti = _local_csr(b - a, dst[in_e] - a, src[in_e], w[in_e], t[in_e] if t is not None else None)
+        arrays = {
+            "node_ids": ids[a:b].astype(np.int64), "lat": lat[a:b], "lon": lon[a:b],
+            "scc": scc[a:b], "wcc": wcc[a:b],
+            "offsets": fo, "targets": ft, "weights": fw, "times": fti,
+            "r_offsets": ro, "r_targets": rt, "r_weights": rw, "r_times": rti,
+        }
+        graph_cache.save_arrays(tile_entry_path(entry_path, k), digest, arrays, meta={"tile": k, "n": b - a})
+        sizes.append(int(sum(arr.nbytes for arr in arrays.values())))
+
+    speeds = graph.weights / graph.times if graph.times is not None else np.zeros(1)
+    speeds = speeds[np.isfinite(speeds)]
+    info = {
+        "n": graph.n,
+        "m": graph.m,
+        "tiles": len(tile_cells),
+        "tile_m": float(grid.cell_m),
+        "boundary_nodes": int(boundary.sum()),
+        "crossing_edges": int(crossing.sum()),
+        "max_tile_bytes": max(sizes) if sizes else 0,
+        "max_speed_mps": float(speeds.max()) if len(speeds) else 0.0,
+        "main_scc": main_scc,
+    }
+    id_order = np.argsort(ids, kind="stable")
+    index = {
+        "grid": np.array([grid.lat0, grid.cell_m, grid.x0, grid.y0, grid.nx, grid.ny], dtype=np.float64),
+        "tile_cells": tile_cells.astype(np.int64),
+        "tile_start": tile_start,
+        "id_sorted": ids[id_order].astype(np.int64),
+        "id_order": id_order.astype(np.int64),
+    }
+    # indeks se piše zadnji: unos bez indeksa nije potpun
+    graph_cache.save_arrays(os.path.join(entry_path, INDEX_ENTRY), digest, index, meta=info)
+    return info
+
+
+class _Tile:
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.ids = memoryview(arrays["node_ids"])
+        self.lat = memoryview(arrays["lat"])
+        self.lon = memoryview(arrays["lon"])
+        self.scc = memoryview(arrays["scc"])
+        self.wcc = memoryview(arrays["wcc"])
+        self.adj = {
+            False: (memoryview(arrays["offsets"]), memoryview(arrays["targets"]), memoryview(arrays["weights"]), memoryview(arrays["times"])),
+            True: (memoryview(arrays["r_offsets"]), memoryview(arrays["r_targets"]), memoryview(arrays["r_weights"]), memoryview(arrays["r_times"])),
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(arr.nbytes for arr in self.arrays.values()))
+
+
+class TiledGraph:
+
+    def __init__(self, entry_path: str, digest: str, max_tiles: int = 0, mmap: bool = True):
+        loaded = graph_cache.load_arrays(os.path.join(entry_path, INDEX_ENTRY), digest, mmap=mmap)
+        if loaded is None:
+            raise FileNotFoundError(f"Nema pločica grafa: {entry_path}")
+        index, self.meta = loaded
+        self.entry_path = entry_path
+        self.digest = digest
+        self.max_tiles = int(max_tiles)
+        self.mmap = bool(mmap)
+
+        lat0, cell_m, x0, y0, nx, ny = index["grid"].tolist()
+        self.tile_m = float(cell_m)
+        self._kx = EARTH_R * math.cos(math.radians(lat0)) * math.pi / 180.0
+        self._ky = EARTH_R * math.pi / 180.0
+        self._x0, self._y0 = float(x0), float(y0)
+        self._nx, self._ny = int(nx), int(ny)
+        self.tile_cells = index["tile_cells"]
+        self.tile_start = index["tile_start"]
+        self._cells = memoryview(self.tile_cells)
+        self._start = memoryview(self.tile_start)
+        # id -> globalni indeks preko mmap-anih sortiranih polja (bez dicta za cijeli graf)
+        self.index = SortedIndex(index["id_sorted"], index["id_order"])
+
+        self._tiles: "OrderedDict[int, _Tile]" = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def n(self) -> int:
+        return int(self.tile_start[-1])
+
+    @property
+    def tiles(self) -> int:
+        return int(len(self.tile_cells))
+
+    @property
+    def loaded_tiles(self) -> int:
+        return len(self._tiles)
+
+    @property
+    def loaded_nbytes(self) -> int:
+        return int(sum(tile.nbytes for tile in self._tiles.values()))
+
+    def tile_size(self, k: int) -> int:
+        return self._start[k + 1] - self._start[k]
+
+    def tile_of(self, g: int) -> int:
+        return bisect.bisect_right(self._start, g) - 1
+
+    def _tile(self, k: int) -> _Tile:
+        tile = self._tiles.get(k)
+        if tile is not None:
+            self._tiles.move_to_end(k)
+            return tile
+        loaded = graph_cache.load_arrays(tile_entry_path(self.entry_path, k), self.digest, mmap=self.mmap)
+        if loaded is None:
+            raise FileNotFoundError(f"Nedostaje pločica {k}: {self.entry_path}")
+        tile = _Tile(loaded[0])
+        self._tiles[k] = tile
+        self.loads += 1
+        if self.max_tiles > 0:
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+                self.evictions += 1
+        return tile
+
+    def node_id(self, g: int) -> int:
+        k = self.tile_of(g)
+        return self._tile(k).ids[g - self._start[k]]
+
+    def components(self, g: int) -> Tuple[int, int]:
+        k = self.tile_of(g)
+        tile = self._tile(k)
+        i = g - self._start[k]
+        return tile.scc[i], tile.wcc[i]
+
+    def latlon(self, g: int) -> Tuple[float, float]:
+        k = self.tile_of(g)
+        tile = self._tile(k)
+        i = g - self._start[k]
+        return tile.lat[i], tile.lon[i]
+
+    def tiles_in_bbox(self, lat_min: float, lon_min: float, lat_max: float, lon_max: float) -> List[int]:
+        cx0, cy0 = self._cell_xy(lat_min, lon_min)
+        cx1, cy1 = self._cell_xy(lat_max, lon_max)
+        cells = [cy * self._nx + cx for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+        return [k for k in (self._tile_at_cell(c) for c in cells) if k is not None]
+
+    def _cell_xy(self, lat: float, lon: float) -> Tuple[int, int]:
+        cx = min(max(int((float(lon) * self._kx - self._x0) // self.tile_m), 0), self._nx - 1)
+        cy = min(max(int((float(lat) * self._ky - self._y0) // self.tile_m), 0), self._ny - 1)
+        return cx, cy
+
+    def _tile_at_cell(self, cell: int) -> Optional[int]:
+        k = bisect.bisect_left(self._cells, cell)
+        if k < len(self._cells) and self._cells[k] == cell:
+            return k
+        return None
+
+    def nearest(self, lat: float, lon: float) -> Tuple[int, float]:
+        # prsteni pločica oko upita; prsten r pokriva sve točke bliže od r * tile_m
+        cx, cy = self._cell_xy(lat, lon)
+        best, best_d = -1, math.inf
+        for r in range(max(self._nx, self._ny)):
+            if best >= 0 and best_d <= (r - 1) * self.tile_m:
+                break
+            for yy in range(cy - r, cy + r + 1):
+                for xx in range(cx - r, cx + r + 1):
+                    if max(abs(yy - cy), abs(xx - cx)) != r or not (0 <= xx < self._nx and 0 <= yy < self._ny):
+                        continue
+                    k = self._tile_at_cell(yy * self._nx + xx)
+                    if k is None:
+                        continue
+                    tile = self._tile(k)
+                    for i in range(self.tile_size(k)):
+                        d = haversine_m(lat, lon, tile.lat[i], tile.lon[i])
+                        if d < best_d:
+                            best, best_d = self._start[k] + i, d
+        return best, best_d
+
+    def astar(
+        self,
+        s: int,
+        t: int,
+        weight: str = "length",
+        undirected: bool = False,
+    ) -> Tuple[float, List[int]]:
+        # A* preko pločica: pločica se učitava kad se prvi put dotakne neki njen čvor
+        w_col = 2 if weight == "length" else 3
+        if weight not in ("length", "time"):
+            raise ValueError(f"Nepoznata težina: {weight}")
+        speed = float(self.meta.get("max_speed_mps") or 0.0)
+        if weight == "length":
+            scale = _HEURISTIC_SLACK
+        elif speed > 0:
+            scale = _HEURISTIC_SLACK / speed
+        else:
+            scale = 0.0
+        t_lat, t_lon = self.latlon(t)
+        directions = (False, True) if undirected else (False,)
+
+        dist: Dict[int, float] = {s: 0.0}
+        parent: Dict[int, int] = {s: -1}
+        done = set()
+        heap = [(0.0, s)]
+        while heap:
+            _, x = heapq.heappop(heap)
+            if x in done:
+                continue
+            done.add(x)
+            if x == t:
+                break
+            d = dist[x]
+            k = self.tile_of(x)
+            tile = self._tile(k)
+            i = x - self._start[k]
+            for rev in directions:
+                cols = tile.adj[rev]
+                off, tgt, wt = cols[0], cols[1], cols[w_col]
+                for e in range(off[i], off[i + 1]):
+                    y = tgt[e]
+                    nd = d + wt[e]
+                    if nd < dist.get(y, math.inf):
+                        dist[y] = nd
+                        parent[y] = x
+                        h = 0.0
+                        if scale > 0.0:
+                            ky = self.tile_of(y)
+                            ty = self._tile(ky)
+                            j = y - self._start[ky]
+                            h = haversine_m(ty.lat[j], ty.lon[j], t_lat, t_lon) * scale
+                        heapq.heappush(heap, (nd + h, y))
+
+        if t not in done:
+            return math.inf, []
+        path = [t]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return dist[t], path
+
+    def path_totals(self, path: List[int], undirected: bool = False, weight: str = "length") -> Tuple[float, float]:
+        # (duljina, vrijeme) duž puta; kod paralelnih bridova uzima se najlakši po težini pretrage
+        by_time = weight == "time"
+        length = 0.0
+        duration = 0.0
+        for a, b in zip(path, path[1:]):
+            k = self.tile_of(a)
+            tile = self._tile(k)
+            i = a - self._start[k]
+            best = None
+            for rev in ((False, True) if undirected else (False,)):
+                off, tgt, wt, tt = tile.adj[rev]
+                for e in range(off[i], off[i + 1]):
+                    if tgt[e] != b:
+                        continue
+                    cand = (wt[e], tt[e])
+                    if best is None or cand[by_time] < best[by_time]:
+                        best = cand
+            if best is None:
+                raise KeyError((a, b))
+            length += best[0]
+            duration += best[1]
+        return length, duration
+
+
+def main(argv: List[str]) -> None:
+    from world import RoadWorld, ROAD_TILE_M
+
+    if len(argv) < 2:
+        print("Upotreba: python tiled_graph.py <graphml> [tile_m]")
+        return
+    tile_m = float(argv[2]) if len(argv) > 2 else ROAD_TILE_M
+    world = RoadWorld(argv[1], engine="dijkstra", path_store=False)
+    path, info = world.write_tiles(tile_m)
+    print(f"[TILES] {path}: {info}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,78 @@
+# travel_time.py
+import ast
+import re
+from typing import Any, List, Optional
+
+# zadane brzine (km/h) po OSM highway tipu kad maxspeed nije zadan; gradska vožnja
+HIGHWAY_SPEED_KPH = {
+    "motorway": 110.0,
+    "motorway_link": 60.0,
+    "trunk": 80.0,
+    "trunk_link": 40.0,
+    "primary": 50.0,
+    "primary_link": 40.0,
+    "secondary": 50.0,
+    "secondary_link": 40.0,
+    "tertiary": 40.0,
+    "tertiary_link": 30.0,
+    "unclassified": 40.0,
+    "residential": 30.0,
+    "living_street": 10.0,
+    "service": 15.0,
+    "road": 30.0,
+}
+DEFAULT_SPEED_KPH = 30.0
+MIN_SPEED_KPH = 5.0
+
+_NUMBER = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(mph|km/h|kmh|kph)?\s*$", re.IGNORECASE)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    s = str(value).strip()
+    # GraphML bez osmnx parsiranja sprema liste kao "['50', '60']"
+    if s.startswith("[") and s.endswith("]"):
+        try:
+            parsed = ast.literal_eval(s)
+            if isinstance(parsed, (list, tuple)):
+                return list(parsed)
+        except Exception:
+            pass
+    return [s]
+
+
+def parse_maxspeed(value: Any) -> Optional[float]:
+    speeds: List[float] = []
+    for item in _as_list(value):
+        m = _NUMBER.match(str(item))
+        if not m:
+            continue
+        kph = float(m.group(1))
+        if (m.group(2) or "").lower() == "mph":
+            kph *= 1.609344
+        if kph > 0:
+            speeds.append(kph)
+    if not speeds:
+        return None
+    return sum(speeds) / len(speeds)
+
+
+def highway_speed_kph(highway: Any) -> float:
+    speeds = [HIGHWAY_SPEED_KPH[h] for h in map(str, _as_list(highway)) if h in HIGHWAY_SPEED_KPH]
+    if not speeds:
+        return DEFAULT_SPEED_KPH
+    return sum(speeds) / len(speeds)
+
+
+def edge_speed_kph(highway: Any, maxspeed: Any) -> float:
+    kph = parse_maxspeed(maxspeed)
+    if kph is None:
+        kph = highway_speed_kph(highway)
+    return max(MIN_SPEED_KPH, kph)
+
+
+def edge_time_s(length_m: float, highway: Any, maxspeed: Any) -> float:
+    return max(0.0, float(length_m)) / (edge_speed_kph(highway, maxspeed) / 3.6)
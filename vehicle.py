@@ -13,6 +13,7 @@ from spade.message import Message
 from spade.template import Template
 
 from logger import log_event
+from polyline import route_from_task
 
 try:
     from state_store import update_vehicle
@@ -30,6 +31,15 @@ VIEWER_EVERY_N = int(os.getenv("VIEWER_EVERY_N", "4"))
 
 ANIMATE_PICKUP_SEC = float(os.getenv("ANIMATE_PICKUP_SEC", "2.5"))
 
+# ROUTE_ETA=1: vrijeme vožnje rute iz highway/maxspeed (task["duration_s"]) umjesto distance / speed_mps;
+# isključeno po defaultu da VEHICLE_SPEED_MPS i dalje određuje vožnju i rezultati ostanu usporedivi
+ROUTE_ETA = os.getenv("ROUTE_ETA", "0") == "1"
+
+# marginal: NO_BID bez izračuna ponude kad ni najbrže moguće izvršenje ne stiže do deadline_ts
+REACH_PRUNE = os.getenv("REACH_PRUNE", "0") == "1"
+# početak rute je zaokruženi (polyline) čvor preuzimanja
+REACH_SLACK_M = 2.0
+
 
 def haversine_m(lat1, lon1, lat2, lon2) -> float:
     import math
@@ -42,6 +52,18 @@ def haversine_m(lat1, lon1, lat2, lon2) -> float:
     return 2 * R * math.asin(min(1.0, math.sqrt(a)))
 
 
+def task_route_sec(task: Dict[str, Any]) -> Optional[float]:
+    if not ROUTE_ETA:
+        return None
+    try:
+        sec = float(task.get("duration_s"))
+    except (TypeError, ValueError):
+        return None
+    if sec != sec or sec <= 0.0 or sec == float("inf"):
+        return None
+    return sec
+
+
 def lerp(a: float, b: float, t: float) -> float:
     return a + (b - a) * t
 
@@ -122,6 +144,7 @@ class Vehicle(Agent):
         service_range: Tuple[float, float] = (1.0, 3.0),
         lateness_weight: float = 5.0,
         queue_penalty_weight: float = 1.0,
+        zones=None,
     ):
         super().__init__(jid, password)
 
@@ -140,25 +163,153 @@ class Vehicle(Agent):
 
         self.lateness_weight = float(lateness_weight)
         self.queue_penalty_weight = float(queue_penalty_weight)
+        # ZoneTable (zone_table.py): O(1) cestovna procjena prilaza umjesto zračne linije
+        self.zones = zones
 
         self.busy = False
         self.busy_until = 0.0
         self.task_queue: asyncio.Queue = asyncio.Queue()
 
+        # donje granice trajanja dodijeljenih, još nepokrenutih zadataka i položaj nakon zadnjeg od njih
+        self.pending_min_sec: Dict[str, float] = {}
+        self.free_pos: Optional[List[float]] = list(start_pos)
+
+    def approach_m(self, lat: float, lon: float) -> float:
+        if self.zones is not None:
+            return self.zones.estimate_m(float(self.pos[0]), float(self.pos[1]), lat, lon)
+        return haversine_m(float(self.pos[0]), float(self.pos[1]), lat, lon)
+
+    def min_task_sec(self, task: Dict[str, Any], from_pos) -> float:
+        # najpovoljniji promet i servis iz raspona koje koristi Worker; prilaz je zračna linija kao u Workeru
+        traffic = self.traffic_range[0]
+        speed = max(0.001, self.speed_mps)
+        approach_sec = 0.0
+        pickup = task.get("pickup_latlon")
+        if from_pos is not None and isinstance(pickup, (list, tuple)) and len(pickup) == 2:
+            approach_m = haversine_m(float(from_pos[0]), float(from_pos[1]), float(pickup[0]), float(pickup[1]))
+            approach_sec = max(0.0, approach_m - REACH_SLACK_M) / speed * traffic
+        job_sec = task_route_sec(task)
+        if job_sec is not None:
+            job_sec = job_sec * traffic
+        else:
+            job_sec = max(0.0, float(task.get("distance_m", 0.0))) / speed * traffic
+        return approach_sec + job_sec + self.service_range[0]
+
+    def earliest_finish_ts(self, task: Dict[str, Any], now: float) -> float:
+        # O(1) donja granica završetka: trenutni zadatak, zatim red (FIFO), zatim novi zadatak
+        idle = not self.busy and not self.pending_min_sec
+        start_pos = self.pos if idle else self.free_pos
+        available_at = max(now, float(self.busy_until)) if self.busy else now
+        return available_at + sum(self.pending_min_sec.values()) + self.min_task_sec(task, start_pos)
+
+    def task_awarded(self, task: Dict[str, Any]) -> None:
+        idle = not self.busy and not self.pending_min_sec
+        task_id = str(task.get("task_id", ""))
+        self.pending_min_sec[task_id] = self.min_task_sec(task, self.pos if idle else self.free_pos)
+        # Worker završava na zadnjoj točki rute; bez rute položaj nakon zadatka nije poznat
+        route = route_from_task(task)
+        dropoff = task.get("dropoff_latlon")
+        if route:
+            self.free_pos = [float(route[-1][0]), float(route[-1][1])]
+        elif isinstance(dropoff, (list, tuple)) and len(dropoff) == 2:
+            self.free_pos = [float(dropoff[0]), float(dropoff[1])]
+        else:
+            self.free_pos = None
+
     def active_load(self) -> int:
         return (1 if self.busy else 0) + self.task_queue.qsize()
 
-    def expected_job_sec(self, distance_m: float) -> float:
+    def expected_job_sec(self, distance_m: float, route_sec: float = 0.0) -> float:
         expected_traffic = (self.traffic_range[0] + self.traffic_range[1]) / 2.0
         expected_service = (self.service_range[0] + self.service_range[1]) / 2.0
-        move_sec = (distance_m / max(0.001, self.speed_mps)) * expected_traffic
+        move_sec = (distance_m / max(0.001, self.speed_mps) + route_sec) * expected_traffic
         return move_sec + expected_service
 
+    def task_bid(self, task: Dict[str, Any], now: float) -> Optional[float]:
+        # None = NO_BID (pun kapacitet ili dokazivo nedostižan rok)
+        task_id = str(task.get("task_id", ""))
+        deadline_ts = float(task.get("deadline_ts", now))
+
+        load_now = self.active_load()
+        if load_now >= self.capacity:
+            print(f"[{self.jid}] NO_BID for {task_id} (load={load_now}/{self.capacity})")
+            log_event("NO_BID", task_id=task_id, vehicle=str(self.jid))
+            return None
+
+        if REACH_PRUNE and self.strategy == "marginal" and "deadline_ts" in task:
+            earliest = self.earliest_finish_ts(task, now)
+            if earliest > deadline_ts:
+                print(
+                    f"[{self.jid}] NO_BID for {task_id} (unreachable: earliest finish "
+                    f"{earliest - deadline_ts:.1f}s after deadline)"
+                )
+                log_event("NO_BID", task_id=task_id, vehicle=str(self.jid), status="UNREACHABLE")
+                return None
+
+        job_distance_m = float(task.get("distance_m", 0.0))
+
+        pickup_latlon = task.get("pickup_latlon")
+        dropoff_latlon = task.get("dropoff_latlon")
+
+        approach_m = 0.0
+        if isinstance(pickup_latlon, (list, tuple)) and len(pickup_latlon) == 2:
+            try:
+                approach_m = self.approach_m(float(pickup_latlon[0]), float(pickup_latlon[1]))
+            except Exception:
+                approach_m = 0.0
+
+        if (job_distance_m <= 0.0) and isinstance(pickup_latlon, (list, tuple)) and isinstance(dropoff_latlon, (list, tuple)):
+            if len(pickup_latlon) == 2 and len(dropoff_latlon) == 2:
+                try:
+                    job_distance_m = haversine_m(
+                        float(pickup_latlon[0]), float(pickup_latlon[1]),
+                        float(dropoff_latlon[0]), float(dropoff_latlon[1]),
+                    )
+                except Exception:
+                    job_distance_m = 0.0
+
+        total_trip_m = max(0.0, approach_m) + max(0.0, job_distance_m)
+
+        noise = self.rng.random()
+
+        if self.strategy == "nearest":
+            bid = total_trip_m + noise
+        elif self.strategy == "marginal":
+            available_at = max(now, float(self.busy_until))
+            queued = int(self.task_queue.qsize())
+
+            job_sec = task_route_sec(task)
+            if job_sec is not None:
+                expected_one_job = self.expected_job_sec(max(0.0, approach_m), job_sec)
+            else:
+                expected_one_job = self.expected_job_sec(total_trip_m)
+            queue_wait = queued * expected_one_job
+
+            eta_finish = available_at + queue_wait + expected_one_job
+            lateness = max(0.0, eta_finish - deadline_ts)
+
+            bid = (
+                total_trip_m
+                + (self.lateness_weight * lateness)
+                + (self.queue_penalty_weight * queued)
+                + noise
+            )
+        else:
+            bid = total_trip_m + noise
+
+        print(
+            f"[{self.jid}] ({self.strategy}) Bid for {task_id}: {bid:.2f} "
+            f"(approach={approach_m:.0f}m, job={job_distance_m:.0f}m, load={load_now}/{self.capacity})"
+        )
+        log_event("BID", task_id=task_id, vehicle=str(self.jid), bid=bid)
+
+        return bid
+
     def _make_bid_msg(self, to_jid: str, task_id: str, bid: Optional[float] = None, no_bid: bool = False) -> Message:
         reply = Message(to=to_jid)
         reply.set_metadata("ontology", ONTOLOGY)
         reply.set_metadata("intent", "bid")
-        payload: Dict[str, Any] = {"task_id": task_id}
+        payload: Dict[str, Any] = {"task_id": task_id, "capacity": self.capacity}
         if no_bid:
             payload["no_bid"] = True
         else:
@@ -182,80 +333,36 @@ class Vehicle(Agent):
                 if not task_id:
                     return
 
-                deadline_ts = float(task.get("deadline_ts", time.time()))
-                now = time.time()
-
-                load_now = self.agent.active_load()
-                if load_now >= self.agent.capacity:
-                    print(f"[{self.agent.jid}] NO_BID for {task_id} (load={load_now}/{self.agent.capacity})")
-                    log_event("NO_BID", task_id=task_id, vehicle=str(self.agent.jid))
-                    reply = self.agent._make_bid_msg(str(msg.sender), task_id, no_bid=True)
-                    await self.send(reply)  
-                    return
-
-                job_distance_m = float(task.get("distance_m", 0.0))
-
-                pickup_latlon = task.get("pickup_latlon")
-                dropoff_latlon = task.get("dropoff_latlon")
-
-                approach_m = 0.0
-                if isinstance(pickup_latlon, (list, tuple)) and len(pickup_latlon) == 2:
-                    try:
-                        approach_m = haversine_m(
-                            float(self.agent.pos[0]), float(self.agent.pos[1]),
-                            float(pickup_latlon[0]), float(pickup_latlon[1]),
-                        )
-                    except Exception:
-                        approach_m = 0.0
-
-                if (job_distance_m <= 0.0) and isinstance(pickup_latlon, (list, tuple)) and isinstance(dropoff_latlon, (list, tuple)):
-                    if len(pickup_latlon) == 2 and len(dropoff_latlon) == 2:
-                        try:
-                            job_distance_m = haversine_m(
-                                float(pickup_latlon[0]), float(pickup_latlon[1]),
-                                float(dropoff_latlon[0]), float(dropoff_latlon[1]),
-                            )
-                        except Exception:
-                            job_distance_m = 0.0
-
-                total_trip_m = max(0.0, approach_m) + max(0.0, job_distance_m)
-
-                noise = self.agent.rng.random()
-
-                if self.agent.strategy == "nearest":
-                    bid = total_trip_m + noise
-                elif self.agent.strategy == "marginal":
-                    available_at = max(now, float(self.agent.busy_until))
-                    queued = int(self.agent.task_queue.qsize())
-
-                    expected_one_job = self.agent.expected_job_sec(total_trip_m)
-                    queue_wait = queued * expected_one_job
-
-                    eta_finish = available_at + queue_wait + expected_one_job
-                    lateness = max(0.0, eta_finish - deadline_ts)
-
-                    bid = (
-                        total_trip_m
-                        + (self.agent.lateness_weight * lateness)
-                        + (self.agent.queue_penalty_weight * queued)
-                        + noise
-                    )
-                else:
-                    bid = total_trip_m + noise
-
-                print(
-                    f"[{self.agent.jid}] ({self.agent.strategy}) Bid for {task_id}: {bid:.2f} "
-                    f"(approach={approach_m:.0f}m, job={job_distance_m:.0f}m, load={load_now}/{self.agent.capacity})"
-                )
-                log_event("BID", task_id=task_id, vehicle=str(self.agent.jid), bid=bid)
-
-                reply = self.agent._make_bid_msg(str(msg.sender), task_id, bid=bid, no_bid=False)
+                bid = self.agent.task_bid(task, time.time())
+                reply = self.agent._make_bid_msg(str(msg.sender), task_id, bid=bid, no_bid=bid is None)
                 await self.send(reply)  
 
+            elif intent == "announce_batch":
+                # skupna dodjela: jedan odgovor s ponudama za sve zadatke prozora i brojem slobodnih mjesta
+                data = json.loads(msg.body)
+                now = time.time()
+                bids: Dict[str, Optional[float]] = {}
+                for task in data.get("tasks", []):
+                    task_id = str(task.get("task_id", ""))
+                    if task_id:
+                        bids[task_id] = self.agent.task_bid(task, now)
+
+                reply = Message(to=str(msg.sender))
+                reply.set_metadata("ontology", ONTOLOGY)
+                reply.set_metadata("intent", "batch_bid")
+                reply.body = json.dumps({
+                    "batch_id": data.get("batch_id"),
+                    "free": max(0, self.agent.capacity - self.agent.active_load()),
+                    "capacity": self.agent.capacity,
+                    "bids": bids,
+                })
+                await self.send(reply)
+
             elif intent == "award":
                 task = json.loads(msg.body)
                 task_id = str(task.get("task_id", ""))
 
+                self.agent.task_awarded(task)
                 await self.agent.task_queue.put(task)
 
                 print(f"[{self.agent.jid}]  WON {task_id} -> queued (q={self.agent.task_queue.qsize()})")
@@ -265,7 +372,8 @@ class Vehicle(Agent):
 
             elif intent == "reject":
                 data = json.loads(msg.body)
-                print(f"[{self.agent.jid}]  Lost {data.get('task_id')}")
+                lost = data.get("task_ids") or [data.get("task_id")]
+                print(f"[{self.agent.jid}]  Lost {', '.join(str(t) for t in lost)}")
 
     class Worker(CyclicBehaviour):
         async def run(self):
@@ -278,9 +386,10 @@ class Vehicle(Agent):
 
             task = await self.agent.task_queue.get()
             task_id = str(task.get("task_id", ""))
+            self.agent.pending_min_sec.pop(task_id, None)
             deadline_ts = float(task.get("deadline_ts", time.time()))
 
-            route = task.get("route_latlon") or []
+            route = route_from_task(task)
             job_distance_m = float(task.get("distance_m", 0.0))  
 
             pickup_latlon = task.get("pickup_latlon")
@@ -328,7 +437,11 @@ class Vehicle(Agent):
             approach_m = haversine_m(current[0], current[1], pickup[0], pickup[1])
             approach_time_sec = approach_m / max(0.001, effective_speed)
 
-            job_move_time_sec = float(job_distance_m) / max(0.001, effective_speed)
+            job_sec = task_route_sec(task)
+            if job_sec is not None:
+                job_move_time_sec = job_sec * traffic_factor
+            else:
+                job_move_time_sec = float(job_distance_m) / max(0.001, effective_speed)
 
             total_expected = approach_time_sec + job_move_time_sec + service_time
 
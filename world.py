@@ -1,61 +1,395 @@
 # world.py
+import bisect
+import multiprocessing as mp
 import os
 import random
 import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple, Optional
 
-import networkx as nx
+import numpy as np
 
+import graph_cache
+from alt import LandmarkOracle
+from ch import ContractionHierarchy
+from graphml_loader import load_road_graph
+from graph_prep import ChainGeometry, parse_steps, preprocess as preprocess_graph
+from path_cache import PathCache
+from path_store import PathStore, store_path
+from road_graph import (
+    RoadGraph,
+    multi_target,
+    path_edges,
+    shortest_path,
+    strongly_connected_components,
+    unique_nbytes,
+)
+from shared_graph import SharedGraph, split_prefixed
+from spatial_index import GridIndex
+from tiled_graph import TiledGraph, write_tiles
+from travel_time import edge_time_s
+from zone_table import ZoneTable
 
-try:
-    import osmnx as ox
-except Exception:
-    ox = None
 
+ROAD_ENGINE = os.getenv("ROAD_ENGINE", "dijkstra")
+ROAD_ENGINES = ("dijkstra", "ch", "alt")
+# težina brida: duljina (m) ili vrijeme prolaska (s) iz highway/maxspeed
+ROAD_WEIGHTS = ("length", "time")
+ROAD_LANDMARKS = int(os.getenv("ROAD_LANDMARKS", "16"))
+GRAPH_CACHE = os.getenv("GRAPH_CACHE", "1") == "1"
+GRAPH_MMAP = os.getenv("GRAPH_MMAP", "0") == "1"
+ROAD_SHARED_GRAPH = os.getenv("ROAD_SHARED_GRAPH") or None
+# LRU cache ruta: broj unosa (0 = isključen) i opcionalni limit u bajtovima
+ROAD_CACHE_SIZE = int(os.getenv("ROAD_CACHE_SIZE", "4096"))
+ROAD_CACHE_BYTES = int(os.getenv("ROAD_CACHE_BYTES", "0"))
+# trajni (SQLite) cache ruta uz graph cache; dijele ga uzastopna pokretanja i paralelni procesi.
+# Isključen po defaultu: upis je sinkron (blokira event loop agenta) i baza nema limit veličine.
+ROAD_PATH_STORE = os.getenv("ROAD_PATH_STORE", "0") == "1"
+# veličina ćelije (m) za tablicu udaljenosti zona-zona
+ROAD_ZONE_M = float(os.getenv("ROAD_ZONE_M", "400"))
+# predobrada grafa pri izgradnji: "scc" (najveća jaka komponenta), "contract" (sažimanje lanaca)
+ROAD_PREPROCESS = os.getenv("ROAD_PREPROCESS", "")
+# čitanje GraphML-a: "light" (graphml_loader, bez osmnx) ili "osmnx" (preko MultiDiGraph-a)
+GRAPHML_LOADER = os.getenv("GRAPHML_LOADER", "light")
+# graf u prostornim pločicama (TiledWorld): veličina pločice (m) i najviše učitanih pločica (0 = bez limita)
+ROAD_TILES = os.getenv("ROAD_TILES", "0") == "1"
+ROAD_TILE_M = float(os.getenv("ROAD_TILE_M", "2000"))
+ROAD_MAX_TILES = int(os.getenv("ROAD_MAX_TILES", "0"))
+# procesi za dist_matrix_parallel (0 = broj jezgri)
+ROAD_MATRIX_WORKERS = int(os.getenv("ROAD_MATRIX_WORKERS", "0"))
 
-class RoadWorld:
 
-    def __init__(self, graphml_path: str, seed: int = 1, max_sample_tries: int = 80):
-        if ox is None:
-            raise ImportError("osmnx nije instaliran. Instaliraj: pip install osmnx")
+def load_osmnx():
+    # osmnx povlači geopandas, shapely i pandas: uvozi se tek za export ili izgradnju grafa
+    try:
+        import osmnx as ox
+    except Exception as e:
+        raise ImportError("osmnx nije instaliran. Instaliraj: pip install osmnx") from e
+    return ox
 
-        if not os.path.exists(graphml_path):
-            raise FileNotFoundError(f"Ne mogu naći graphml: {graphml_path}")
 
-        self.graphml_path = graphml_path
+def tiles_entry_path(
+    graphml_path: str,
+    digest: str,
+    tile_m: float,
+    cache_dir: Optional[str] = None,
+    preprocess: Tuple[str, ...] = (),
+) -> str:
+    variant = "-".join(["tiles", f"{float(tile_m):g}"] + list(preprocess))
+    return graph_cache.cache_entry_path(graphml_path, digest, cache_dir, variant=variant)
+
+
+@dataclass
+class Route:
+    distance_m: float
+    nodes: List[Any]
+    # (N, 2) float64 [lat, lon]; u listu tek za JSON
+    latlon: np.ndarray
+    duration_s: float = math.inf
+
+    @property
+    def found(self) -> bool:
+        return math.isfinite(self.distance_m) and bool(self.nodes)
+
+    def latlon_list(self) -> List[List[float]]:
+        return self.latlon.tolist()
+
+
+@dataclass
+class ComponentPairs:
+    # čvorovi grupirani po komponenti; uzorkuju se samo komponente s >= 2 čvora
+    members: np.ndarray
+    starts: List[int]
+    sizes: List[int]
+    cum_pairs: List[int]
+
+    @classmethod
+    def from_labels(cls, labels: np.ndarray) -> Optional["ComponentPairs"]:
+        order = np.argsort(labels, kind="stable")
+        sizes_all = np.bincount(labels)
+        starts_all = np.zeros(len(sizes_all), dtype=np.int64)
+        np.cumsum(sizes_all[:-1], out=starts_all[1:])
+        keep = np.nonzero(sizes_all >= 2)[0]
+        if len(keep) == 0:
+            return None
+        sizes = sizes_all[keep]
+        pairs = sizes * (sizes - 1)
+        return cls(order, starts_all[keep].tolist(), sizes.tolist(), np.cumsum(pairs).tolist())
+
+    @property
+    def total(self) -> int:
+        return self.cum_pairs[-1]
+
+    def draw(self, rng: random.Random) -> Tuple[int, int]:
+        # uniformno po uređenim parovima (u != v) unutar iste komponente
+        r = rng.randrange(self.total)
+        k = bisect.bisect_right(self.cum_pairs, r)
+        if k:
+            r -= self.cum_pairs[k - 1]
+        a, b = divmod(r, self.sizes[k] - 1)
+        if b >= a:
+            b += 1
+        base = self.starts[k]
+        return int(self.members[base + a]), int(self.members[base + b])
+
+
+class RoadWorld:
+
+    def __init__(
+        self,
+        graphml_path: str,
+        seed: int = 1,
+        max_sample_tries: int = 80,
+        engine: str = ROAD_ENGINE,
+        num_landmarks: int = ROAD_LANDMARKS,
+        use_cache: bool = GRAPH_CACHE,
+        cache_dir: Optional[str] = None,
+        mmap: bool = GRAPH_MMAP,
+        shared_name: Optional[str] = ROAD_SHARED_GRAPH,
+        cache_size: int = ROAD_CACHE_SIZE,
+        cache_bytes: int = ROAD_CACHE_BYTES,
+        preprocess: str = ROAD_PREPROCESS,
+        path_store: bool = ROAD_PATH_STORE,
+    ):
         self.seed = int(seed)
         self.rng = random.Random(self.seed)
         self.max_sample_tries = int(max_sample_tries)
 
-        
-        self.G = ox.load_graphml(graphml_path)
+        self.engine = str(engine)
+        if self.engine not in ROAD_ENGINES:
+            raise ValueError(f"Nepoznat engine: {self.engine} (dozvoljeno: {', '.join(ROAD_ENGINES)})")
+        self.num_landmarks = int(num_landmarks)
+        self.preprocess = parse_steps(preprocess)
+        self.chains: Optional[ChainGeometry] = None
 
-        
-        self._normalize_node_ids_to_int_if_possible()
+        # osmnx MultiDiGraph se učitava tek kad zatreba (export)
+        self._G = None
+        self._G_undirected = None
+
+        self.use_cache = bool(use_cache)
+        self.cache_dir = cache_dir
+        self.mmap = bool(mmap)
+        self._shared: Optional[SharedGraph] = None
+        self._published: List[SharedGraph] = []
+        # neusmjereni CSR se gradi tek na prvi fallback upit
+        self._graph_undirected: Optional[RoadGraph] = None
+
+        rebuilt = False
+        if shared_name:
+            # read-only pogled na graf koji je drugi proces objavio u dijeljenoj memoriji
+            self._shared = SharedGraph.attach(shared_name)
+            meta = self._shared.meta
+            self.graphml_path = graphml_path or str(meta.get("graphml_path", ""))
+            self.graph_hash = str(meta.get("source_sha256", ""))
+            self.cache_path = ""
+            self.preprocess = parse_steps(meta.get("preprocess", ""))
+            self.graph, self._graph_undirected, self.chains = self._graphs_from_arrays(self._shared.arrays)
+        else:
+            if not os.path.exists(graphml_path):
+                raise FileNotFoundError(f"Ne mogu naći graphml: {graphml_path}")
+
+            self.graphml_path = graphml_path
+            self.graph_hash = graph_cache.file_hash(graphml_path)
+            self.cache_path = graph_cache.cache_entry_path(
+                graphml_path, self.graph_hash, cache_dir, variant="-".join(self.preprocess)
+            )
+
+            # CSR graf za sve upite; MultiDiGraph ostaje samo za export
+            loaded = self._load_cached_graph() if self.use_cache else None
+            rebuilt = loaded is None
+            if loaded is None:
+                graph = self._build_graph()
+                chains = None
+                if self.preprocess:
+                    graph, chains, info = preprocess_graph(graph, self.preprocess)
+                    print(f"[WORLD] Preprocess {'+'.join(self.preprocess)}: {info}")
+                loaded = (graph, chains)
+                if self.use_cache:
+                    self._save_cached_graph(*loaded)
+            self.graph, self.chains = loaded
+
+        self.nodes = self.graph.node_list()
+        if not self.nodes:
+            raise RuntimeError("Graf nema čvorova (nodes=0).")
+
+        self.node_index = self.graph.index
+
+        # koordinate čvorova kao jedno (n, 2) polje; ruta je jedan gather po indeksima
+        self.coords = np.column_stack([self.graph.lat, self.graph.lon]).astype(np.float64)
+
+        # promet uživo: vlastita (zapisiva) vremena bridova, stvaraju se na prvo ažuriranje
+        self._free_times: Optional[np.ndarray] = None
+        self._alt_floor: Optional[np.ndarray] = None
+        self._rev_pos: Optional[np.ndarray] = None
+        self._edge_src: Optional[np.ndarray] = None
+        self._undirected_pos: Optional[np.ndarray] = None
+        self._edge_keys: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._ch_stale: set = set()
+
+        # isti CSR s vremenima kao težinama; gradi se na prvi vremenski upit
+        self._time_graphs: Dict[bool, RoadGraph] = {}
+
+        # CH se gradi jednom; neusmjerena hijerarhija tek kad zatreba fallback
+        self._ch: Dict[Tuple[bool, str], ContractionHierarchy] = {}
+        if self.engine == "ch":
+            self._get_ch(undirected=False)
+
+        # landmark tablice (ALT) za donje ograde i A*; grade se na prvi upit
+        self._alt: Dict[Tuple[bool, str], LandmarkOracle] = {}
+        if self.engine == "alt":
+            self._get_alt(undirected=False)
+
+        # ključ (u, v, neusmjereno, težina): graf na kojem je ruta stvarno tražena
+        self.path_cache = PathCache(cache_size, cache_bytes)
+        self.path_store: Optional[PathStore] = None
+        if path_store and self.graph_hash and self.graphml_path:
+            try:
+                store_dir = cache_dir or graph_cache.default_cache_dir(self.graphml_path)
+                self.path_store = PathStore(store_path(self.graphml_path, store_dir), self._store_key())
+                if rebuilt:
+                    # novi sadržaj GraphML-a: rute starog grafa više ne vrijede
+                    self.path_store.prune_other_graphs(self.graph_hash[:16])
+            except Exception as e:
+                print(f"[WORLD] Path store unavailable: {e}")
+                self.path_store = None
+
+        # SCC oznake: svaki par unutar iste komponente je dostižan
+        self.scc_labels = strongly_connected_components(self.graph)
+        self._pairs: Dict[bool, Optional[ComponentPairs]] = {False: ComponentPairs.from_labels(self.scc_labels)}
+
+        self._spatial: Optional[GridIndex] = None
+        self._undirected_origin: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+
+    @property
+    def G(self):
+        if self._G is None:
+            self._G = self._load_graphml()
+        return self._G
+
+    @property
+    def graph_undirected(self) -> RoadGraph:
+        if self._graph_undirected is None:
+            self._graph_undirected = self.graph.undirected()
+        return self._graph_undirected
+
+    @property
+    def G_undirected(self):
+        if self._G_undirected is None:
+            try:
+                self._G_undirected = load_osmnx().utils_graph.get_undirected(self.G)
+            except Exception:
+                self._G_undirected = self.G.to_undirected()
+        return self._G_undirected
+
+    def _load_graphml(self):
+        self._G = load_osmnx().load_graphml(self.graphml_path)
 
         
-        self._coerce_node_xy_to_float()
+        self._normalize_node_ids_to_int_if_possible()
 
        
         self._coerce_edge_length_to_float()
 
-     
-        self.nodes: List[Any] = list(self.G.nodes)
+        return self._G
 
-        if not self.nodes:
-            raise RuntimeError("Graf nema čvorova (nodes=0).")
+    @staticmethod
+    def _graph_arrays(
+        graph: RoadGraph,
+        graph_undirected: Optional[RoadGraph] = None,
+        chains: Optional[ChainGeometry] = None,
+    ) -> Dict[str, np.ndarray]:
+        arrays = graph.with_sorted_index().to_arrays()
+        if graph_undirected is not None:
+            # neusmjereni graf je simetričan: obrnuti CSR jednak je izravnom
+            arrays["u_offsets"] = graph_undirected.offsets
+            arrays["u_targets"] = graph_undirected.targets
+            arrays["u_weights"] = graph_undirected.weights
+            if graph_undirected.times is not None:
+                arrays["u_times"] = graph_undirected.times
+        if chains is not None:
+            for name, arr in chains.to_arrays().items():
+                arrays[f"c_{name}"] = arr
+        return arrays
 
+    @staticmethod
+    def _graphs_from_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[RoadGraph, Optional[RoadGraph], Optional[ChainGeometry]]:
+        plain, und = split_prefixed(arrays, "u_")
+        plain, chain_arrays = split_prefixed(plain, "c_")
+        chains = ChainGeometry.from_arrays(chain_arrays)
+        graph = RoadGraph.from_arrays(plain)
+        if not und:
+            return graph, None, chains
+        graph_undirected = RoadGraph(
+            graph.node_ids,
+            und["offsets"], und["targets"], und["weights"],
+            und["offsets"], und["targets"], und["weights"],
+            graph.lat, graph.lon, graph.id_sorted, graph.id_order,
+            times=und.get("times"), r_times=und.get("times"),
+        )
+        return graph, graph_undirected, chains
 
+    def _load_cached_graph(self) -> Optional[Tuple[RoadGraph, Optional[ChainGeometry]]]:
+        loaded = graph_cache.load_arrays(self.cache_path, self.graph_hash, mmap=self.mmap)
+        if loaded is None:
+            return None
+        arrays, _ = loaded
         try:
-            self.G_undirected = ox.utils_graph.get_undirected(self.G)  
+            graph, _, chains = self._graphs_from_arrays(arrays)
         except Exception:
-            self.G_undirected = self.G.to_undirected()
+            return None
+        if "contract" in self.preprocess and chains is None:
+            return None
+        return graph, chains
+
+    def _save_cached_graph(self, graph: RoadGraph, chains: Optional[ChainGeometry] = None) -> None:
+        if graph.node_ids.dtype == object:
+            return
+        try:
+            graph_cache.save_arrays(
+                self.cache_path,
+                self.graph_hash,
+                self._graph_arrays(graph, None, chains),
+                meta={
+                    "source": os.path.basename(self.graphml_path),
+                    "n": graph.n,
+                    "m": graph.m,
+                    "preprocess": ",".join(self.preprocess),
+                },
+            )
+            graph_cache.prune_stale(self.graphml_path, self.cache_path)
+        except Exception as e:
+            print(f"[WORLD] Graph cache write failed: {e}")
 
+    @classmethod
+    def attach(cls, shared_name: str, **kwargs) -> "RoadWorld":
+        return cls("", shared_name=shared_name, **kwargs)
 
+    def publish_shared(self, name: Optional[str] = None, undirected: bool = False) -> str:
+        # undirected=True dijeli i neusmjereni CSR (inače ga svaki proces gradi sam ako zatreba)
+        shared = SharedGraph.publish(
+            self._graph_arrays(self.graph, self.graph_undirected if undirected else None, self.chains),
+            meta={
+                "graphml_path": os.path.abspath(self.graphml_path) if self.graphml_path else "",
+                "source_sha256": self.graph_hash,
+                "preprocess": ",".join(self.preprocess),
+            },
+            name=name,
+        )
+        self._published.append(shared)
+        return shared.name
+
+    def close_shared(self) -> None:
+        for shared in self._published:
+            shared.close()
+        self._published = []
 
     def _normalize_node_ids_to_int_if_possible(self) -> None:
 
-        nodes = list(self.G.nodes)
+        nodes = list(self._G.nodes)
         if not nodes:
             return
 
@@ -78,26 +412,14 @@ class RoadWorld:
         except Exception:
             return
 
-       
-        self.G = nx.relabel_nodes(self.G, mapping, copy=False)
+        import networkx as nx
 
-    def _coerce_node_xy_to_float(self) -> None:
-  
-        for n, data in self.G.nodes(data=True):
-            if "x" in data and data["x"] is not None:
-                try:
-                    data["x"] = float(data["x"])
-                except Exception:
-                    pass
-            if "y" in data and data["y"] is not None:
-                try:
-                    data["y"] = float(data["y"])
-                except Exception:
-                    pass
+        self._G = nx.relabel_nodes(self._G, mapping, copy=False)
 
     def _coerce_edge_length_to_float(self) -> None:
 
-        for u, v, k, data in self.G.edges(keys=True, data=True):
+        nodes = self._G.nodes
+        for u, v, k, data in self._G.edges(keys=True, data=True):
             val = data.get("length", None)
 
             
@@ -110,8 +432,8 @@ class RoadWorld:
 
             
             try:
-                lat1, lon1 = self.node_latlon(u)
-                lat2, lon2 = self.node_latlon(v)
+                lat1, lon1 = float(nodes[u]["y"]), float(nodes[u]["x"])
+                lat2, lon2 = float(nodes[v]["y"]), float(nodes[v]["x"])
                 data["length"] = float(self._haversine_m(lat1, lon1, lat2, lon2))
             except Exception:
                 data["length"] = 0.0
@@ -129,76 +451,818 @@ class RoadWorld:
    
 
     def node_latlon(self, n: Any) -> Tuple[float, float]:
-        d = self.G.nodes[n]
-        return float(d["y"]), float(d["x"])
+        lat, lon = self.coords[self.node_index[n]].tolist()
+        return lat, lon
+
+    def nodes_latlon(self, nodes: List[Any]) -> np.ndarray:
+        return self.coords[[self.node_index[n] for n in nodes]]
+
+    @property
+    def spatial(self) -> GridIndex:
+        if self._spatial is None:
+            self._spatial = GridIndex(self.graph.lat, self.graph.lon)
+        return self._spatial
 
     def nearest_node(self, lat: float, lon: float) -> Any:
-        return ox.distance.nearest_nodes(self.G, X=float(lon), Y=float(lat))
+        i, _ = self.spatial.nearest(lat, lon)
+        return self.nodes[i]
 
+    def nearest_nodes(self, lats: List[float], lons: List[float], return_dist: bool = False):
+        idx, dist = self.spatial.nearest_many(lats, lons)
+        ids = self.graph.node_ids[idx]
+        if return_dist:
+            return ids, dist
+        return ids
 
 
-    def dist_m(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
 
-        try:
-            d = nx.shortest_path_length(self.G, u, v, weight="length")
-            return float(d)
-        except Exception:
-            if not fallback_undirected:
-                return float("inf")
-        try:
-            d = nx.shortest_path_length(self.G_undirected, u, v, weight="length")
-            return float(d)
-        except Exception:
+    def _build_graph(self) -> RoadGraph:
+        if GRAPHML_LOADER != "osmnx":
+            return load_road_graph(self.graphml_path)
+        G = self.G
+        nodes = list(G.nodes)
+        idx = {n: i for i, n in enumerate(nodes)}
+        lat = [float(d.get("y", 0.0)) for _, d in G.nodes(data=True)]
+        lon = [float(d.get("x", 0.0)) for _, d in G.nodes(data=True)]
+        src: List[int] = []
+        dst: List[int] = []
+        w: List[float] = []
+        t: List[float] = []
+        for a, b, data in G.edges(data=True):
+            src.append(idx[a])
+            dst.append(idx[b])
+            length = float(data.get("length", 0.0))
+            w.append(length)
+            t.append(edge_time_s(length, data.get("highway"), data.get("maxspeed")))
+        return RoadGraph.from_edges(nodes, src, dst, w, lat, lon, times=t)
+
+    def _graph_for(self, undirected: bool, weight: str = "length") -> RoadGraph:
+        g = self.graph_undirected if undirected else self.graph
+        if weight == "length":
+            return g
+        if weight != "time":
+            raise ValueError(f"Nepoznata težina: {weight} (dozvoljeno: {', '.join(ROAD_WEIGHTS)})")
+        tg = self._time_graphs.get(undirected)
+        if tg is None:
+            tg = g.by_time()
+            self._time_graphs[undirected] = tg
+        return tg
+
+    def _get_ch(self, undirected: bool, weight: str = "length") -> ContractionHierarchy:
+        key = (undirected, weight)
+        ch = self._ch.get(key)
+        if ch is None or key in self._ch_stale:
+            g = self._graph_for(undirected, weight)
+            # nakon ažuriranja vremena: iste kontrakcije s novim težinama
+            ch = ch.customize(g.edges()) if ch is not None else ContractionHierarchy(g.n, g.edges())
+            self._ch[key] = ch
+            self._ch_stale.discard(key)
+        return ch
+
+    def _get_alt(self, undirected: bool, weight: str = "length") -> LandmarkOracle:
+        alt = self._alt.get((undirected, weight))
+        if alt is None:
+            g = self._graph_for(undirected, weight)
+            basis = g
+            if weight == "time" and self._alt_floor is not None:
+                # tablice iz najmanjih viđenih vremena ostaju donje ograde dok promet samo usporava
+                floor = self._with_times(self.graph, self._alt_floor)
+                basis = (floor.undirected() if undirected else floor).by_time()
+            alt = LandmarkOracle(basis, num_landmarks=self.num_landmarks, seed=self.seed)
+            alt.graph = g
+            self._alt[(undirected, weight)] = alt
+        return alt
+
+    def _search(self, iu: int, iv: int, undirected: bool, want_path: bool, weight: str = "length") -> Tuple[float, List[int]]:
+        if self.engine == "ch":
+            ch = self._get_ch(undirected, weight)
+            if want_path:
+                return ch.route(iu, iv)
+            return ch.distance(iu, iv), []
+        if self.engine == "alt":
+            return self._get_alt(undirected, weight).astar(iu, iv)
+        return shortest_path(self._graph_for(undirected, weight), iu, iv)
+
+    def _store_key(self) -> str:
+        # indeksi čvorova ovise o sadržaju GraphML-a, predobradi i formatu grafa
+        return f"{self.graph_hash[:16]}-{'-'.join(self.preprocess) or 'full'}-v{graph_cache.CACHE_VERSION}"
+
+    def _cached_search(self, iu: int, iv: int, undirected: bool, want_path: bool, weight: str = "length") -> Tuple[float, List[int]]:
+        key = (iu, iv, undirected, weight)
+        hit = self.path_cache.get(key, want_path)
+        if hit is not None:
+            return hit[0], hit[1] or []
+
+        # vremena prometa uživo se ne spremaju trajno
+        store = self.path_store if (weight == "length" or self._free_times is None) else None
+        if store is not None:
+            hit = store.get(iu, iv, undirected, weight, want_path)
+            if hit is not None:
+                self.path_cache.put(key, hit[0], hit[1])
+                return hit[0], hit[1] or []
+
+        d, p = self._search(iu, iv, undirected, want_path, weight)
+        self.path_cache.put(key, d, p if want_path else None)
+        if store is not None:
+            store.put(iu, iv, undirected, weight, d, p if want_path else None)
+        return d, p
+
+    def _query(
+        self,
+        u: Any,
+        v: Any,
+        fallback_undirected: bool,
+        want_path: bool,
+        weight: str = "length",
+    ) -> Tuple[float, List[int], bool]:
+        iu = self.node_index.get(u)
+        iv = self.node_index.get(v)
+        if iu is None or iv is None:
+            return float("inf"), [], False
+        d, p = self._cached_search(iu, iv, False, want_path, weight)
+        if not math.isfinite(d) and fallback_undirected:
+            d, p = self._cached_search(iu, iv, True, want_path, weight)
+            return float(d), p, True
+        return float(d), p, False
+
+    def _with_times(self, g: RoadGraph, times: np.ndarray) -> RoadGraph:
+        # obrnuti CSR je poredan kao argsort(targets), pa je r_times = times[poredak]
+        r_order = np.argsort(g.targets, kind="stable")
+        return RoadGraph(
+            g.node_ids, g.offsets, g.targets, g.weights,
+            g.r_offsets, g.sources()[r_order].astype(np.int32), g.weights[r_order],
+            g.lat, g.lon, g.id_sorted, g.id_order,
+            times=times, r_times=times[r_order],
+        )
+
+    def _ensure_live_times(self) -> None:
+        if self._free_times is not None:
+            return
+        if self.graph.times is None:
+            raise ValueError("Graf nema vremena prolaska bridova (times).")
+        # kopija: vremena iz cachea / dijeljene memorije su read-only i dijele ih drugi procesi
+        self._free_times = np.array(self.graph.times, dtype=np.float64)
+        self._alt_floor = self._free_times.copy()
+        self.graph = self._with_times(self.graph, self._free_times.copy())
+        self.node_index = self.graph.index
+        self._edge_src = self.graph.sources()
+        r_order = np.argsort(self.graph.targets, kind="stable")
+        self._rev_pos = np.empty(self.graph.m, dtype=np.int64)
+        self._rev_pos[r_order] = np.arange(self.graph.m)
+
+        # izvedeni grafovi pokazuju na stara polja; grade se ponovo na prvi upit
+        self._graph_undirected = None
+        self._undirected_pos = None
+        self._time_graphs = {}
+        self._ch_stale.update(key for key in self._ch if key[1] == "time")
+        for key in [key for key in self._alt if key[1] == "time"]:
+            del self._alt[key]
+
+    def _edge_ids(self, us: List[Any], vs: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        # (u, v) -> indeksi svih paralelnih bridova u -> v; vraća i indeks ažuriranja za svaki brid
+        if self._edge_keys is None:
+            keys = self._edge_src * self.graph.n + self.graph.targets
+            order = np.argsort(keys, kind="stable")
+            self._edge_keys = (keys[order], order)
+        sorted_keys, order = self._edge_keys
+        iu = np.asarray([self.node_index.get(u, -1) for u in us], dtype=np.int64)
+        iv = np.asarray([self.node_index.get(v, -1) for v in vs], dtype=np.int64)
+        ok = np.flatnonzero((iu >= 0) & (iv >= 0))
+        want = iu[ok] * self.graph.n + iv[ok]
+        lo = np.searchsorted(sorted_keys, want, side="left")
+        hi = np.searchsorted(sorted_keys, want, side="right")
+        counts = hi - lo
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        return order[np.repeat(lo, counts) + local], np.repeat(ok, counts)
+
+    def update_edge_times(self, updates: List[Tuple[Any, Any, float]], relative: bool = False) -> int:
+        # (u, v, sekunde) ili uz relative=True (u, v, faktor na slobodni tok); vraća broj promijenjenih bridova
+        self._ensure_live_times()
+        if not updates:
+            return 0
+        us, vs, vals = zip(*updates)
+        edges, which = self._edge_ids(list(us), list(vs))
+        if len(edges) == 0:
+            return 0
+        values = np.asarray(vals, dtype=np.float64)[which]
+        if relative:
+            values = self._free_times[edges] * values
+        self._apply_times(edges, np.maximum(values, 0.0))
+        return int(len(edges))
+
+    def reset_edge_times(self) -> None:
+        # vraća vremena slobodnog toka (iz highway/maxspeed)
+        if self._free_times is not None:
+            self._apply_times(np.arange(self.graph.m), self._free_times.copy())
+
+    def _apply_times(self, edges: np.ndarray, values: np.ndarray) -> None:
+        g = self.graph
+        slower = bool(np.all(values >= g.times[edges]))
+        g.times[edges] = values
+        g.r_times[self._rev_pos[edges]] = values
+        und = self._graph_undirected
+        if und is not None and und.times is not None:
+            if self._undirected_pos is None:
+                order = np.argsort(np.concatenate([self._edge_src, g.targets]), kind="stable")
+                self._undirected_pos = np.empty(2 * g.m, dtype=np.int64)
+                self._undirected_pos[order] = np.arange(2 * g.m)
+            und.times[self._undirected_pos[edges]] = values
+            und.times[self._undirected_pos[edges + g.m]] = values
+
+        # Dijkstra i A* čitaju ista polja (memoryview); CH se prilagođava na sljedeći upit
+        self._ch_stale.update(key for key in self._ch if key[1] == "time")
+        below = values < self._alt_floor[edges]
+        if below.any():
+            self._alt_floor[edges[below]] = values[below]
+            for key in [key for key in self._alt if key[1] == "time"]:
+                del self._alt[key]
+
+        # sporiji bridovi mijenjaju samo rute koje njima prolaze; brži mogu skratiti bilo koju
+        if slower:
+            touched = set(self._edge_src[edges].tolist()) | set(g.targets[edges].tolist())
+            self.path_cache.invalidate(
+                lambda key, path: key[3] == "time" and (path is None or not touched.isdisjoint(path))
+            )
+        else:
+            self.path_cache.invalidate(lambda key, path: key[3] == "time")
+
+    def cache_stats(self) -> Dict[str, Any]:
+        stats = self.path_cache.stats()
+        if self.path_store is not None:
+            stats["store"] = self.path_store.stats()
+        return stats
+
+    def close_path_store(self) -> None:
+        if self.path_store is not None:
+            self.path_store.close()
+            self.path_store = None
+
+    def memory_stats(self) -> Dict[str, int]:
+        # bajtovi polja koje drži RoadWorld; dijeljena polja broje se samo prvi put
+        seen: set = set()
+        out = {
+            "graph": unique_nbytes(list(self.graph.to_arrays().values()) + [self.coords], seen),
+            "undirected": 0,
+            "chains": 0,
+            "alt": 0,
+            "spatial": 0,
+            "path_cache": int(self.path_cache.bytes),
+        }
+        if self._graph_undirected is not None:
+            out["undirected"] = unique_nbytes(self._graph_undirected.to_arrays().values(), seen)
+        if self.chains is not None:
+            out["chains"] = unique_nbytes(self.chains.to_arrays().values(), seen)
+        for alt in self._alt.values():
+            out["alt"] += unique_nbytes((alt.d_from, alt.d_to), seen)
+        if self._spatial is not None:
+            out["spatial"] = self._spatial.nbytes
+        out["total"] = sum(out.values())
+        return out
+
+    def clear_cache(self) -> None:
+        self.path_cache.clear()
+
+    def lower_bound_m(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
+        iu = self.node_index.get(u)
+        iv = self.node_index.get(v)
+        if iu is None or iv is None:
             return float("inf")
+        lb = self._get_alt(False).lower_bound(iu, iv)
+        if fallback_undirected:
+            lb = min(lb, self._get_alt(True).lower_bound(iu, iv))
+        return float(lb)
 
-    def path_nodes(self, u: Any, v: Any, fallback_undirected: bool = True) -> List[Any]:
-        try:
-            return list(nx.shortest_path(self.G, u, v, weight="length"))
-        except Exception:
-            if not fallback_undirected:
-                return []
-        try:
-            return list(nx.shortest_path(self.G_undirected, u, v, weight="length"))
-        except Exception:
-            return []
+    def lower_bounds_m(self, sources: List[Any], v: Any, fallback_undirected: bool = True) -> np.ndarray:
+        out = np.full(len(sources), np.inf)
+        iv = self.node_index.get(v)
+        if iv is None:
+            return out
+        pos = [i for i, u in enumerate(sources) if u in self.node_index]
+        if not pos:
+            return out
+        idx = [self.node_index[sources[i]] for i in pos]
+        lb = self._get_alt(False).lower_bounds_to(idx, iv)
+        if fallback_undirected:
+            lb = np.minimum(lb, self._get_alt(True).lower_bounds_to(idx, iv))
+        out[pos] = lb
+        return out
 
-    def path_latlon(self, u: Any, v: Any) -> List[List[float]]:
-        nodes = self.path_nodes(u, v, fallback_undirected=True)
-        if not nodes:
-            lat1, lon1 = self.node_latlon(u)
-            lat2, lon2 = self.node_latlon(v)
-            return [[lat1, lon1], [lat2, lon2]]
-
-        out: List[List[float]] = []
-        for n in nodes:
-            lat, lon = self.node_latlon(n)
-            out.append([lat, lon])
+    def rank_by_lower_bound(self, sources: List[Any], v: Any, fallback_undirected: bool = True) -> List[Any]:
+        lb = self.lower_bounds_m(sources, v, fallback_undirected=fallback_undirected)
+        return [sources[i] for i in np.argsort(lb, kind="stable")]
+
+    def _matrix(self, si: List[int], tj: List[int], undirected: bool, weight: str = "length") -> np.ndarray:
+        src, src_inv = np.unique(np.asarray(si, dtype=np.int64), return_inverse=True)
+        dst, dst_inv = np.unique(np.asarray(tj, dtype=np.int64), return_inverse=True)
+        src_l = src.tolist()
+        dst_l = dst.tolist()
+
+        if self.engine == "ch":
+            D = self._get_ch(undirected, weight).many_to_many(src_l, dst_l)
+        else:
+            # pretraga s manje strane: unaprijed iz izvora ili unatrag iz ciljeva
+            g = self._graph_for(undirected, weight)
+            if len(src_l) <= len(dst_l):
+                D = np.vstack([multi_target(g, s, dst_l) for s in src_l])
+            else:
+                D = np.column_stack([multi_target(g, t, src_l, reverse=True) for t in dst_l])
+        return D[np.ix_(src_inv.ravel(), dst_inv.ravel())]
+
+    def dist_matrix(
+        self,
+        sources: List[Any],
+        targets: List[Any],
+        fallback_undirected: bool = True,
+        weight: str = "length",
+    ) -> np.ndarray:
+        out = np.full((len(sources), len(targets)), np.inf)
+        rows = [i for i, u in enumerate(sources) if u in self.node_index]
+        cols = [j for j, v in enumerate(targets) if v in self.node_index]
+        if not rows or not cols:
+            return out
+        si = [self.node_index[sources[i]] for i in rows]
+        tj = [self.node_index[targets[j]] for j in cols]
+
+        D = self._matrix(si, tj, False, weight)
+        if fallback_undirected:
+            bad = ~np.isfinite(D)
+            if bad.any():
+                r = np.nonzero(bad.any(axis=1))[0]
+                c = np.nonzero(bad.any(axis=0))[0]
+                U = self._matrix([si[k] for k in r], [tj[k] for k in c], True, weight)
+                block = D[np.ix_(r, c)]
+                D[np.ix_(r, c)] = np.where(np.isfinite(block), block, U)
+
+        out[np.ix_(rows, cols)] = D
+        return out
+
+    def dist_matrix_parallel(
+        self,
+        sources: List[Any],
+        targets: List[Any],
+        workers: int = ROAD_MATRIX_WORKERS,
+        fallback_undirected: bool = True,
+        weight: str = "length",
+        dtype: Any = np.float64,
+        out_path: Optional[str] = None,
+    ) -> np.ndarray:
+        # jedna Dijkstra pretraga po (jedinstvenom) izvoru, raspodijeljene po procesima;
+        # graf se objavi jednom u dijeljenoj memoriji, radnici ga samo mapiraju
+        self._graph_for(False, weight)
+        workers = int(workers) if workers and workers > 0 else (os.cpu_count() or 1)
+        dtype = np.dtype(dtype)
+
+        cols = [j for j, v in enumerate(targets) if v in self.node_index]
+        tj = [self.node_index[targets[j]] for j in cols]
+        rows: Dict[int, List[int]] = {}
+        for i, u in enumerate(sources):
+            iu = self.node_index.get(u)
+            if iu is not None:
+                rows.setdefault(iu, []).append(i)
+        jobs = list(rows.items())
+
+        shape = (len(sources), len(targets))
+        if out_path:
+            out = np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=shape)
+        else:
+            out = np.empty(shape, dtype=dtype)
+        out[...] = np.inf
+        if not jobs or not cols:
+            return out
+        if out_path:
+            out.flush()
+
+        shared = None
+        if workers <= 1 or len(jobs) < 2 or self.graph.node_ids.dtype == object:
+            _matrix_worker_init(None, self.graph, tj, cols, weight, fallback_undirected, out_path)
+            results = [_matrix_worker_rows(jobs)]
+        else:
+            name = self.publish_shared()
+            shared = self._published.pop()
+            # ~4 dijela po radniku: ujednačava opterećenje bez puno prijenosa
+            n_chunks = min(len(jobs), workers * 4)
+            chunks = [jobs[k::n_chunks] for k in range(n_chunks)]
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_matrix_worker_init,
+                    initargs=(name, None, tj, cols, weight, fallback_undirected, out_path),
+                ) as pool:
+                    results = list(pool.map(_matrix_worker_rows, chunks))
+            finally:
+                shared.close()
+
+        # bez datoteke radnici vraćaju blokove redaka; s datotekom pišu izravno u nju
+        cols_a = np.asarray(cols, dtype=np.int64)
+        for positions, block in results:
+            if block is not None:
+                out[np.ix_(positions, cols_a)] = block
         return out
 
+    def dists_from(self, u: Any, targets: List[Any], fallback_undirected: bool = True, weight: str = "length") -> np.ndarray:
+        return self.dist_matrix([u], targets, fallback_undirected, weight)[0]
+
+    def dists_to(self, sources: List[Any], v: Any, fallback_undirected: bool = True, weight: str = "length") -> np.ndarray:
+        return self.dist_matrix(sources, [v], fallback_undirected, weight)[:, 0]
+
+    def dist_m(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
+        return self._query(u, v, fallback_undirected, want_path=False)[0]
+
+    def travel_time_s(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
+        return self._query(u, v, fallback_undirected, want_path=False, weight="time")[0]
+
+    def path_nodes(self, u: Any, v: Any, fallback_undirected: bool = True, weight: str = "length") -> List[Any]:
+        if self.chains is not None:
+            return self.route(u, v, fallback_undirected, weight).nodes
+        _, p, _ = self._query(u, v, fallback_undirected, want_path=True, weight=weight)
+        return self.graph.node_ids[p].tolist()
+
+    def _directed_edges(self, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # neusmjereni brid -> (izravni brid, vozi li se unatrag); isti poredak kao RoadGraph.undirected()
+        if self._undirected_origin is None:
+            m = self.graph.m
+            order = np.argsort(np.concatenate([self.graph.sources(), self.graph.targets]), kind="stable")
+            self._undirected_origin = (order % m, order >= m)
+        origin, backward = self._undirected_origin
+        return origin[edges], backward[edges]
+
+    def route(self, u: Any, v: Any, fallback_undirected: bool = True, weight: str = "length") -> Route:
+        # jedna pretraga daje udaljenost, vrijeme, čvorove i polilinu
+        d, p, undirected = self._query(u, v, fallback_undirected, want_path=True, weight=weight)
+        if not p:
+            # nepoznati čvorovi (npr. uklonjeni predobradom) nemaju koordinate; kao i path_nodes vraća se prazna ruta
+            return Route(math.inf, [], self.nodes_latlon([n for n in (u, v) if n in self.node_index]))
+        idx = np.asarray(p, dtype=np.int64)
+
+        base = self._graph_for(undirected)
+        edges = path_edges(self._graph_for(undirected, weight), p)
+        distance = d if weight == "length" else float(base.weights[edges].sum())
+        duration = float(base.times[edges].sum()) if base.times is not None else math.inf
+        if self.chains is None:
+            return Route(distance, self.graph.node_ids[idx].tolist(), self.coords[idx], duration)
+
+        # sažeti lanci: vraća se i geometrija (međučvorovi) svakog brida
+        backward = None
+        if undirected:
+            edges, backward = self._directed_edges(edges)
+        ids, latlon = self.chains.expand(self.graph.node_ids, self.coords, idx, edges, backward)
+        return Route(distance, ids.tolist(), latlon, duration)
+
+    def path_latlon_array(self, u: Any, v: Any) -> np.ndarray:
+        return self.route(u, v, fallback_undirected=True).latlon
+
+    def path_latlon(self, u: Any, v: Any) -> List[List[float]]:
+        return self.path_latlon_array(u, v).tolist()
+
+
+
+    def zone_table(self, cell_m: float = ROAD_ZONE_M) -> ZoneTable:
+        cell_m = float(cell_m)
+        entry = ""
+        if self.use_cache and self.graphml_path and self.graph_hash:
+            variant = "-".join(["zones", f"{cell_m:g}"] + list(self.preprocess))
+            entry = graph_cache.cache_entry_path(self.graphml_path, self.graph_hash, self.cache_dir, variant=variant)
+            loaded = graph_cache.load_arrays(entry, self.graph_hash)
+            if loaded is not None:
+                try:
+                    return ZoneTable.from_arrays(loaded[0])
+                except Exception:
+                    pass
+
+        t0 = time.perf_counter()
+        table = self._build_zone_table(cell_m)
+        build_sec = time.perf_counter() - t0
+        print(
+            f"[WORLD] Zone table: {table.zones} zones @ {cell_m:g} m | "
+            f"{table.nbytes / 1024:.0f} KiB | built in {build_sec:.2f}s"
+        )
+        if entry:
+            try:
+                graph_cache.save_arrays(
+                    entry, self.graph_hash, table.to_arrays(),
+                    meta={"zones": table.zones, "cell_m": cell_m, "build_sec": build_sec},
+                )
+            except Exception as e:
+                print(f"[WORLD] Zone table cache write failed: {e}")
+        return table
+
+    def _build_zone_table(self, cell_m: float) -> ZoneTable:
+        g = self.graph
+        grid = GridIndex(g.lat, g.lon, cell_m=cell_m)
+        x, y = grid.project(g.lat, g.lon)
+        node_cell = grid._cell_ids(x, y)
+        cells, node_zone = np.unique(node_cell, return_inverse=True)
+        node_zone = node_zone.ravel()
+        z = len(cells)
+
+        # reprezentant: čvor najbliži težištu zone, po mogućnosti iz najveće jake komponente
+        main = self.scc_labels == np.argmax(np.bincount(self.scc_labels))
+        cnt = np.bincount(node_zone, minlength=z)
+        cx = np.bincount(node_zone, weights=x, minlength=z) / cnt
+        cy = np.bincount(node_zone, weights=y, minlength=z) / cnt
+        d2 = (x - cx[node_zone]) ** 2 + (y - cy[node_zone]) ** 2 + np.where(main, 0.0, 1e18)
+        order = np.lexsort((d2, node_zone))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = node_zone[order[1:]] != node_zone[order[:-1]]
+        reps = order[first]
+
+        rep_ids = g.node_ids[reps].tolist()
+        dist = self.dist_matrix(rep_ids, rep_ids, fallback_undirected=False).astype(np.float32)
+
+        r_in = np.zeros(z, dtype=np.float32)
+        r_out = np.zeros(z, dtype=np.float32)
+        members = np.split(np.argsort(node_zone, kind="stable"), np.cumsum(cnt)[:-1])
+        for k in range(z):
+            nodes = members[k].tolist()
+            r_out[k] = float(np.max(multi_target(g, int(reps[k]), nodes)))
+            r_in[k] = float(np.max(multi_target(g, int(reps[k]), nodes, reverse=True)))
+
+        # prazne ćelije: zona najbližeg čvora
+        cell_zone = np.full(grid.nx * grid.ny, -1, dtype=np.int32)
+        cell_zone[cells] = np.arange(z, dtype=np.int32)
+        empty = np.flatnonzero(cell_zone < 0)
+        if len(empty):
+            ex = grid.x0 + (empty % grid.nx + 0.5) * grid.cell_m
+            ey = grid.y0 + (empty // grid.nx + 0.5) * grid.cell_m
+            near, _ = grid.nearest_many(ey / grid._ky, ex / grid._kx)
+            cell_zone[empty] = node_zone[near]
+
+        # faktor obilaska za parove unutar iste zone: medijan preko parova reprezentanata
+        rx, ry = x[reps], y[reps]
+        straight = np.hypot(rx[:, None] - rx[None, :], ry[:, None] - ry[None, :])
+        ok = np.isfinite(dist) & (straight > 0)
+        detour = float(np.median(dist[ok] / straight[ok])) if ok.any() else 1.0
+
+        return ZoneTable(
+            np.array([grid.lat0, grid.cell_m, grid.x0, grid.y0, grid.nx, grid.ny, max(1.0, detour)], dtype=np.float64),
+            cell_zone,
+            g.lat[reps].astype(np.float64),
+            g.lon[reps].astype(np.float64),
+            dist,
+            r_in,
+            r_out,
+        )
+
+    def write_tiles(self, tile_m: float = ROAD_TILE_M) -> Tuple[str, Dict[str, Any]]:
+        if self.chains is not None:
+            raise ValueError("Pločice ne podržavaju sažete lance (predobrada 'contract').")
+        if not self.graphml_path or not self.graph_hash:
+            raise ValueError("Pločice trebaju izvorni GraphML.")
+        entry = tiles_entry_path(self.graphml_path, self.graph_hash, tile_m, self.cache_dir, self.preprocess)
+        t0 = time.perf_counter()
+        info = write_tiles(self.graph, entry, self.graph_hash, tile_m)
+        print(
+            f"[WORLD] Tiles: {info['tiles']} @ {tile_m:g} m | boundary nodes {info['boundary_nodes']} | "
+            f"written in {time.perf_counter() - t0:.2f}s"
+        )
+        return entry, info
+
+    def _component_pairs(self, undirected: bool) -> Optional[ComponentPairs]:
+        if undirected not in self._pairs:
+            labels = strongly_connected_components(self._graph_for(undirected))
+            self._pairs[undirected] = ComponentPairs.from_labels(labels)
+        return self._pairs[undirected]
 
+    def _draw_task_pair(self, undirected: bool) -> Optional[Tuple[Any, Any]]:
+        pairs = self._component_pairs(undirected)
+        if pairs is None:
+            return None
+        iu, iv = pairs.draw(self.rng)
+        return self.nodes[iu], self.nodes[iv]
+
+    def sample_task_route(self) -> Tuple[Any, Any, Route]:
+        if not self.nodes:
+            raise RuntimeError("Graf nema čvorova.")
+
+        for undirected in (False, True):
+            for _ in range(self.max_sample_tries):
+                pair = self._draw_task_pair(undirected)
+                if pair is None:
+                    break
+                pu, dv = pair
+                r = self.route(pu, dv, fallback_undirected=undirected)
+                # dostižnost je zajamčena; odbacuju se samo rute duljine 0
+                if r.found and r.distance_m > 0:
+                    return pu, dv, r
+
+        raise RuntimeError("Ne mogu naći valjan (pickup, dropoff) par s rutom u grafu.")
 
     def sample_task_nodes(self) -> Tuple[Any, Any]:
         if not self.nodes:
             raise RuntimeError("Graf nema čvorova.")
+        for undirected in (False, True):
+            pair = self._draw_task_pair(undirected)
+            if pair is not None:
+                return pair
+        raise RuntimeError("Ne mogu naći valjan (pickup, dropoff) par s rutom u grafu.")
 
-        for _ in range(self.max_sample_tries):
-            pu = self.rng.choice(self.nodes)
-            dv = self.rng.choice(self.nodes)
-            if dv == pu:
-                continue
-            d = self.dist_m(pu, dv, fallback_undirected=False)
-            if math.isfinite(d) and d > 0:
-                return pu, dv
 
-        
+_MATRIX_JOB: Dict[str, Any] = {}
+
+
+def _matrix_worker_init(
+    shared_name: Optional[str],
+    graph: Optional[RoadGraph],
+    tj: List[int],
+    cols: List[int],
+    weight: str,
+    fallback_undirected: bool,
+    out_path: Optional[str],
+) -> None:
+    if shared_name:
+        shared = SharedGraph.attach(shared_name)
+        graph = RoadWorld._graphs_from_arrays(shared.arrays)[0]
+        _MATRIX_JOB["shared"] = shared
+    _MATRIX_JOB.update(
+        graph=graph,
+        directed=graph.by_time() if weight == "time" else graph,
+        undirected=None,
+        tj=tj,
+        cols=np.asarray(cols, dtype=np.int64),
+        weight=weight,
+        fallback=bool(fallback_undirected),
+        out_path=out_path,
+    )
+
+
+def _matrix_worker_rows(jobs: List[Tuple[int, List[int]]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    job = _MATRIX_JOB
+    tj = job["tj"]
+    block = np.vstack([multi_target(job["directed"], s, tj) for s, _ in jobs])
+    if job["fallback"]:
+        bad_rows = np.flatnonzero((~np.isfinite(block)).any(axis=1))
+        if len(bad_rows):
+            if job["undirected"] is None:
+                und = job["graph"].undirected()
+                job["undirected"] = und.by_time() if job["weight"] == "time" else und
+            for r in bad_rows.tolist():
+                miss = np.flatnonzero(~np.isfinite(block[r]))
+                block[r, miss] = multi_target(job["undirected"], jobs[r][0], [tj[k] for k in miss.tolist()])
+
+    # duplikati izvora dijele jedan redak
+    reps = [len(pos) for _, pos in jobs]
+    positions = np.asarray([i for _, pos in jobs for i in pos], dtype=np.int64)
+    block = np.repeat(block, reps, axis=0)
+    if not job["out_path"]:
+        return positions, block
+    out = np.load(job["out_path"], mmap_mode="r+")
+    out[np.ix_(positions, job["cols"])] = block
+    out.flush()
+    del out
+    return positions, None
+
+
+class TiledWorld:
+    # podskup RoadWorld upita (rute, uzorkovanje zadataka) nad grafom u pločicama;
+    # memorija raste s područjem koje pretrage i zadaci stvarno dotaknu
+
+    def __init__(
+        self,
+        graphml_path: str,
+        seed: int = 1,
+        max_sample_tries: int = 80,
+        tile_m: float = ROAD_TILE_M,
+        max_tiles: int = ROAD_MAX_TILES,
+        area: Optional[Tuple[float, float, float, float]] = None,
+        cache_dir: Optional[str] = None,
+        cache_size: int = ROAD_CACHE_SIZE,
+        cache_bytes: int = ROAD_CACHE_BYTES,
+        preprocess: str = ROAD_PREPROCESS,
+    ):
+        if not os.path.exists(graphml_path):
+            raise FileNotFoundError(f"Ne mogu naći graphml: {graphml_path}")
+        self.seed = int(seed)
+        self.rng = random.Random(self.seed)
+        self.max_sample_tries = int(max_sample_tries)
+        self.graphml_path = graphml_path
+        self.graph_hash = graph_cache.file_hash(graphml_path)
+        self.preprocess = parse_steps(preprocess)
+        self.cache_path = tiles_entry_path(graphml_path, self.graph_hash, tile_m, cache_dir, self.preprocess)
+
+        try:
+            self.tiles = TiledGraph(self.cache_path, self.graph_hash, max_tiles=max_tiles)
+        except FileNotFoundError:
+            # prva izgradnja treba cijeli graf u memoriji; kasnija pokretanja samo indeks i pločice
+            builder = RoadWorld(
+                graphml_path, seed=seed, engine="dijkstra", cache_dir=cache_dir,
+                preprocess=",".join(self.preprocess), path_store=False,
+            )
+            builder.write_tiles(tile_m)
+            del builder
+            self.tiles = TiledGraph(self.cache_path, self.graph_hash, max_tiles=max_tiles)
+
+        self.main_scc = int(self.tiles.meta.get("main_scc", 0))
+        self.path_cache = PathCache(cache_size, cache_bytes)
+
+        # zadaci se uzorkuju iz pločica unutar područja (lat_min, lon_min, lat_max, lon_max)
+        self.area_tiles = self.tiles.tiles_in_bbox(*area) if area else list(range(self.tiles.tiles))
+        if not self.area_tiles:
+            raise RuntimeError("Područje zadataka ne sadrži nijedan čvor grafa.")
+        self._area_cum = np.cumsum([self.tiles.tile_size(k) for k in self.area_tiles]).tolist()
+
+    def node_latlon(self, n: Any) -> Tuple[float, float]:
+        g = self.tiles.index.get(n)
+        if g is None:
+            raise KeyError(n)
+        return self.tiles.latlon(g)
+
+    def nodes_latlon(self, nodes: List[Any]) -> np.ndarray:
+        return np.asarray([self.node_latlon(n) for n in nodes], dtype=np.float64).reshape(-1, 2)
+
+    def nearest_node(self, lat: float, lon: float) -> Any:
+        g, _ = self.tiles.nearest(lat, lon)
+        return self.tiles.node_id(g)
+
+    def _cached_search(self, iu: int, iv: int, undirected: bool, weight: str) -> Tuple[float, List[int]]:
+        key = (iu, iv, undirected, weight)
+        hit = self.path_cache.get(key, True)
+        if hit is not None:
+            return hit[0], hit[1] or []
+        d, p = self.tiles.astar(iu, iv, weight=weight, undirected=undirected)
+        self.path_cache.put(key, d, p)
+        return d, p
+
+    def _query(self, u: Any, v: Any, fallback_undirected: bool, weight: str) -> Tuple[float, List[int], bool]:
+        iu = self.tiles.index.get(u)
+        iv = self.tiles.index.get(v)
+        if iu is None or iv is None:
+            return math.inf, [], False
+        # različite slabe komponente: nema puta ni u neusmjerenom grafu, pretraga nije potrebna
+        scc_u, wcc_u = self.tiles.components(iu)
+        scc_v, wcc_v = self.tiles.components(iv)
+        if wcc_u != wcc_v:
+            return math.inf, [], False
+        # ista jaka komponenta jamči usmjereni put; različite mogu biti povezane jednosmjernim ulicama
+        d, p = self._cached_search(iu, iv, False, weight)
+        if p or scc_u == scc_v:
+            return d, p, False
+        if fallback_undirected:
+            d, p = self._cached_search(iu, iv, True, weight)
+            return d, p, True
+        return math.inf, [], False
+
+    def route(self, u: Any, v: Any, fallback_undirected: bool = True, weight: str = "length") -> Route:
+        _, p, undirected = self._query(u, v, fallback_undirected, weight)
+        if not p:
+            return Route(math.inf, [], self.nodes_latlon([n for n in (u, v) if n in self.tiles.index]))
+        distance, duration = self.tiles.path_totals(p, undirected, weight)
+        latlon = np.asarray([self.tiles.latlon(g) for g in p], dtype=np.float64)
+        return Route(distance, [self.tiles.node_id(g) for g in p], latlon, duration)
+
+    def dist_m(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
+        return float(self._query(u, v, fallback_undirected, "length")[0])
+
+    def travel_time_s(self, u: Any, v: Any, fallback_undirected: bool = True) -> float:
+        return float(self._query(u, v, fallback_undirected, "time")[0])
+
+    def path_latlon(self, u: Any, v: Any) -> List[List[float]]:
+        return self.route(u, v, fallback_undirected=True).latlon_list()
+
+    def _draw_node(self) -> int:
+        # uniformno po čvorovima područja iz najveće jake komponente (svaki par je dostižan)
         for _ in range(self.max_sample_tries):
-            pu = self.rng.choice(self.nodes)
-            dv = self.rng.choice(self.nodes)
-            if dv == pu:
-                continue
-            d = self.dist_m(pu, dv, fallback_undirected=True)
-            if math.isfinite(d) and d > 0:
-                return pu, dv
+            r = self.rng.randrange(self._area_cum[-1])
+            j = bisect.bisect_right(self._area_cum, r)
+            k = self.area_tiles[j]
+            g = self.tiles.tile_start[k] + r - (self._area_cum[j - 1] if j else 0)
+            if self.tiles.components(int(g))[0] == self.main_scc:
+                return int(g)
+        raise RuntimeError("Područje zadataka nema čvorova u glavnoj komponenti grafa.")
 
+    def sample_task_nodes(self) -> Tuple[Any, Any]:
+        iu = self._draw_node()
+        iv = self._draw_node()
+        while iv == iu:
+            iv = self._draw_node()
+        return self.tiles.node_id(iu), self.tiles.node_id(iv)
+
+    def sample_task_route(self) -> Tuple[Any, Any, Route]:
+        for _ in range(self.max_sample_tries):
+            pu, dv = self.sample_task_nodes()
+            r = self.route(pu, dv, fallback_undirected=False)
+            if r.found and r.distance_m > 0:
+                return pu, dv, r
         raise RuntimeError("Ne mogu naći valjan (pickup, dropoff) par s rutom u grafu.")
 
+    def cache_stats(self) -> Dict[str, Any]:
+        stats = self.path_cache.stats()
+        stats["tiles"] = {
+            "loaded": self.tiles.loaded_tiles,
+            "total": self.tiles.tiles,
+            "loads": self.tiles.loads,
+            "evictions": self.tiles.evictions,
+        }
+        return stats
+
+    def memory_stats(self) -> Dict[str, int]:
+        out = {
+            "tiles": self.tiles.loaded_nbytes,
+            "index": int(self.tiles.tile_start.nbytes + self.tiles.tile_cells.nbytes),
+            "path_cache": int(self.path_cache.bytes),
+        }
+        out["total"] = sum(out.values())
+        return out
+
+    def clear_cache(self) -> None:
+        self.path_cache.clear()
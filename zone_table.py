@@ -0,0 +1,101 @@
+# zone_table.py
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+
+from spatial_index import EARTH_R, haversine_m
+
+_F32_REL = 1e-6
+
+
+class ZoneTable:
+    # zone = neprazne ćelije mreže; dist[a, b] = cestovna udaljenost reprezentativnih čvorova
+
+    ARRAY_FIELDS = ("grid", "cell_zone", "rep_lat", "rep_lon", "dist", "r_in", "r_out")
+
+    def __init__(
+        self,
+        grid: np.ndarray,
+        cell_zone: np.ndarray,
+        rep_lat: np.ndarray,
+        rep_lon: np.ndarray,
+        dist: np.ndarray,
+        r_in: np.ndarray,
+        r_out: np.ndarray,
+    ):
+        # grid = [lat0, cell_m, x0, y0, nx, ny, detour]
+        self.grid = np.asarray(grid, dtype=np.float64)
+        self.cell_zone = cell_zone
+        self.rep_lat = rep_lat
+        self.rep_lon = rep_lon
+        self.dist = dist
+        # najveća cestovna udaljenost čvor -> reprezentant (r_in) i reprezentant -> čvor (r_out) u zoni
+        self.r_in = r_in
+        self.r_out = r_out
+
+        lat0, cell_m, x0, y0, nx, ny, detour = self.grid.tolist()
+        self.cell_m = float(cell_m)
+        # medijan (cesta / zračna linija) između reprezentanata; za parove unutar iste zone
+        self.detour = float(detour)
+        self._kx = EARTH_R * math.cos(math.radians(lat0)) * math.pi / 180.0
+        self._ky = EARTH_R * math.pi / 180.0
+        self._x0 = float(x0)
+        self._y0 = float(y0)
+        self._nx = int(nx)
+        self._ny = int(ny)
+        self._cells = memoryview(self.cell_zone)
+        self._dist = memoryview(self.dist.reshape(-1))
+        self._z = int(self.dist.shape[0])
+
+    @property
+    def zones(self) -> int:
+        return self._z
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "ZoneTable":
+        return cls(**{name: arrays[name] for name in cls.ARRAY_FIELDS})
+
+    def zone_of(self, lat: float, lon: float) -> int:
+        cx = min(max(int((float(lon) * self._kx - self._x0) // self.cell_m), 0), self._nx - 1)
+        cy = min(max(int((float(lat) * self._ky - self._y0) // self.cell_m), 0), self._ny - 1)
+        return self._cells[cy * self._nx + cx]
+
+    def zones_of(self, lats, lons) -> np.ndarray:
+        x = np.asarray(lons, dtype=np.float64) * self._kx
+        y = np.asarray(lats, dtype=np.float64) * self._ky
+        cx = np.clip(((x - self._x0) // self.cell_m).astype(np.int64), 0, self._nx - 1)
+        cy = np.clip(((y - self._y0) // self.cell_m).astype(np.int64), 0, self._ny - 1)
+        return self.cell_zone[cy * self._nx + cx]
+
+    def estimate_m(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        # O(1): zračna linija puta faktor obilaska para zona (cesta / zračna linija reprezentanata)
+        straight = haversine_m(lat1, lon1, lat2, lon2)
+        za = self.zone_of(lat1, lon1)
+        zb = self.zone_of(lat2, lon2)
+        if za != zb:
+            d = self._dist[za * self._z + zb]
+            rep = haversine_m(self.rep_lat[za], self.rep_lon[za], self.rep_lat[zb], self.rep_lon[zb])
+            if math.isfinite(d) and rep > 0.0:
+                return straight * max(1.0, d / rep)
+        return straight * self.detour
+
+    def bounds_m(self, lat1: float, lon1: float, lat2: float, lon2: float) -> Tuple[float, float]:
+        # granice za čvorove u zonama (za proizvoljnu točku vrijede za njezin najbliži čvor)
+        straight = haversine_m(lat1, lon1, lat2, lon2)
+        za = self.zone_of(lat1, lon1)
+        zb = self.zone_of(lat2, lon2)
+        d = self._dist[za * self._z + zb]
+        if za == zb or not math.isfinite(d):
+            return straight, math.inf
+        # float32 matrica: granice se šire za relativnu grešku zaokruživanja
+        lo = (d - float(self.r_out[za]) - float(self.r_in[zb])) * (1.0 - _F32_REL)
+        hi = (d + float(self.r_in[za]) + float(self.r_out[zb])) * (1.0 + _F32_REL)
+        return max(straight, lo), hi